@@ -0,0 +1,52 @@
+"""Helper script to run a stub of the baz service, or record its latency."""
+
+import json
+import time
+
+import click
+
+from zero.services.baz import BazService
+from zero.stubs import baz
+
+
+@click.group()
+def cli():
+    """Run a stub of the baz service, or record the latency of the real one."""
+
+
+@cli.command()
+@click.option('--port', default=8001, help='Port to listen on.')
+@click.option('--latency', default='fixed:0',
+              help='fixed:SECONDS, uniform:LOW,HIGH, lognormal:MEDIAN,SIGMA'
+                   ' or replay[:PATH].')
+@click.option('--error-rate', default=0., help='Share of requests that fail.')
+@click.option('--error-status', default=503, help='Status of failures.')
+@click.option('--slow-loris', default=0.,
+              help='Seconds between bytes of each response body.')
+@click.option('--fixtures', default=baz.FIXTURES, help='Bazs to serve.')
+@click.option('--seed', default=None, type=int, help='Random seed.')
+def serve(port, latency, error_rate, error_status, slow_loris, fixtures,
+          seed):
+    """Serve bazs until interrupted."""
+    stub = baz.BazStub(baz.load_fixtures(fixtures), baz.parse_latency(latency),
+                       error_rate, error_status, slow_loris, seed, port)
+    with stub:
+        click.echo(f'Serving bazs at {stub.url}')
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            click.echo(f'Served {stub.requests} requests')
+
+
+@cli.command()
+@click.argument('output', type=click.File('w'))
+@click.option('--url', default=BazService.bazcave, help='The real service.')
+@click.option('-n', default=100, help='Number of requests.')
+def record(output, url, n):
+    """Record the latency of the real baz service to OUTPUT, for replay."""
+    json.dump(baz.record_latencies(url, n), output)
+
+
+if __name__ == '__main__':
+    cli()
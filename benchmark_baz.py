@@ -0,0 +1,108 @@
+"""
+Helper script to measure the baz integration against a stub of the service.
+
+Each scenario runs against a fresh :class:`zero.stubs.baz.BazStub` with the
+same seed, so results are comparable between scenarios and between runs. No
+network access is needed.
+"""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+
+from zero.benchmarks.async_baz import AsyncBazService
+from zero.services import baz
+from zero.stubs.baz import BazStub, parse_latency
+
+
+def run_sync(stub, n_requests, concurrency, **config):
+    """Retrieve bazs with :class:`.BazService`, from a pool of threads."""
+    service = baz.BazService('http://baz-stub/', max_retries=0,
+                             pool_maxsize=concurrency, **config)
+    service.bazcave = stub.url
+
+    def retrieve(baz_id):
+        return _timed(service.retrieve_baz, baz_id)
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        return list(pool.map(retrieve, range(n_requests)))
+
+
+def run_async(stub, n_requests, concurrency):
+    """Retrieve bazs with :class:`.AsyncBazService`, from one thread."""
+    async def retrieve_all():
+        limit = asyncio.Semaphore(concurrency)
+        async with AsyncBazService(stub.url,
+                                   pool_maxsize=concurrency) as service:
+            async def retrieve(baz_id):
+                async with limit:
+                    start = time.monotonic()
+                    try:
+                        await service.retrieve_baz(baz_id)
+                    except (IOError, baz.NoBaz):
+                        return time.monotonic() - start, False
+                    return time.monotonic() - start, True
+            return await asyncio.gather(*[retrieve(baz_id)
+                                          for baz_id in range(n_requests)])
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(retrieve_all())
+    finally:
+        loop.close()
+
+
+SCENARIOS = {
+    'sync': lambda stub, n, c: run_sync(stub, n, c),
+    'cached': lambda stub, n, c: run_sync(stub, n, c, cache_ttl=60),
+    'async': run_async,
+}
+
+
+@click.command()
+@click.option('--scenarios', default='sync,cached,async',
+              help='Comma-separated scenarios: ' + ', '.join(SCENARIOS))
+@click.option('--requests', 'n_requests', default=500,
+              help='Bazs to retrieve.')
+@click.option('--concurrency', default=10, help='Requests in flight at once.')
+@click.option('--latency', default='replay',
+              help='Latency of the stub; see baz_stub.py serve --help.')
+@click.option('--error-rate', default=0., help='Share of requests that fail.')
+@click.option('--seed', default=1, help='Random seed for the stub.')
+def benchmark_baz(scenarios, n_requests, concurrency, latency, error_rate,
+                  seed):
+    """Retrieve bazs in each scenario, and report latency and throughput."""
+    click.echo(f'{"scenario":<9} {"req/s":>8} {"p50 ms":>7} {"p95 ms":>7}'
+               f' {"p99 ms":>7} {"errors":>6} {"upstream":>8}')
+    for scenario in scenarios.split(','):
+        baz.responses.clear()
+        baz.breaker.reset()
+        with BazStub(latency=parse_latency(latency), error_rate=error_rate,
+                     seed=seed) as stub:
+            start = time.monotonic()
+            timings = SCENARIOS[scenario](stub, n_requests, concurrency)
+            elapsed = time.monotonic() - start
+        latencies = sorted(seconds * 1000 for seconds, _ in timings)
+        errors = sum(1 for _, ok in timings if not ok)
+        click.echo(f'{scenario:<9} {n_requests / elapsed:>8.1f}'
+                   f' {_percentile(latencies, 50):>7.1f}'
+                   f' {_percentile(latencies, 95):>7.1f}'
+                   f' {_percentile(latencies, 99):>7.1f}'
+                   f' {errors:>6} {stub.requests:>8}')
+
+
+def _percentile(ordered, percent):
+    return ordered[min(int(len(ordered) * percent / 100), len(ordered) - 1)]
+
+
+def _timed(func, *args):
+    start = time.monotonic()
+    try:
+        func(*args)
+    except (IOError, baz.NoBaz):
+        return time.monotonic() - start, False
+    return time.monotonic() - start, True
+
+
+if __name__ == '__main__':
+    benchmark_baz()
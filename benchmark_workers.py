@@ -0,0 +1,131 @@
+"""
+Helper script to compare worker pools on the mutation workload.
+
+For each pool, a worker is started in a fresh process with an in-memory
+broker, a SQLite database of things and a file system result backend. The
+script sends ``--tasks`` mutation tasks, waits for them to finish, and
+reports tasks per second and the memory used by the worker (including any
+pool processes).
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+import click
+
+
+@click.command()
+@click.option('--pools', default='prefork,threads',
+              help='Comma-separated pools to compare, e.g. prefork,threads,'
+                   'gevent.')
+@click.option('--tasks', 'n_tasks', default=200, help='Tasks to run.')
+@click.option('--concurrency', default=8,
+              help='Processes, threads or greenlets per worker.')
+@click.option('--sleep', default=0.1, help='Seconds each task sleeps.')
+def benchmark_workers(pools, n_tasks, concurrency, sleep):
+    """Run the mutation workload with each pool, and report throughput."""
+    click.echo(f'{"pool":<10} {"tasks":>6} {"seconds":>8} {"tasks/s":>8}'
+               f' {"rss (MB)":>9}')
+    for pool in pools.split(','):
+        output = subprocess.run(
+            [sys.executable, __file__, '--run-one', pool, str(n_tasks),
+             str(concurrency), str(sleep)],
+            check=True, stdout=subprocess.PIPE
+        ).stdout
+        report = json.loads(output.decode('utf-8').strip().splitlines()[-1])
+        click.echo(f'{pool:<10} {report["tasks"]:>6}'
+                   f' {report["seconds"]:>8.2f} {report["tasks_per_s"]:>8.1f}'
+                   f' {report["rss_kb"] / 1024:>9.1f}')
+
+
+def run_one(pool, n_tasks, concurrency, sleep):
+    """Run the workload with one pool, and print a JSON report."""
+    if pool == 'gevent':
+        from gevent import monkey
+        monkey.patch_all()
+
+    workdir = tempfile.mkdtemp()
+    os.environ['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{workdir}/things.db'
+    os.environ['CELERY_WORKER_POOL'] = pool
+
+    from celery.worker import WorkController
+    from zero.factory import create_worker_app, celery_app
+    from zero.services import things
+    from zero import lifecycle, tasks
+
+    app = create_worker_app()
+    celery_app.conf.update(
+        broker_url='memory://',
+        broker_transport_options={'polling_interval': 0.01},
+        result_backend=f'file://{workdir}',
+        result_serializer='json',
+        task_always_eager=False,
+        # The worker prefetches the whole workload: the memory broker only
+        # frees prefetch slots every couple of seconds, and we want to
+        # measure the pool rather than the broker.
+        worker_prefetch_multiplier=n_tasks // concurrency + 1,
+    )
+    app.app_context().push()
+    things.db.create_all()
+    for i in range(n_tasks):
+        things.db.session.add(things.DBThing(name=f'Thing {i}',
+                                             created=datetime.now()))
+    things.db.session.commit()
+    thing_ids = [row.id for row in things.db.session.query(things.DBThing.id)]
+    lifecycle.init_worker(app)
+
+    worker = WorkController(app=celery_app, pool_cls=pool,
+                            concurrency=concurrency, loglevel='WARNING',
+                            without_heartbeat=True, without_mingle=True,
+                            without_gossip=True)
+    report = {'tasks': n_tasks}
+
+    def send_and_wait():
+        start = time.monotonic()
+        sent = [tasks.mutate_a_thing.apply_async((thing_id, sleep))
+                for thing_id in thing_ids]
+        while not all(result.ready() for result in sent):
+            time.sleep(0.05)
+        report['seconds'] = time.monotonic() - start
+        report['tasks_per_s'] = n_tasks / report['seconds']
+        report['rss_kb'] = _get_rss_kb(os.getpid())
+        worker.stop()
+
+    # The memory broker drops messages sent to queues that do not exist yet.
+    with celery_app.connection_for_write() as connection:
+        for queue in celery_app.amqp.queues.values():
+            queue(connection.default_channel).declare()
+
+    # The worker runs in the main thread, which has the application context.
+    threading.Thread(target=send_and_wait, daemon=True).start()
+    worker.start()
+
+    print(json.dumps(report))
+
+
+def _get_rss_kb(pid):
+    """Get the resident memory of a process and its children, in KB."""
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            rss = next(int(line.split()[1]) for line in f
+                       if line.startswith('VmRSS:'))
+        with open(f'/proc/{pid}/task/{pid}/children') as f:
+            children = [int(child) for child in f.read().split()]
+    except (OSError, StopIteration):     # Not Linux; use the peak instead.
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss + sum(_get_rss_kb(child) for child in children)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 1 and sys.argv[1] == '--run-one':
+        run_one(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]),
+                float(sys.argv[5]))
+    else:
+        benchmark_workers()
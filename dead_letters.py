@@ -0,0 +1,34 @@
+"""Helper script to inspect and replay tasks that failed for good."""
+
+import click
+from zero.factory import create_worker_app
+from zero import retries
+
+app = create_worker_app()
+app.app_context().push()
+
+
+@click.group()
+def cli():
+    """Inspect and replay dead-lettered tasks."""
+
+
+@cli.command('list')
+def list_dead_letters():
+    """List dead-lettered tasks, most recent first."""
+    for entry in retries.get_dead_letters():
+        click.echo(f'{entry["failed"]} {entry["task_id"]} {entry["task"]}'
+                   f' {entry["args"]} after {entry["retries"]} retries:'
+                   f' {entry["error"]}')
+
+
+@cli.command()
+@click.argument('task_ids', nargs=-1)
+def replay(task_ids):
+    """Send dead-lettered tasks again (all of them, if no IDs are given)."""
+    sent = retries.replay(list(task_ids) if task_ids else None)
+    click.echo(f'Replayed {len(sent)} tasks')
+
+
+if __name__ == '__main__':
+    cli()
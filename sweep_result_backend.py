@@ -0,0 +1,25 @@
+"""Helper script to report on memory used in the Celery result backend."""
+
+import click
+from zero.factory import create_worker_app
+from zero import results
+
+app = create_worker_app()
+app.app_context().push()
+
+
+@app.cli.command()
+@click.option('--batch-size', default=1000, help='Keys to scan at a time.')
+@click.option('--missing-ttl', default=None, type=int,
+              help='Set this TTL (seconds) on keys that never expire.')
+def sweep_result_backend(batch_size, missing_ttl):
+    """Report memory used in the result backend by type of key."""
+    report = results.sweep(batch_size=batch_size, missing_ttl=missing_ttl)
+    click.echo(f'{"type":<10} {"keys":>10} {"bytes":>14} {"no ttl":>10}')
+    for key_type, counts in sorted(report.items()):
+        click.echo(f'{key_type:<10} {counts["keys"]:>10} '
+                   f'{counts["bytes"]:>14} {counts["no_ttl"]:>10}')
+
+
+if __name__ == '__main__':
+    sweep_result_backend()
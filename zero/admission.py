@@ -0,0 +1,276 @@
+"""
+Admission control and load shedding for the API.
+
+Three mechanisms are provided here:
+
+1. Per-client rate limiting, using a token bucket for each authenticated
+   session (see :class:`TokenBucket`). Clients that exceed their rate get a
+   ``429 Too Many Requests`` response. This is off unless
+   ``RATE_LIMIT_PER_SECOND`` is set.
+2. A global limit on the number of requests that are handled concurrently by
+   this process. Requests beyond that limit get a ``503 Service Unavailable``
+   response.
+3. Load shedding for expensive operations (see :func:`check_capacity`). When
+   the mutation queue backlog or the latency of the things database exceeds
+   the configured thresholds, we refuse new work rather than letting it pile
+   up in the worker queue.
+
+In all cases a ``Retry-After`` header tells the client when to try again.
+Requests to :const:`EXEMPT_ENDPOINTS` are not limited by (1) or (2).
+
+Note that all state is held in-process; with several uWSGI processes, each
+process enforces the configured limits independently.
+"""
+
+import math
+import time
+from functools import partial
+from threading import Lock, BoundedSemaphore
+from typing import Callable, Dict, Optional, Tuple
+from collections import OrderedDict
+from http import HTTPStatus
+
+from flask import Flask, Response, request, g, jsonify
+
+from arxiv.base import logging
+from arxiv.base.globals import get_application_config
+
+from . import tasks
+from .services import things
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMITED = 'too many requests; slow down'
+TOO_BUSY = 'service is too busy; try again later'
+
+EXEMPT_ENDPOINTS = {
+    'external_api.ok',
+    'external_api.mutation_status',
+    'external_api.mutation_statuses',
+}
+"""
+Endpoints that are always admitted.
+
+Health checks must get through when we are busy, and clients that poll for
+the status of their mutations would otherwise use up their rate limit.
+"""
+
+
+class Overloaded(Exception):
+    """The service does not have capacity to handle a request."""
+
+    def __init__(self, reason: str, retry_after: float) -> None:
+        """Set the number of seconds after which the client may retry."""
+        super(Overloaded, self).__init__(reason)
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """
+    A token bucket, for rate limiting.
+
+    The bucket holds at most ``capacity`` tokens, and is refilled at ``rate``
+    tokens per second. Each request takes a token; if the bucket is empty,
+    the request is refused.
+    """
+
+    def __init__(self, rate: float, capacity: int) -> None:
+        """Start with a full bucket."""
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = Lock()
+
+    def take(self) -> float:
+        """
+        Take a token from the bucket.
+
+        Returns
+        -------
+        float
+            Zero if a token was available; otherwise, the number of seconds
+            until the next token will be available.
+
+        """
+        with self._lock:
+            now = time.monotonic()
+            elapsed = now - self._updated
+            self._tokens = min(self.capacity,
+                               self._tokens + elapsed * self.rate)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.
+            return (1 - self._tokens) / self.rate
+
+
+class RateLimiter:
+    """Maintains a :class:`TokenBucket` for each client."""
+
+    def __init__(self, rate: float, capacity: int,
+                 max_clients: int = 10000) -> None:
+        """Set the rate and capacity of each client's bucket."""
+        self.rate = rate
+        self.capacity = capacity
+        self.max_clients = max_clients
+        self._buckets: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._lock = Lock()
+
+    def take(self, client: str) -> float:
+        """Take a token from the bucket for ``client``."""
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.capacity)
+                self._buckets[client] = bucket
+                # Forget the least recently seen client.
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+        return bucket.take()
+
+
+# These outlive the application instance; see ``wsgi.py``.
+_limiters: Dict[Tuple[float, int], RateLimiter] = {}
+_semaphores: Dict[int, BoundedSemaphore] = {}
+_samples: Dict[str, Tuple[float, float]] = {}
+_lock = Lock()
+
+
+def init_app(app: Flask) -> None:
+    """Set configuration defaults and install admission control hooks."""
+    app.config.setdefault('RATE_LIMIT_PER_SECOND', 0.)
+    app.config.setdefault('RATE_LIMIT_BURST', 20)
+    app.config.setdefault('MAX_CONCURRENT_REQUESTS', 0)
+    app.config.setdefault('MUTATION_QUEUE_MAX_BACKLOG', 0)
+    app.config.setdefault('DB_LATENCY_THRESHOLD', 0.)
+    app.config.setdefault('LOAD_SAMPLE_INTERVAL', 1.)
+    app.config.setdefault('RETRY_AFTER', 5)
+    app.before_request(_admit)
+    app.teardown_request(_release)
+
+
+def _admit() -> Optional[Response]:
+    if request.endpoint in EXEMPT_ENDPOINTS:
+        return None
+    config = get_application_config()
+    retry_after = config['RETRY_AFTER']
+    rate = config['RATE_LIMIT_PER_SECOND']
+    if rate > 0:
+        wait = _get_limiter(rate, config['RATE_LIMIT_BURST']).take(_client())
+        if wait > 0:
+            logger.debug('Rate limited client %s', _client())
+            return _refuse(RATE_LIMITED, HTTPStatus.TOO_MANY_REQUESTS, wait)
+
+    limit = config['MAX_CONCURRENT_REQUESTS']
+    if limit > 0:
+        semaphore = _get_semaphore(limit)
+        if not semaphore.acquire(blocking=False):
+            logger.debug('Reached limit of %i concurrent requests', limit)
+            return _refuse(TOO_BUSY, HTTPStatus.SERVICE_UNAVAILABLE,
+                           retry_after)
+        g.admission_semaphore = semaphore
+    return None
+
+
+def _release(exception: Optional[BaseException] = None) -> None:
+    semaphore = g.pop('admission_semaphore', None)
+    if semaphore is not None:
+        semaphore.release()
+
+
+def _client() -> str:
+    """Get a key for the authenticated session, or the remote address."""
+    session = request.environ.get('session')
+    session_id = getattr(session, 'session_id', None)
+    if session_id:
+        return f'session:{session_id}'
+    return f'addr:{request.remote_addr}'
+
+
+def _refuse(reason: str, status_code: HTTPStatus,
+            retry_after: float) -> Response:
+    response: Response = jsonify({'reason': reason})
+    response.status_code = status_code
+    response.headers['Retry-After'] = str(int(math.ceil(retry_after)))
+    return response
+
+
+def _get_limiter(rate: float, capacity: int) -> RateLimiter:
+    with _lock:
+        if (rate, capacity) not in _limiters:
+            _limiters[(rate, capacity)] = RateLimiter(rate, capacity)
+        return _limiters[(rate, capacity)]
+
+
+def _get_semaphore(limit: int) -> BoundedSemaphore:
+    with _lock:
+        if limit not in _semaphores:
+            _semaphores[limit] = BoundedSemaphore(limit)
+        return _semaphores[limit]
+
+
+def check_capacity(queue: Optional[str] = None) -> None:
+    """
+    Check whether we have capacity to accept more mutation work.
+
+    The mutation queue backlog and the latency of the things database are
+    sampled at most once per ``LOAD_SAMPLE_INTERVAL`` seconds, so that this
+    check does not itself add much load.
+
+    Parameters
+    ----------
+    queue : str
+        The queue to which the work would be sent. Defaults to the default
+        task queue.
+
+    Raises
+    ------
+    :class:`Overloaded`
+        If the queue backlog or database latency exceeds the configured
+        threshold, or if we cannot measure them at all.
+
+    """
+    config = get_application_config()
+    interval = config['LOAD_SAMPLE_INTERVAL']
+    retry_after = config['RETRY_AFTER']
+
+    max_backlog = config['MUTATION_QUEUE_MAX_BACKLOG']
+    if max_backlog > 0:
+        try:
+            backlog = _sample(f'backlog:{queue}',
+                              partial(tasks.get_queue_backlog, queue),
+                              interval)
+        except Exception as e:
+            logger.error('Could not get queue backlog: %s', e)
+            raise Overloaded(TOO_BUSY, retry_after) from e
+        if backlog > max_backlog:
+            logger.debug('Queue backlog is %i; shedding load', backlog)
+            raise Overloaded(TOO_BUSY, retry_after)
+
+    max_latency = config['DB_LATENCY_THRESHOLD']
+    if max_latency > 0:
+        try:
+            latency = _sample('latency', things.ping, interval)
+        except IOError as e:
+            logger.error('Could not reach the database: %s', e)
+            raise Overloaded(TOO_BUSY, retry_after) from e
+        if latency > max_latency:
+            logger.debug('Database latency is %f; shedding load', latency)
+            raise Overloaded(TOO_BUSY, retry_after)
+
+
+def _sample(name: str, measure: Callable[[], float],
+            interval: float) -> float:
+    """Get a recent measurement, or take a new one if it is stale."""
+    now = time.monotonic()
+    with _lock:
+        sample = _samples.get(name)
+    if sample is not None and now - sample[0] < interval:
+        return sample[1]
+    value = float(measure())
+    with _lock:
+        _samples[name] = (now, value)
+    return value
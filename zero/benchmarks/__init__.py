@@ -0,0 +1,5 @@
+"""
+Code that is only used to measure alternatives to what the application does.
+
+See ``benchmark_baz.py``. Nothing in the application imports from here.
+"""
@@ -0,0 +1,188 @@
+"""
+An asyncio client for the baz service, to compare against the one we use.
+
+:class:`AsyncBazService` has the same contract as :class:`.BazService`, but
+its methods are coroutines, so that many baz calls can be awaited at once
+without a thread for each. ``benchmark_baz.py`` measures it against
+:class:`.BazService`. It is not used by the application, and does not retry
+failed requests. For example:
+
+.. code-block:: python
+
+   async with AsyncBazService.from_config() as service:
+       bazs = await asyncio.gather(*[service.retrieve_baz(baz_id)
+                                     for baz_id in baz_ids],
+                                   return_exceptions=True)
+
+
+Connections are pooled by the client session, which is bound to the event
+loop in which it is first used; use a service in one event loop only. Calls
+share the circuit breaker of :class:`.BazService` (:data:`.baz.breaker`), but
+not its response cache, which would block the event loop.
+"""
+
+import asyncio
+import json
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, \
+    TypeVar
+
+import aiohttp
+
+from arxiv.base import logging
+from arxiv.base.globals import get_application_config
+
+from zero.domain import Baz
+from zero.services.baz import BazService, NoBaz, breaker, \
+    DEFAULT_POOL_MAXSIZE, DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT, \
+    DEFAULT_STATUS_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class AsyncBazService:
+    """Retrieves bazs from the baz service, asynchronously."""
+
+    def __init__(self, bazcave: Optional[str] = None,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 status_timeout: float = DEFAULT_STATUS_TIMEOUT,
+                 keep_alive: bool = True, use_breaker: bool = False) -> None:
+        """
+        Configure the client; the session is created when first used.
+
+        Parameters
+        ----------
+        bazcave : str
+            URL of the baz. Defaults to that of :class:`.BazService`.
+        pool_maxsize : int
+            Maximum number of connections to the baz service at once.
+        connect_timeout : float
+            Seconds to wait for a connection.
+        read_timeout : float
+            Seconds to wait between bytes of a response.
+        status_timeout : float
+            Seconds to wait for a response to a status check.
+        keep_alive : bool
+            Whether to keep connections open between requests.
+        use_breaker : bool
+            Whether to use the circuit breaker of :class:`.BazService`.
+
+        """
+        self.bazcave = bazcave or BazService.bazcave
+        self.pool_maxsize = pool_maxsize
+        self.keep_alive = keep_alive
+        self.use_breaker = use_breaker
+        self._timeout = aiohttp.ClientTimeout(sock_connect=connect_timeout,
+                                              sock_read=read_timeout)
+        self._status_timeout = aiohttp.ClientTimeout(total=status_timeout)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    def from_config(cls, config: Optional[Mapping[str, Any]] = None) \
+            -> 'AsyncBazService':
+        """Configure a client from the ``BAZ_*`` configuration parameters."""
+        if config is None:
+            config = get_application_config()
+        return cls(
+            pool_maxsize=int(config.get('BAZ_POOL_MAXSIZE',
+                                        DEFAULT_POOL_MAXSIZE)),
+            connect_timeout=float(config.get('BAZ_CONNECT_TIMEOUT',
+                                             DEFAULT_CONNECT_TIMEOUT)),
+            read_timeout=float(config.get('BAZ_READ_TIMEOUT',
+                                          DEFAULT_READ_TIMEOUT)),
+            status_timeout=float(config.get('BAZ_STATUS_TIMEOUT',
+                                            DEFAULT_STATUS_TIMEOUT)),
+            keep_alive=bool(config.get('BAZ_KEEP_ALIVE', True)),
+            use_breaker=int(config.get('BAZ_BREAKER_THRESHOLD', 0)) > 0
+        )
+
+    async def __aenter__(self) -> 'AsyncBazService':
+        """Use the service in an ``async with`` block."""
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        """Close the session at the end of the block."""
+        await self.close()
+
+    async def close(self) -> None:
+        """Close the session, and its pooled connections."""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.pool_maxsize,
+                                             force_close=not self.keep_alive)
+            self._session = aiohttp.ClientSession(connector=connector,
+                                                  timeout=self._timeout)
+        return self._session
+
+    async def status(self) -> bool:
+        """Check the availability of the Baz service."""
+        try:
+            await self._call(self._head)
+        except IOError:     # Includes CircuitOpen.
+            return False
+        return True
+
+    async def _head(self) -> None:
+        try:
+            async with self._get_session().head(
+                    self.bazcave, timeout=self._status_timeout) as response:
+                if response.status >= 400:
+                    raise IOError('Baz status is %i' % response.status)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise IOError('Could not check baz status: %s' % e) from e
+
+    async def retrieve_baz(self, baz_id: int) -> Baz:
+        """
+        Go get a baz and bring it back.
+
+        Parameters
+        ----------
+        baz_id : int
+            The PK id of the baz of interest.
+
+        Return
+        ------
+        :class:`.Baz`
+
+        Raises
+        ------
+        :class:`.NoBaz`
+            If there is no baz.
+        IOError
+            If there is a problem getting the baz.
+
+        """
+        logger.debug('Retrieve a baz with id = %i', baz_id)
+        data = await self._call(self._get_baz_data)
+        return Baz(foo=data['city'], mukluk=data['ip_decimal'])  # type: ignore
+
+    async def _get_baz_data(self) -> Dict[str, Any]:
+        try:
+            async with self._get_session().get(self.bazcave) as response:
+                if response.status >= 400:
+                    logger.debug('Baz responded with status %i',
+                                 response.status)
+                    if response.status == 404:
+                        raise NoBaz('There is no baz')
+                    raise IOError('Could not get baz: %i' % response.status)
+                body = await response.read()
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            raise IOError('Could not get baz: %s' % e) from e
+        try:
+            data: Dict[str, Any] = json.loads(body)
+        except ValueError as e:
+            logger.debug('Baz response could not be decoded')
+            raise IOError('Could not read the baz') from e
+        return data
+
+    async def _call(self, func: Callable[[], Awaitable[T]]) -> T:
+        if self.use_breaker:
+            return await breaker.call_async(func)
+        return await func()
@@ -0,0 +1,107 @@
+"""Tests for :mod:`zero.benchmarks.async_baz`."""
+
+import asyncio
+import time
+from typing import Awaitable, List, TypeVar
+from unittest import TestCase
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer as StubServer
+
+from zero.domain import Baz
+from zero.services import baz
+from zero.benchmarks.async_baz import AsyncBazService
+
+T = TypeVar('T')
+
+DELAY = 0.2
+"""Seconds the stub baz service takes to respond."""
+
+
+class TestAsyncBazService(TestCase):
+    """:class:`.AsyncBazService` talks to the baz service asynchronously."""
+
+    def setUp(self) -> None:
+        """Start a stub baz service on a new event loop."""
+        self.loop = asyncio.new_event_loop()
+        self.addCleanup(self.loop.close)
+        self.status = 200
+        self.body = b'{"city": "fooville", "ip_decimal": 12346}'
+        self.requests: List[str] = []
+
+        async def handle(request: web.Request) -> web.Response:
+            self.requests.append(request.method)
+            await asyncio.sleep(DELAY)
+            return web.Response(status=self.status, body=self.body,
+                                content_type='application/json')
+
+        app = web.Application()
+        app.router.add_route('*', '/json', handle)
+        self.server = StubServer(app)
+        self._run(self.server.start_server())
+        self.addCleanup(self._run, self.server.close())
+        self.service = AsyncBazService(str(self.server.make_url('/json')),
+                                       read_timeout=1.)
+        self.addCleanup(self._run, self.service.close())
+        baz.breaker.reset()
+        self.addCleanup(baz.breaker.reset)
+
+    def _run(self, coroutine: Awaitable[T]) -> T:
+        return self.loop.run_until_complete(coroutine)
+
+    def test_retrieve_baz(self) -> None:
+        """If there is a baz, returns a :class:`.Baz`."""
+        self.assertEqual(self._run(self.service.retrieve_baz(4)),
+                         Baz(foo='fooville', mukluk=12346))
+
+    def test_concurrent(self) -> None:
+        """Many bazs can be awaited at once."""
+        async def retrieve_many() -> List[Baz]:
+            return await asyncio.gather(*[self.service.retrieve_baz(baz_id)
+                                          for baz_id in range(10)])
+        start = time.monotonic()
+        bazs = self._run(retrieve_many())
+        self.assertEqual(len(bazs), 10)
+        self.assertLess(time.monotonic() - start, DELAY * 5)
+
+    def test_no_baz(self) -> None:
+        """If there is no such baz, raises NoBaz."""
+        self.status = 404
+        with self.assertRaises(baz.NoBaz):
+            self._run(self.service.retrieve_baz(4))
+
+    def test_errors(self) -> None:
+        """If the baz cannot be retrieved or read, raises IOError."""
+        self.status = 500
+        with self.assertRaises(IOError):
+            self._run(self.service.retrieve_baz(4))
+        self.status = 200
+        self.body = b'not json'
+        with self.assertRaises(IOError):
+            self._run(self.service.retrieve_baz(4))
+
+    def test_timeout(self) -> None:
+        """If the baz service is too slow, raises IOError."""
+        service = AsyncBazService(self.service.bazcave, read_timeout=DELAY / 4)
+        self.addCleanup(self._run, service.close())
+        with self.assertRaises(IOError):
+            self._run(service.retrieve_baz(4))
+
+    def test_status(self) -> None:
+        """The status of the baz service is checked with a HEAD request."""
+        self.assertTrue(self._run(self.service.status()))
+        self.status = 503
+        self.assertFalse(self._run(self.service.status()))
+        self.assertEqual(self.requests, ['HEAD', 'HEAD'])
+
+    def test_breaker(self) -> None:
+        """The circuit breaker is shared with :class:`.BazService`."""
+        self.service.use_breaker = True
+        baz.breaker.failure_threshold = 1
+        self.addCleanup(setattr, baz.breaker, 'failure_threshold',
+                        baz.DEFAULT_BREAKER_THRESHOLD)
+        self.status = 500
+        with self.assertRaises(IOError):
+            self._run(self.service.retrieve_baz(4))
+        self.assertFalse(self._run(self.service.status()))
+        self.assertEqual(len(self.requests), 1)
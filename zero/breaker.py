@@ -0,0 +1,167 @@
+"""
+A circuit breaker, for calls to services that may go down.
+
+When a service is down, calls to it tend to fail slowly (e.g. by timing out),
+and every request that makes one is held up. A :class:`CircuitBreaker` keeps
+track of consecutive failures. Once there have been too many, it "opens" and
+fails calls immediately with :class:`CircuitOpen` rather than making them.
+After a cooldown period it lets a single call through to probe the service
+("half-open"); if that call succeeds the breaker closes again, and if not it
+stays open for another cooldown period.
+"""
+
+import time
+from threading import Lock
+from typing import Any, Awaitable, Callable, Dict, Tuple, Type, TypeVar
+
+from arxiv.base import logging
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitOpen(IOError):
+    """A call was not made, because the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Fails calls fast after consecutive failures, for a while."""
+
+    def __init__(self, name: str, failure_threshold: int = 5,
+                 cooldown: float = 30.,
+                 errors: Tuple[Type[BaseException], ...] = (IOError,),
+                 timer: Callable[[], float] = time.monotonic) -> None:
+        """
+        Start closed.
+
+        Parameters
+        ----------
+        name : str
+            Used in log messages.
+        failure_threshold : int
+            Number of consecutive failures after which the breaker opens.
+        cooldown : float
+            Seconds for which the breaker stays open before it lets a call
+            through to probe the service.
+        errors : tuple
+            Exceptions that count as failures. Other exceptions are raised to
+            the caller, but mean that the service is up.
+        timer : callable
+            Returns the current time, in seconds.
+
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.errors = errors
+        self._timer = timer
+        self._lock = Lock()
+        self._failures = 0
+        self._opened_at = 0.
+        self._probing = False
+        self._state = CLOSED
+        self._rejected = 0
+
+    @property
+    def state(self) -> str:
+        """One of ``closed``, ``open``, or ``half-open``."""
+        with self._lock:
+            if self._state == OPEN and not self._probing \
+                    and self._timer() - self._opened_at >= self.cooldown:
+                return HALF_OPEN
+            return self._state
+
+    def call(self, func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """
+        Call ``func`` with ``args`` and ``kwargs``, unless the breaker is open.
+
+        Raises
+        ------
+        :class:`CircuitOpen`
+            If the breaker is open, or if it is half-open and another call is
+            already probing the service.
+
+        """
+        self._admit()
+        try:
+            result = func(*args, **kwargs)
+        except self.errors:
+            self._record_failure()
+            raise
+        except Exception:
+            self._record_success()
+            raise
+        except BaseException:
+            self._abandon_probe()
+            raise
+        self._record_success()
+        return result
+
+    async def call_async(self, func: Callable[..., Awaitable[T]], *args: Any,
+                         **kwargs: Any) -> T:
+        """Like :meth:`call`, but awaits the coroutine function ``func``."""
+        self._admit()
+        try:
+            result = await func(*args, **kwargs)
+        except self.errors:
+            self._record_failure()
+            raise
+        except Exception:
+            self._record_success()
+            raise
+        except BaseException:
+            self._abandon_probe()
+            raise
+        self._record_success()
+        return result
+
+    def _admit(self) -> None:
+        with self._lock:
+            if self._state == OPEN:
+                if self._probing \
+                        or self._timer() - self._opened_at < self.cooldown:
+                    self._rejected += 1
+                    raise CircuitOpen(f'{self.name} is unavailable')
+                self._probing = True
+
+    def _record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if self._probing or self._failures >= self.failure_threshold:
+                if self._state != OPEN:
+                    logger.error('%s failed %i times; opening circuit',
+                                 self.name, self._failures)
+                self._state = OPEN
+                self._opened_at = self._timer()
+            self._probing = False
+
+    def _record_success(self) -> None:
+        with self._lock:
+            if self._state == OPEN:
+                logger.info('%s is back; closing circuit', self.name)
+            self._state = CLOSED
+            self._failures = 0
+            self._probing = False
+
+    def _abandon_probe(self) -> None:
+        # E.g. the call was cancelled, or timed out under gevent. That says
+        # nothing about the service, but another call may now probe it.
+        with self._lock:
+            self._probing = False
+
+    def reset(self) -> None:
+        """Close the breaker, and forget about past failures."""
+        self._record_success()
+
+    @property
+    def stats(self) -> Dict[str, Any]:
+        """The ``state``, and counts of consecutive failures and rejections."""
+        state = self.state
+        with self._lock:
+            return {'state': state, 'failures': self._failures,
+                    'rejected': self._rejected}
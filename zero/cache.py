@@ -0,0 +1,245 @@
+"""In-process caching."""
+
+import time
+from collections import OrderedDict
+from threading import Lock, Thread
+from typing import Callable, Dict, Generic, Hashable, Optional, Set, Tuple, \
+    TypeVar
+
+from arxiv.base import logging
+
+from .concurrency import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+V = TypeVar('V')
+
+
+class TTLCache(Generic[V]):
+    """
+    A bounded, thread-safe cache whose entries expire.
+
+    When the cache is full, the least recently used entry is evicted to make
+    room for a new one. Expired entries are removed when they are next looked
+    up. Hits, misses, and evictions are counted; see :attr:`stats`.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.,
+                 timer: Callable[[], float] = time.monotonic) -> None:
+        """
+        Set the size of the cache and the default lifetime of entries.
+
+        Parameters
+        ----------
+        maxsize : int
+            Maximum number of entries.
+        ttl : float
+            Default number of seconds after which an entry expires.
+        timer : callable
+            Returns the current time, in seconds.
+
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._entries: 'OrderedDict[Hashable, Tuple[float, V]]' = \
+            OrderedDict()
+        self._lock = Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Get the value for ``key``, or ``None`` if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self._timer():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def set(self, key: Hashable, value: V,
+            ttl: Optional[float] = None) -> None:
+        """
+        Set the value for ``key``.
+
+        Parameters
+        ----------
+        key : hashable
+        value : object
+        ttl : float
+            Number of seconds after which the entry expires. If not provided,
+            the default for the cache is used.
+
+        """
+        if ttl is None:
+            ttl = self.ttl
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (self._timer() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        """Remove the entry for ``key``, if there is one."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        """Get the number of entries, including any that have expired."""
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Counts of hits, misses, and evictions, and the current size."""
+        with self._lock:
+            return {'hits': self._hits, 'misses': self._misses,
+                    'evictions': self._evictions, 'size': len(self._entries)}
+
+
+def _spawn(func: Callable[[], None]) -> None:
+    Thread(target=func, daemon=True, name='zero-refresh').start()
+
+
+class StaleWhileRevalidate(Generic[V]):
+    """
+    Caches the results of slow calls, and refreshes them in the background.
+
+    A value is fresh for ``ttl`` seconds after it is loaded. After that, it is
+    served stale for up to ``stale_ttl`` more seconds while it is loaded again
+    in the background; only one refresh per key is in flight at a time. If the
+    refresh fails, the stale value continues to be served until it expires.
+    Once a value has expired (or if there is none), the caller loads it; any
+    concurrent callers for the same key share that call.
+
+    Entries are not evicted, so this is for a small number of keys (e.g. a
+    handful of upstream URLs). Hits, stale hits, misses, refreshes, and
+    failed refreshes are counted; see :attr:`stats`.
+    """
+
+    def __init__(self, ttl: float = 60., stale_ttl: float = 300.,
+                 timer: Callable[[], float] = time.monotonic,
+                 spawn: Callable[[Callable[[], None]], None] = _spawn) \
+            -> None:
+        """
+        Set the default lifetime of entries.
+
+        Parameters
+        ----------
+        ttl : float
+            Default number of seconds for which a value is fresh.
+        stale_ttl : float
+            Default number of seconds for which a value may be served stale
+            once it is no longer fresh.
+        timer : callable
+            Returns the current time, in seconds.
+        spawn : callable
+            Runs a refresh in the background. By default, in a new thread.
+
+        """
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._timer = timer
+        self._spawn = spawn
+        self._entries: Dict[Hashable, Tuple[float, float, V]] = {}
+        self._refreshing: Set[Hashable] = set()
+        self._loads: SingleFlight[V] = SingleFlight()
+        self._lock = Lock()
+        self._counts = {'hits': 0, 'stale': 0, 'misses': 0, 'refreshes': 0,
+                        'refresh_errors': 0}
+
+    def get(self, key: Hashable, load: Callable[[], V],
+            ttl: Optional[float] = None,
+            stale_ttl: Optional[float] = None) -> V:
+        """
+        Get the value for ``key``, loading it with ``load`` if necessary.
+
+        Parameters
+        ----------
+        key : hashable
+        load : callable
+            Loads the value. Exceptions raised when the caller loads the value
+            are raised to the caller, and nothing is cached.
+        ttl : float
+            If provided, overrides the default for values loaded by this call.
+        stale_ttl : float
+            If provided, overrides the default for values loaded by this call.
+
+        Returns
+        -------
+        object
+
+        """
+        now = self._timer()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[1] <= now:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self._counts['misses'] += 1
+            elif entry[0] > now:
+                self._counts['hits'] += 1
+                return entry[2]
+            else:
+                self._counts['stale'] += 1
+                refresh = key not in self._refreshing
+                if refresh:
+                    self._refreshing.add(key)
+                    self._counts['refreshes'] += 1
+        if entry is not None:
+            if refresh:
+                self._spawn(lambda: self._refresh(key, load, ttl, stale_ttl))
+            return entry[2]
+        return self._loads.do(key, self._load, key, load, ttl, stale_ttl)
+
+    def _load(self, key: Hashable, load: Callable[[], V],
+              ttl: Optional[float], stale_ttl: Optional[float]) -> V:
+        value = load()
+        if ttl is None:
+            ttl = self.ttl
+        if stale_ttl is None:
+            stale_ttl = self.stale_ttl
+        if ttl > 0:
+            loaded = self._timer()
+            with self._lock:
+                self._entries[key] = (loaded + ttl, loaded + ttl + stale_ttl,
+                                      value)
+        return value
+
+    def _refresh(self, key: Hashable, load: Callable[[], V],
+                 ttl: Optional[float], stale_ttl: Optional[float]) -> None:
+        try:
+            self._load(key, load, ttl, stale_ttl)
+        except Exception as e:
+            logger.error('Could not refresh %s: %s', key, e)
+            with self._lock:
+                self._counts['refresh_errors'] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Counts of hits, stale hits, misses, and refreshes, and the size."""
+        with self._lock:
+            return dict(self._counts, size=len(self._entries),
+                        refreshing=len(self._refreshing))
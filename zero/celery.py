@@ -1,7 +1,38 @@
 """Provides a configured Celery application for async tasks."""
 
-from celery import Celery
+from typing import Any
 
-celery_app = Celery('zero')
+from celery import Celery, Task
+from flask import has_app_context
+
+
+class ContextTask(Task):
+    """
+    Runs each task in an application context, if there is not one already.
+
+    With the prefork pool, tasks run in processes that inherit the application
+    context pushed in :mod:`zero.worker`. With the thread and green pools,
+    each task runs in its own thread or greenlet, which has no application
+    context of its own. The application is set on the Celery app as
+    ``flask_app`` by :func:`zero.lifecycle.init_worker`.
+
+    Since database sessions are scoped to the application context, this also
+    gives each thread or greenlet its own session, which is removed (and its
+    connection returned to the pool) when the task is done.
+    """
+
+    def __call__(self, *args: Any, **kwargs: Any) -> Any:
+        """Run the task."""
+        flask_app = getattr(self.app, 'flask_app', None)
+        if flask_app is None or has_app_context():
+            return super().__call__(*args, **kwargs)
+        with flask_app.app_context():
+            return super().__call__(*args, **kwargs)
+
+
+celery_app = Celery('zero', task_cls=ContextTask)
+# Threads other than the one that created the app (e.g. in the thread pool)
+# fall back to the default app.
+celery_app.set_default()
 celery_app.config_from_object('zero.celeryconfig')
 celery_app.autodiscover_tasks(['zero'], related_name='tasks', force=True)
@@ -7,39 +7,151 @@ See `the celery docs
 
 import os
 
+from kombu import Exchange, Queue
+
 broker_url = "redis://%s/0" % os.environ.get('REDIS_ENDPOINT')
 result_backend = "redis://%s/0" % os.environ.get('REDIS_ENDPOINT')
 backend = results = result_backend
-broker_transport_options = {
-    # 'region': os.environ.get('AWS_REGION', 'us-east-1'),
-    'queue_name_prefix': 'zero-',
+result_serializer = os.environ.get('CELERY_RESULT_SERIALIZER', 'json')
+"""
+Encoding of task results in the result backend.
+
+Our results are small dicts, for which ``msgpack`` is considerably more
+compact than JSON. However, the backend decodes every stored result with this
+serializer, so results that were stored with a different one cannot be read.
+Only change it once those results have expired (see :const:`result_expires`).
+"""
+
+accept_content = ['json', 'msgpack']
+"""Encodings of task messages and results that we will accept."""
+
+result_expires = int(os.environ.get('CELERY_RESULT_EXPIRES', '86400'))
+"""
+Number of seconds for which task results are kept in the result backend.
+
+This is also the lifetime of the task registry entries and locks in
+:mod:`zero.results`, and the default for :const:`result_expires_by_state`.
+"""
+
+result_expires_by_state = {
+    state: int(os.environ.get(f'CELERY_RESULT_EXPIRES_{state}',
+                              result_expires))
+    for state in ('SUCCESS', 'FAILURE', 'REVOKED')
 }
-worker_prefetch_multiplier = 1
 """
-Prevent the worker from taking more than one task at a time.
+Number of seconds for which results are kept, by final task state.
 
-In general we want to treat our workers as ephemeral. Even though Celery itself
-is pretty solid runtime, we may lose the underlying machine with little or no
-warning. The less state held by the workers the better.
+For example, the results of successful tasks can be discarded sooner than
+failures, which we may want to keep around for investigation. Set with e.g.
+``CELERY_RESULT_EXPIRES_SUCCESS``.
 """
 
+broker_transport_options = {
+    # 'region': os.environ.get('AWS_REGION', 'us-east-1'),
+    'queue_name_prefix': 'zero-',
+}
 task_acks_late = True
 """
 Do not acknowledge a task until it has been completed.
 
-As described for :const:`.worker_prefetch_multiplier`, we assume that workers
+As described for :const:`.worker_queue_settings`, we assume that workers
 will disappear without warning. This ensures that a task will can be executed
 again if the worker crashes during execution.
 """
 
-task_default_queue = 'zero-worker'
+mutation_queues = {
+    'interactive': 'zero-worker-interactive',
+    'bulk': 'zero-worker-bulk',
+    'retry': 'zero-worker-retry',
+}
 """
-Name of the queue for plain text extraction tasks.
+Names of the queues for mutation tasks, by priority class.
+
+Mutations requested one at a time by clients are interactive, and go to a
+separate queue from bulk mutations, so that a backfill does not hold up
+interactive requests. Tasks that are being retried have their own queue, so
+that they do not hold up either. Each queue should be consumed by its own
+workers; see :const:`worker_queue`.
 
 Using different queue names allows us to run many different queues on the same
 underlying transport (e.g. Redis cluster).
 """
 
+task_default_queue = mutation_queues['interactive']
+"""Name of the queue for tasks that are not otherwise routed."""
+
+task_routes = {
+    'zero.tasks.mutate_a_thing': {'queue': mutation_queues['interactive']},
+    'zero.tasks.mutate_many_things': {'queue': mutation_queues['bulk']},
+    'zero.tasks.run_pipeline': {'queue': mutation_queues['interactive']},
+}
+"""Default queues for tasks, if the caller does not choose one."""
+
+worker_queue_settings = {
+    'interactive': {
+        'prefetch_multiplier':
+            int(os.environ.get('CELERY_INTERACTIVE_PREFETCH', '1')),
+        'concurrency':
+            int(os.environ.get('CELERY_INTERACTIVE_CONCURRENCY', '4')),
+    },
+    'bulk': {
+        'prefetch_multiplier':
+            int(os.environ.get('CELERY_BULK_PREFETCH', '1')),
+        'concurrency':
+            int(os.environ.get('CELERY_BULK_CONCURRENCY', '2')),
+    },
+    'retry': {
+        'prefetch_multiplier':
+            int(os.environ.get('CELERY_RETRY_PREFETCH', '1')),
+        'concurrency':
+            int(os.environ.get('CELERY_RETRY_CONCURRENCY', '1')),
+    },
+}
+"""
+Prefetch and concurrency for the workers that consume each queue.
+
+By default workers take only one task at a time (per process). In general we
+want to treat our workers as ephemeral. Even though Celery itself is pretty
+solid runtime, we may lose the underlying machine with little or no warning.
+The less state held by the workers the better.
+"""
+
+worker_queue = os.environ.get('CELERY_WORKER_QUEUE')
+"""
+The priority class of the queue that this worker consumes.
+
+If set, the worker consumes only that queue, using the corresponding
+:const:`worker_queue_settings`. Otherwise, the worker consumes all of the
+:const:`mutation_queues`, and takes one task at a time.
+"""
+
+if worker_queue:
+    _consumed = [mutation_queues[worker_queue]]
+    worker_prefetch_multiplier = \
+        worker_queue_settings[worker_queue]['prefetch_multiplier']
+    worker_concurrency = worker_queue_settings[worker_queue]['concurrency']
+else:
+    _consumed = list(mutation_queues.values())
+    worker_prefetch_multiplier = 1
+    worker_concurrency = int(os.environ.get('CELERY_CONCURRENCY', '4'))
+task_queues = [Queue(name, Exchange(name), routing_key=name)
+               for name in _consumed]
+
+worker_pool = os.environ.get('CELERY_WORKER_POOL', 'prefork')
+"""
+The pool in which the worker runs tasks: ``prefork``, ``threads`` or
+``gevent``.
+
+Mutation tasks spend most of their time waiting on the database (and on
+``time.sleep``), so a thread or green pool can run many more of them per
+container than ``prefork``, at the cost of sharing one interpreter. Each task
+runs in its own application context, and so has its own database session;
+see :class:`.celery.ContextTask`. The concurrency settings above are then
+the number of threads or greenlets; note that the database connection pool
+must be large enough for them. ``gevent`` must be installed to use the green
+pool. See ``benchmark_workers.py`` to compare the pools.
+"""
+
 task_always_eager = bool(int(os.environ.get('CELERY_ALWAYS_EAGER', '0')))
 """
 If True, tasks will be executed in the same process as the dispatcher.
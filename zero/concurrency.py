@@ -0,0 +1,218 @@
+"""Helpers for coordinating work among concurrent threads of execution."""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, \
+    TimeoutError as FutureTimeout
+from threading import Event, Lock
+from typing import Any, Callable, Dict, Generic, Hashable, Mapping, \
+    Optional, TypeVar
+
+from flask import Flask, current_app, has_app_context
+
+from arxiv.base.globals import get_application_config
+
+T = TypeVar('T')
+K = TypeVar('K', bound=Hashable)
+
+DEFAULT_FAN_OUT_WORKERS = 16
+
+# This outlives the application instance; see ``wsgi.py``.
+_fan_out_pool: Optional[ThreadPoolExecutor] = None
+_fan_out_pool_lock = Lock()
+
+
+class _Call(Generic[T]):
+    """A call that is in flight."""
+
+    def __init__(self) -> None:
+        self.done = Event()
+        self.result: Optional[T] = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight(Generic[T]):
+    """
+    Coalesces concurrent calls that share a key.
+
+    While a call for a given key is in flight, other callers asking for the
+    same key wait for that call to complete and share its result (or its
+    exception) rather than making the call themselves. For example:
+
+    .. code-block:: python
+
+       reads = SingleFlight()
+
+       def get_a_thing(thing_id: int) -> Thing:
+           return reads.do(thing_id, _get_a_thing_from_db, thing_id)
+
+
+    Nothing is cached: once the call completes, the next caller for that key
+    will make a new call.
+
+    This works with threads, and with green threads if :mod:`threading` has
+    been monkey-patched (e.g. by gevent or eventlet).
+    """
+
+    def __init__(self) -> None:
+        """Start with nothing in flight."""
+        self._lock = Lock()
+        self._calls: Dict[Hashable, _Call[T]] = {}
+
+    def do(self, key: Hashable, func: Callable[..., T], *args: Any,
+           **kwargs: Any) -> T:
+        """
+        Call ``func``, unless a call for ``key`` is already in flight.
+
+        Parameters
+        ----------
+        key : hashable
+            Calls with equal keys are coalesced.
+        func : callable
+            Called with ``args`` and ``kwargs``.
+
+        Returns
+        -------
+        object
+            The return value of ``func``, from this call or from the call
+            that was already in flight.
+
+        Raises
+        ------
+        Exception
+            Any exception raised by ``func`` is raised for every caller that
+            was waiting on that call.
+
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if call is None:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result  # type: ignore
+
+        try:
+            call.result = func(*args, **kwargs)
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result
+
+    @property
+    def in_flight(self) -> int:
+        """Number of calls that are currently in flight."""
+        with self._lock:
+            return len(self._calls)
+
+
+class DeadlineExceeded(IOError):
+    """A call made by :func:`fan_out` did not complete in time."""
+
+
+class Outcome(Generic[T]):
+    """The return value of a call made by :func:`fan_out`, or its error."""
+
+    def __init__(self, value: Optional[T] = None,
+                 error: Optional[BaseException] = None) -> None:
+        """Set the return value or the error."""
+        self.value = value
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        """Whether the call returned."""
+        return self.error is None
+
+    def get(self) -> T:
+        """Get the return value, or raise the error."""
+        if self.error is not None:
+            raise self.error
+        return self.value  # type: ignore
+
+
+def fan_out(calls: Mapping[K, Callable[[], Any]],
+            timeout: float) -> Dict[K, Outcome]:
+    """
+    Make independent calls at the same time, and wait for all of them.
+
+    The calls are made by a pool of ``FAN_OUT_WORKERS`` threads that is
+    shared by all requests in this process. If this is called within a Flask
+    application context, each call is made within a new context of the same
+    application, so e.g. the database session and ``g`` can be used (but not
+    the request). For example:
+
+    .. code-block:: python
+
+       outcomes = fan_out({'thing': partial(things.get_a_thing, thing_id),
+                           'baz': partial(get_baz, baz_id)}, timeout=2.)
+       thing = outcomes['thing'].get()
+
+
+    A call should not itself fan out, since it would wait on threads from the
+    same pool.
+
+    Parameters
+    ----------
+    calls : dict
+        Functions that take no arguments, by key.
+    timeout : float
+        Seconds to wait for all of the calls, together.
+
+    Returns
+    -------
+    dict
+        An :class:`Outcome` for each call, by key. Calls that did not
+        complete in time have a :class:`DeadlineExceeded` error; they are
+        cancelled if they have not started, but are otherwise left to finish
+        in the background.
+
+    """
+    app: Optional[Flask] = None
+    if has_app_context():
+        app = current_app._get_current_object()  # type: ignore
+    pool = _get_fan_out_pool()
+    deadline = time.monotonic() + timeout
+    futures = {key: pool.submit(_call_in_context, app, func)
+               for key, func in calls.items()}
+    outcomes: Dict[K, Outcome] = {}
+    for key, future in futures.items():
+        try:
+            value = future.result(max(deadline - time.monotonic(), 0.))
+        except FutureTimeout:
+            future.cancel()
+            outcomes[key] = Outcome(error=DeadlineExceeded(
+                f'{key} did not complete within {timeout} s'
+            ))
+        except Exception as e:
+            outcomes[key] = Outcome(error=e)
+        else:
+            outcomes[key] = Outcome(value)
+    return outcomes
+
+
+def _call_in_context(app: Optional[Flask], func: Callable[[], T]) -> T:
+    if app is None:
+        return func()
+    with app.app_context():
+        return func()
+
+
+def _get_fan_out_pool() -> ThreadPoolExecutor:
+    global _fan_out_pool
+    with _fan_out_pool_lock:
+        if _fan_out_pool is None:
+            config = get_application_config()
+            _fan_out_pool = ThreadPoolExecutor(
+                max_workers=int(config.get('FAN_OUT_WORKERS',
+                                           DEFAULT_FAN_OUT_WORKERS)),
+                thread_name_prefix='zero-fan-out'
+            )
+        return _fan_out_pool
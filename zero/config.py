@@ -28,6 +28,18 @@ See `https://docs.python.org/3/library/logging.html#levels`_.
 JWT_SECRET = environ.get('JWT_SECRET')
 """Secret key for signing + verifying authentication JWTs."""
 
+AUTH_SESSION_CACHE_SIZE = \
+    int(environ.get('AUTH_SESSION_CACHE_SIZE', '10000'))
+"""Maximum number of verified auth sessions to cache."""
+
+AUTH_SESSION_CACHE_TTL = float(environ.get('AUTH_SESSION_CACHE_TTL', '300'))
+"""
+Maximum number of seconds for which a verified auth session is cached.
+
+Sessions are never cached beyond the expiry of their token. Set to ``0`` to
+disable caching.
+"""
+
 CSRF_SECRET = environ.get('FLASK_SECRET', 'csrfbarsecret')
 """Secret used for generating CSRF tokens."""
 
@@ -142,6 +154,75 @@ If not explicitly provided, this is composed from :const:`BAZ_HOST`,
 """
 
 BAZ_STATUS_TIMEOUT = float(environ.get('BAZ_STATUS_TIMEOUT', 1.0))
+"""Seconds to wait for the baz service to respond to a status check."""
+
+BAZ_STATUS_TTL = float(environ.get('BAZ_STATUS_TTL', '10'))
+"""
+Seconds for which the status of the baz service is cached; 0 disables.
+
+A stale status is used while the status is checked again in the background.
+"""
+
+BAZ_BREAKER_THRESHOLD = int(environ.get('BAZ_BREAKER_THRESHOLD', '5'))
+"""
+Consecutive failures of the baz service after which we stop calling it.
+
+Failures include timeouts and error responses, after retries. 0 disables the
+circuit breaker.
+"""
+
+BAZ_BREAKER_COOLDOWN = float(environ.get('BAZ_BREAKER_COOLDOWN', '30'))
+"""Seconds to wait before calling the baz service again once it has failed."""
+
+BAZ_CONNECT_TIMEOUT = float(environ.get('BAZ_CONNECT_TIMEOUT', '1'))
+"""Seconds to wait for a connection to the baz service."""
+
+BAZ_READ_TIMEOUT = float(environ.get('BAZ_READ_TIMEOUT', '5'))
+"""Seconds to wait between bytes of a response from the baz service."""
+
+BAZ_MAX_RETRIES = int(environ.get('BAZ_MAX_RETRIES', '2'))
+"""Times to retry a request to the baz service that failed or timed out."""
+
+BAZ_RETRY_BACKOFF = float(environ.get('BAZ_RETRY_BACKOFF', '0.1'))
+"""Backoff factor between retries of requests to the baz service."""
+
+BAZ_POOL_CONNECTIONS = int(environ.get('BAZ_POOL_CONNECTIONS', '1'))
+"""Number of hosts for which connections to the baz service are pooled."""
+
+BAZ_POOL_MAXSIZE = int(environ.get('BAZ_POOL_MAXSIZE', '10'))
+"""
+Connections to the baz service to keep per host, in each process.
+
+This should be at least the number of requests that a process handles at
+once (i.e. uWSGI ``threads``, or ``async`` cores), or connections will be
+opened and thrown away under load. See :func:`zero.services.baz.get_pool_stats`
+for how busy the pools are.
+"""
+
+BAZ_BATCH_WORKERS = int(environ.get('BAZ_BATCH_WORKERS', '10'))
+"""
+Threads per process that retrieve bazs for batch requests.
+
+This bounds the number of concurrent requests to the baz service made on
+behalf of ``GET /zero/api/baz?ids=...``; it should not exceed
+:const:`BAZ_POOL_MAXSIZE`.
+"""
+
+BAZ_KEEP_ALIVE = bool(int(environ.get('BAZ_KEEP_ALIVE', '1')))
+"""Keep connections to the baz service open between requests."""
+
+BAZ_CACHE_TTL = float(environ.get('BAZ_CACHE_TTL', '60'))
+"""Seconds for which a response from the baz service is fresh; 0 disables."""
+
+BAZ_CACHE_STALE_TTL = float(environ.get('BAZ_CACHE_STALE_TTL', '300'))
+"""
+Seconds for which a baz response may be served stale while it is refreshed.
+
+Once a cached response is no longer fresh (see :const:`BAZ_CACHE_TTL`), it is
+still served for up to this long while a new one is retrieved in the
+background. This keeps the latency of the baz service out of most requests,
+and rides out brief outages of the baz service.
+"""
 
 BAZ_VERIFY = bool(int(environ.get('BAZ_VERIFY', '1')))
 """Enable/disable SSL certificate verification for baz service."""
@@ -151,6 +232,144 @@ if BAZ_PROTO == 'https' and not BAZ_VERIFY:
                   ' should not be disabled in production.')
 
 
+# --- MUTATIONS ---
+
+MUTATION_CHUNK_SIZE = int(environ.get('MUTATION_CHUNK_SIZE', '100'))
+"""
+Number of things that are mutated by each batch mutation task.
+
+Requests to mutate many things are split into chunks of this size.
+"""
+
+TASK_EXECUTOR = environ.get('TASK_EXECUTOR', 'celery')
+"""
+Where mutation tasks are run: ``celery`` or ``local``.
+
+With ``local``, tasks run in a thread pool in the process that sends them, and
+their state is kept in the database; no broker or result backend is needed.
+This is intended for small single-node deployments and test rigs.
+"""
+
+LOCAL_EXECUTOR_WORKERS = int(environ.get('LOCAL_EXECUTOR_WORKERS', '4'))
+"""Number of threads in the local executor, per process."""
+
+PROGRESS_MIN_INTERVAL = float(environ.get('PROGRESS_MIN_INTERVAL', '1'))
+"""Minimum number of seconds between writes of the progress of a task."""
+
+MUTATION_MAX_RETRIES = int(environ.get('MUTATION_MAX_RETRIES', '5'))
+"""
+Number of times a mutation task is retried after a transient error.
+
+After that, the task fails and is recorded as a dead letter.
+"""
+
+MUTATION_RETRY_BACKOFF = float(environ.get('MUTATION_RETRY_BACKOFF', '2'))
+"""
+Ceiling, in seconds, of the random delay before the first retry.
+
+The ceiling doubles with each retry, up to ``MUTATION_RETRY_BACKOFF_MAX``.
+"""
+
+MUTATION_RETRY_BACKOFF_MAX = \
+    float(environ.get('MUTATION_RETRY_BACKOFF_MAX', '300'))
+"""Maximum ceiling, in seconds, of the random delay before a retry."""
+
+DEAD_LETTER_MAX_LENGTH = int(environ.get('DEAD_LETTER_MAX_LENGTH', '10000'))
+"""Maximum number of tasks kept in the dead-letter list."""
+
+WORKER_WARM_DB_CONNECTIONS = \
+    int(environ.get('WORKER_WARM_DB_CONNECTIONS', '1'))
+"""Database connections to open in each worker process when it starts."""
+
+WORKER_WARM_BAZ = bool(int(environ.get('WORKER_WARM_BAZ', '0')))
+"""
+Check the status of the baz service when each worker process starts.
+
+This opens a connection to the service, which is then re-used by tasks.
+"""
+
+
+# --- ADMISSION CONTROL ---
+
+RATE_LIMIT_PER_SECOND = float(environ.get('RATE_LIMIT_PER_SECOND', '0'))
+"""
+Rate at which each client may make requests to the API.
+
+Clients are identified by their authenticated session, or by their address if
+they are not authenticated. Rate limiting is disabled by default, i.e. with
+``0``. Requests for the status of the service and of mutations are never rate
+limited (see :const:`.admission.EXEMPT_ENDPOINTS`).
+"""
+
+RATE_LIMIT_BURST = int(environ.get('RATE_LIMIT_BURST', '20'))
+"""Number of requests that a client may make in a burst."""
+
+MAX_CONCURRENT_REQUESTS = int(environ.get('MAX_CONCURRENT_REQUESTS', '0'))
+"""
+Maximum number of requests handled concurrently by each process.
+
+Set to ``0`` to disable the limit.
+"""
+
+MUTATION_QUEUE_MAX_BACKLOG = \
+    int(environ.get('MUTATION_QUEUE_MAX_BACKLOG', '0'))
+"""
+Refuse new mutations when more than this many tasks are waiting in the queue.
+
+Set to ``0`` to disable.
+"""
+
+DB_LATENCY_THRESHOLD = float(environ.get('DB_LATENCY_THRESHOLD', '0'))
+"""
+Refuse new mutations when the database takes longer than this to respond.
+
+In seconds. Set to ``0`` to disable.
+"""
+
+LOAD_SAMPLE_INTERVAL = float(environ.get('LOAD_SAMPLE_INTERVAL', '1'))
+"""Seconds between samples of the queue backlog and database latency."""
+
+RETRY_AFTER = int(environ.get('RETRY_AFTER', '5'))
+"""Seconds after which a client may retry a request refused for load."""
+
+
+# --- FAN-OUT ---
+
+FAN_OUT_WORKERS = int(environ.get('FAN_OUT_WORKERS', '16'))
+"""
+Threads per process that make independent service calls at the same time.
+
+See :func:`zero.concurrency.fan_out`. Calls beyond this number wait for a
+thread, within their deadline.
+"""
+
+FAN_OUT_TIMEOUT = float(environ.get('FAN_OUT_TIMEOUT', '2'))
+"""Seconds a page waits for all of the service calls that it fans out."""
+
+
+# --- TEMPLATE CACHING ---
+
+JINJA_BYTECODE_CACHE = bool(int(environ.get('JINJA_BYTECODE_CACHE', '1')))
+"""Enable/disable the persistent cache of compiled templates."""
+
+JINJA_BYTECODE_CACHE_DIR = environ.get('JINJA_BYTECODE_CACHE_DIR')
+"""
+Directory for compiled templates.
+
+If not set, a private directory in the system temporary directory is used.
+"""
+
+FRAGMENT_CACHE_TTL = float(environ.get('FRAGMENT_CACHE_TTL', '300'))
+"""Seconds for which static parts of the page layout are cached."""
+
+UI_PAGE_CACHE_TTL = float(environ.get('UI_PAGE_CACHE_TTL', '0'))
+"""
+Seconds for which whole rendered pages are cached.
+
+Set to ``0`` to disable page caching.
+"""
+
+
 # --- EXTERNAL URL CONFIG ---
 
 EXTERNAL_URL_SCHEME = environ.get('EXTERNAL_URL_SCHEME', 'https')
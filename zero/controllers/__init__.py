@@ -7,6 +7,7 @@ in the request or the application context is needed, it should be parameterized
 as part of the controller's signature.
 """
 
-from .baz import get_baz
+from .baz import get_baz, get_bazs
 from .things import get_thing, create_a_thing, start_mutating_a_thing, \
-    mutation_status, get_thing_description
\ No newline at end of file
+    start_mutating_many_things, mutation_status, mutation_statuses, \
+    get_thing_description
\ No newline at end of file
@@ -1,16 +1,32 @@
 """Controllers for operations on :class:`.Baz`."""
 
-from typing import Tuple, Optional, Dict, Any, IO, Union
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Tuple, Optional, Dict, Any, IO, List, Union
 from http import HTTPStatus
 
 from flask import url_for
-from werkzeug.exceptions import NotFound, InternalServerError
+from werkzeug.exceptions import NotFound, InternalServerError, BadRequest, \
+    HTTPException
+
+from arxiv.base.globals import get_application_config
 
 from ..services import baz
 from ..domain import Baz
 
 NO_BAZ = 'could not find the baz'
 BAZ_WONT_GO = 'could not get the baz'
+MISSING_BAZ_IDS = 'a comma-separated list of baz ids is required'
+TOO_MANY_BAZ_IDS = 'too many baz ids'
+
+MAX_BAZ_IDS = 100
+"""The maximum number of bazs that can be retrieved in a single request."""
+
+DEFAULT_BATCH_WORKERS = 10
+
+# This outlives the application instance; see ``wsgi.py``.
+_pool: Optional[ThreadPoolExecutor] = None
+_pool_lock = Lock()
 
 Body = Union[Dict[str, Any], IO]
 Headers = Dict[str, str]
@@ -35,14 +51,79 @@ def get_baz(baz_id: int) -> ResponseData:
         Some extra headers to add to the response.
 
     """
-    baz_data: Dict[str, Any]
     baz_service = baz.BazService.current_session()
+    return _retrieve(baz_service, baz_id), HTTPStatus.OK, {}
+
+
+def get_bazs(ids: Optional[str]) -> ResponseData:
+    """
+    Retrieve many bazs from the Baz service at once.
+
+    Bazs are retrieved concurrently, by a pool of ``BAZ_BATCH_WORKERS``
+    threads that is shared by all requests in this process. Each baz is only
+    retrieved once, however many times its ID is given.
+
+    Parameters
+    ----------
+    ids : str
+        Comma-separated baz IDs.
+
+    Returns
+    -------
+    dict
+        The key ``bazs`` has a list with the same data as :func:`get_baz` for
+        each ID, in the order given, plus the ``id``. If a baz could not be
+        retrieved, its entry has the ``error`` and the HTTP ``status`` that
+        :func:`get_baz` would have responded with, instead.
+    int
+        An HTTP status code.
+    dict
+        Some extra headers to add to the response.
+
+    """
+    try:
+        baz_ids = [int(baz_id) for baz_id in (ids or '').split(',')]
+    except ValueError as e:
+        raise BadRequest(MISSING_BAZ_IDS) from e
+    if len(baz_ids) > MAX_BAZ_IDS:
+        raise BadRequest(TOO_MANY_BAZ_IDS)
+
+    baz_service = baz.BazService.current_session()
+    unique_ids = list(dict.fromkeys(baz_ids))
+    fetched = dict(zip(unique_ids, _get_pool().map(
+        lambda baz_id: _retrieve_or_describe_error(baz_service, baz_id),
+        unique_ids
+    )))
+    return ({'bazs': [dict(fetched[baz_id], id=baz_id) for baz_id in baz_ids]},
+            HTTPStatus.OK, {})
+
+
+def _retrieve(baz_service: baz.BazService, baz_id: int) -> Dict[str, Any]:
     try:
         the_baz: Baz = baz_service.retrieve_baz(baz_id)
     except baz.NoBaz as e:
         raise NotFound('No such baz') from e
-    except IOError:
+    except IOError as e:
         raise InternalServerError(BAZ_WONT_GO) from e
+    return {'foo': the_baz.foo, 'mukluk': the_baz.mukluk}
+
+
+def _retrieve_or_describe_error(baz_service: baz.BazService,
+                                baz_id: int) -> Dict[str, Any]:
+    try:
+        return _retrieve(baz_service, baz_id)
+    except HTTPException as e:
+        return {'error': e.description, 'status': e.code}
+
 
-    baz_data = {'foo': the_baz.foo, 'mukluk': the_baz.mukluk}
-    return baz_data, HTTPStatus.OK, {}
\ No newline at end of file
+def _get_pool() -> ThreadPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            config = get_application_config()
+            _pool = ThreadPoolExecutor(
+                max_workers=int(config.get('BAZ_BATCH_WORKERS',
+                                           DEFAULT_BATCH_WORKERS)),
+                thread_name_prefix='zero-baz'
+            )
+        return _pool
\ No newline at end of file
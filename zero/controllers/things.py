@@ -1,16 +1,23 @@
 """Handles all thing-related requests."""
 
 import io
-from typing import Tuple, Optional, Any, Dict, Union, IO
+from functools import partial
+from typing import Tuple, Optional, Any, Dict, Union, IO, List
 from http import HTTPStatus
 from datetime import datetime
 
 from werkzeug.exceptions import NotFound, BadRequest, InternalServerError
 from arxiv import status
 from arxiv.base import logging
-from ..services import things
-from ..domain import Thing
-from ..tasks import mutate_a_thing, check_mutation_status, NoSuchTask
+from arxiv.base.globals import get_application_config
+from ..services import baz, things
+from .. import admission, results
+from ..concurrency import fan_out
+from ..domain import Thing, Task
+from ..process import pipeline
+from ..tasks import start_mutation, mutate_many_things, get_queue, get_task, \
+    check_mutation_status, check_mutation_statuses, NoSuchTask, \
+    PRIORITIES, INTERACTIVE, BULK
 
 from flask import url_for
 
@@ -25,11 +32,27 @@ THING_WONT_COME = 'could not get the thing'
 CANT_CREATE_THING = 'could not create the thing'
 MISSING_NAME = 'a thing needs a name'
 ACCEPTED = 'mutation in progress'
+ALREADY_MUTATING = 'mutation already in progress'
 INVALID_TASK_ID = 'invalid task id'
 TASK_DOES_NOT_EXIST = 'task not found'
+MISSING_TASK_IDS = 'a list of task ids is required'
+TOO_MANY_TASK_IDS = 'too many task ids'
+MISSING_THING_IDS = 'a list of thing ids is required'
+TOO_MANY_THING_IDS = 'too many thing ids'
+THING_NOT_IN_TASK = 'thing is not part of this task'
+INVALID_PRIORITY = 'priority must be one of: %s' % ', '.join(PRIORITIES)
 TASK_IN_PROGRESS = {'status': 'in progress'}
 TASK_FAILED = {'status': 'failed'}
 TASK_COMPLETE = {'status': 'complete'}
+TASK_UNKNOWN = {'status': 'unknown'}
+
+MAX_TASK_IDS = 5000
+"""The maximum number of tasks that can be checked in a single request."""
+
+MAX_THING_IDS = 10000
+"""The maximum number of things that can be mutated in a single request."""
+
+DEFAULT_CHUNK_SIZE = 100
 
 
 def get_thing(thing_id: int) -> ResponseData:
@@ -63,18 +86,26 @@ def get_thing(thing_id: int) -> ResponseData:
     return io.BytesIO(thing.name.encode('utf-8')), HTTPStatus.OK, {}
 
 
-def get_thing_description(thing_id: int) -> ResponseData:
+def get_thing_description(thing_id: int,
+                          baz_id: Optional[int] = None) -> ResponseData:
     """
     Retrieve description of a thing.
 
+    If a baz is requested too, the thing and the baz are retrieved at the same
+    time, and both must arrive within ``FAN_OUT_TIMEOUT`` seconds. The thing
+    is described even if the baz cannot be retrieved.
+
     Parameters
     ----------
     thing_id : int
         The unique identifier for the thing in question.
+    baz_id : int
+        The unique identifier of a baz to show alongside the thing.
     Returns
     -------
     dict
-        Summary information about the thing.
+        Summary information about the thing, and the ``baz`` (or ``None``, if
+        it could not be retrieved) if one was requested.
     int
         An HTTP status code.
     dict
@@ -82,8 +113,22 @@ def get_thing_description(thing_id: int) -> ResponseData:
 
     """
     logger.debug('Request to get a thing: %s', thing_id)
+    the_baz: Optional[Any] = None
     try:
-        thing = things.get_a_thing(thing_id)
+        if baz_id is None:
+            thing = things.get_a_thing(thing_id)
+        else:
+            config = get_application_config()
+            outcomes = fan_out({
+                'thing': partial(things.get_a_thing, thing_id),
+                'baz': partial(_retrieve_baz, baz_id)
+            }, float(config.get('FAN_OUT_TIMEOUT', 2.)))
+            if outcomes['baz'].ok:
+                the_baz = outcomes['baz'].value
+            else:
+                logger.debug('Could not get baz %s: %s', baz_id,
+                             outcomes['baz'].error)
+            thing = outcomes['thing'].get()
     except things.NoSuchThing as e:
         logger.debug('No such thing: %s', e)
         raise NotFound(NO_SUCH_THING) from e
@@ -98,9 +143,15 @@ def get_thing_description(thing_id: int) -> ResponseData:
         'created': thing.created,
         'url': thing_url
     }
+    if baz_id is not None:
+        response_data['baz'] = the_baz
     return response_data, HTTPStatus.OK, {}
 
 
+def _retrieve_baz(baz_id: int) -> Any:
+    return baz.BazService.current_session().retrieve_baz(baz_id)
+
+
 def create_a_thing(thing_data: dict) -> ResponseData:
     """
     Create a new :class:`.Thing`.
@@ -143,13 +194,30 @@ def create_a_thing(thing_data: dict) -> ResponseData:
     return response_data, HTTPStatus.CREATED, {'Location': thing_url}
 
 
-def start_mutating_a_thing(thing_id: int) -> ResponseData:
+def start_mutating_a_thing(thing_id: int, priority: Optional[str] = None,
+                           payload: Optional[dict] = None) -> ResponseData:
     """
     Start mutating a :class:`.Thing`.
 
+    By default the mutation is interactive; a client running a backfill
+    should choose the ``bulk`` priority instead. The client may describe a
+    chain of mutations with ``steps`` in the payload, which are run as a
+    single task (see :mod:`zero.process.pipeline`).
+
+    If the same mutation (i.e. with the same ``steps``, if any) of the thing
+    is already in progress, no new mutation is started; the response refers
+    to the status of the mutation that is in progress. Otherwise, if the
+    service does not have capacity for more mutations (see
+    :func:`.admission.check_capacity`), the request is refused with a
+    ``Retry-After`` header.
+
     Parameters
     ----------
     thing_id : int
+    priority : str
+        One of :const:`.tasks.PRIORITIES`.
+    payload : dict
+        May contain ``steps``; see :func:`.pipeline.validate`.
 
     Returns
     -------
@@ -161,12 +229,101 @@ def start_mutating_a_thing(thing_id: int) -> ResponseData:
         Some extra headers to add to the response.
 
     """
-    result = mutate_a_thing.delay(thing_id)
-    stat_url = url_for('external_api.mutation_status', task_id=result.task_id)
-    return {'reason': ACCEPTED}, HTTPStatus.ACCEPTED, {'Location': stat_url}
+    if priority is None:
+        priority = INTERACTIVE
+    if priority not in PRIORITIES:
+        raise BadRequest(INVALID_PRIORITY)
+    steps = (payload or {}).get('steps')
+    if steps is not None:
+        try:
+            pipeline.validate(steps)
+        except ValueError as e:
+            raise BadRequest(str(e)) from e
+    try:
+        task_id, started = start_mutation(thing_id, priority, steps,
+                                          admit=admission.check_capacity)
+    except admission.Overloaded as e:
+        logger.debug('Refusing to mutate thing %s: %s', thing_id, e)
+        retry_after = {'Retry-After': str(e.retry_after)}
+        return {'reason': str(e)}, HTTPStatus.SERVICE_UNAVAILABLE, retry_after
+    stat_url = url_for('external_api.mutation_status', task_id=task_id)
+    reason = ACCEPTED if started else ALREADY_MUTATING
+    return {'reason': reason}, HTTPStatus.ACCEPTED, {'Location': stat_url}
+
+
+def start_mutating_many_things(payload: dict) -> ResponseData:
+    """
+    Start mutating many :class:`.Thing`s.
 
+    The things are split into chunks of ``MUTATION_CHUNK_SIZE``, and a
+    :func:`.mutate_many_things` task is started for each chunk. The status of
+    the mutation of each thing can be checked individually, using the URLs
+    under the ``things`` key of the response.
 
-def mutation_status(task_id: str) -> ResponseData:
+    Parameters
+    ----------
+    payload : dict
+        Should contain the key ``thing_ids``, a list of thing IDs. May
+        contain the key ``priority``, one of :const:`.tasks.PRIORITIES`;
+        the default is ``bulk``.
+
+    Returns
+    -------
+    dict
+        Some data.
+    int
+        An HTTP status code.
+    dict
+        Some extra headers to add to the response.
+
+    """
+    thing_ids = payload.get('thing_ids')
+    if not thing_ids or not isinstance(thing_ids, list) \
+            or not all(type(thing_id) is int for thing_id in thing_ids):
+        raise BadRequest(MISSING_THING_IDS)
+    if len(thing_ids) > MAX_THING_IDS:
+        raise BadRequest(TOO_MANY_THING_IDS)
+    priority = payload.get('priority', BULK)
+    if priority not in PRIORITIES:
+        raise BadRequest(INVALID_PRIORITY)
+    queue = get_queue(priority)
+    try:
+        admission.check_capacity(queue)
+    except admission.Overloaded as e:
+        logger.debug('Refusing to mutate %i things: %s', len(thing_ids), e)
+        retry_after = {'Retry-After': str(e.retry_after)}
+        return {'reason': str(e)}, HTTPStatus.SERVICE_UNAVAILABLE, retry_after
+
+    thing_ids = list(dict.fromkeys(thing_ids))    # Drop duplicates.
+    size = get_application_config().get('MUTATION_CHUNK_SIZE',
+                                        DEFAULT_CHUNK_SIZE)
+    task_data = []
+    thing_urls = {}
+    # The tasks are registered all at once, before their IDs are handed out.
+    with results.registry.batch():
+        for start in range(0, len(thing_ids), size):
+            chunk = thing_ids[start:start + size]
+            result = get_task(mutate_many_things).apply_async((chunk,),
+                                                              queue=queue)
+            task_data.append({
+                'thing_ids': chunk,
+                'url': url_for('external_api.mutation_status',
+                               task_id=result.task_id)
+            })
+            for thing_id in chunk:
+                thing_urls[thing_id] = url_for(
+                    'external_api.mutation_status', task_id=result.task_id,
+                    thing_id=thing_id
+                )
+    logger.debug('Started %i tasks to mutate %i things', len(task_data),
+                 len(thing_ids))
+    response_data = {'reason': ACCEPTED, 'tasks': task_data,
+                     'things': thing_urls}
+    return response_data, HTTPStatus.ACCEPTED, {}
+
+
+def mutation_status(task_id: str,
+                    thing_id: Optional[int] = None) -> ResponseData:
     """
     Check the status of a mutation process.
 
@@ -174,6 +331,9 @@ def mutation_status(task_id: str) -> ResponseData:
     ----------
     task_id : str
         The ID of the mutation task.
+    thing_id : int
+        If the task mutates many things (see :func:`.mutate_many_things`),
+        the ID of the thing whose mutation status should be checked.
 
     Returns
     -------
@@ -192,6 +352,59 @@ def mutation_status(task_id: str) -> ResponseData:
     except NoSuchTask as e:
         raise NotFound(TASK_DOES_NOT_EXIST) from e
 
+    return _describe_task(task, thing_id)
+
+
+def mutation_statuses(payload: dict) -> ResponseData:
+    """
+    Check the status of many mutation processes at once.
+
+    Parameters
+    ----------
+    payload : dict
+        Should contain the key ``task_ids``, a list of mutation task IDs.
+
+    Returns
+    -------
+    dict
+        Maps each task ID onto the same data that :func:`mutation_status`
+        would return for that task. A task whose status cannot be described
+        (e.g. it is complete but has no result) has the status ``unknown``,
+        rather than failing the whole request.
+    int
+        An HTTP status code.
+    dict
+        Some extra headers to add to the response.
+
+    """
+    task_ids = payload.get('task_ids')
+    if not task_ids or not isinstance(task_ids, list):
+        raise BadRequest(MISSING_TASK_IDS)
+    if len(task_ids) > MAX_TASK_IDS:
+        raise BadRequest(TOO_MANY_TASK_IDS)
+    try:
+        tasks = check_mutation_statuses(task_ids)
+    except ValueError as e:
+        raise BadRequest(INVALID_TASK_ID) from e
+
+    response_data: Dict[str, Any] = {}
+    for task_id in task_ids:
+        if task_id not in tasks:
+            response_data[task_id] = {'reason': TASK_DOES_NOT_EXIST}
+            continue
+        try:
+            response_data[task_id], _, _ = _describe_task(tasks[task_id])
+        except InternalServerError as e:
+            # One bad result should not hide the status of the other tasks.
+            logger.error('Could not describe task %s: %s', task_id,
+                         e.description)
+            response_data[task_id] = dict(TASK_UNKNOWN,
+                                          reason=e.description)
+    return {'tasks': response_data}, HTTPStatus.OK, {}
+
+
+def _describe_task(task: Task,
+                   thing_id: Optional[int] = None) -> ResponseData:
     status_code = HTTPStatus.OK
     response_data: Dict[str, Any] = {}
     headers: Dict[str, Any] = {}
@@ -200,6 +413,8 @@ def mutation_status(task_id: str) -> ResponseData:
     if task.is_in_progress:
         logger.debug('task is in progress')
         response_data.update(TASK_IN_PROGRESS)
+        if task.progress is not None:
+            response_data.update({'progress': task.progress})
     elif task.is_failed:
         logger.debug('task has failed')
         response_data.update(TASK_FAILED)
@@ -208,6 +423,8 @@ def mutation_status(task_id: str) -> ResponseData:
         logger.debug('task is complete')
         if task.result is None:
             raise InternalServerError('Task is complete but result is None')
+        if 'results' in task.result:
+            return _describe_batch_result(task.result['results'], thing_id)
         response_data.update(TASK_COMPLETE)
         response_data.update({'result': task.result})
         thing_url = url_for('external_api.read_thing',
@@ -215,3 +432,26 @@ def mutation_status(task_id: str) -> ResponseData:
         headers.update({'Location': thing_url})
         status_code = HTTPStatus.SEE_OTHER
     return response_data, status_code, headers
+
+
+def _describe_batch_result(outcomes: List[Dict[str, Any]],
+                           thing_id: Optional[int] = None) -> ResponseData:
+    """Describe the result of a batch mutation, or of one thing within it."""
+    if thing_id is None:
+        response_data = dict(TASK_COMPLETE)
+        response_data.update({'results': outcomes})
+        return response_data, HTTPStatus.OK, {}
+
+    for outcome in outcomes:
+        if outcome['thing_id'] == thing_id:
+            break
+    else:
+        raise NotFound(THING_NOT_IN_TASK)
+    if 'error' in outcome:
+        response_data = dict(TASK_FAILED)
+        response_data.update({'reason': outcome['error']})
+        return response_data, HTTPStatus.OK, {}
+    response_data = dict(TASK_COMPLETE)
+    response_data.update({'result': outcome})
+    thing_url = url_for('external_api.read_thing', thing_id=thing_id)
+    return response_data, HTTPStatus.SEE_OTHER, {'Location': thing_url}
@@ -22,6 +22,9 @@ class Task:
     result: Optional[Dict[str, Any]] = field(default=None)
     """The final result of the task, if there was one."""
 
+    progress: Optional[Dict[str, Any]] = field(default=None)
+    """The progress of the task, if it is in progress and has reported it."""
+
     @property
     def is_in_progress(self) -> bool:
         return bool(self.status is Task.Status.IN_PROGRESS)
@@ -0,0 +1 @@
+"""Tests for :mod:`zero.domain`."""
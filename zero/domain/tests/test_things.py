@@ -0,0 +1,34 @@
+"""Tests for :mod:`zero.domain.things`."""
+
+from datetime import datetime
+from unittest import TestCase
+
+from ..things import Thing
+
+
+class TestThing(TestCase):
+    """A :class:`.Thing` keeps the ones at the end of its name as a count."""
+
+    def test_name(self) -> None:
+        """The name is split into a base name and a count of ones."""
+        a_thing = Thing(name='R2D2 1111')
+        self.assertEqual(a_thing.base_name, 'R2D2 ')
+        self.assertEqual(a_thing.ones, 4)
+        self.assertEqual(a_thing.name, 'R2D2 1111')
+        self.assertEqual(a_thing.name_length, len('R2D2 1111'))
+        self.assertEqual(a_thing.ones_in_name, 4)
+
+    def test_add_ones(self) -> None:
+        """Ones are added without touching the base name."""
+        a_thing = Thing(name='1 thing')
+        a_thing.ones += 1000
+        self.assertEqual(a_thing.base_name, '1 thing')
+        self.assertEqual(a_thing.name, '1 thing' + '1' * 1000)
+        self.assertEqual(a_thing.ones_in_name, 1001)
+
+    def test_equality(self) -> None:
+        """Things with the same name are equal however they were made."""
+        created = datetime.now()
+        self.assertEqual(Thing(name='foo11', id=1, created=created),
+                         Thing(base_name='foo', ones=2, id=1,
+                               created=created))
@@ -12,12 +12,19 @@ def _now() -> datetime:
     return datetime.now(UTC)
 
 
-@dataclass
+@dataclass(init=False)
 class Thing:
-    """Description of a thing."""
+    """
+    Description of a thing.
+
+    Mutations add ones to the end of the name of a thing, so names keep
+    growing. Rather than the full name, a thing keeps its :attr:`base_name`
+    and the number of :attr:`ones` at the end of it; the full :attr:`name`
+    is only put together when it is read.
+    """
 
-    name: str
-    """The name of the thing."""
+    base_name: str
+    """The name of the thing, without the ones at the end."""
 
     id: Optional[int] = field(default=None)
     """
@@ -29,6 +36,40 @@ class Thing:
     created: datetime = field(default_factory=_now)
     """The datetime when the thing was created."""
 
+    ones: int = field(default=0)
+    """The number of ones at the end of the name of the thing."""
+
+    def __init__(self, name: Optional[str] = None, id: Optional[int] = None,
+                 created: Optional[datetime] = None, base_name: str = '',
+                 ones: int = 0) -> None:
+        """Create a thing from its full ``name``, or its parts."""
+        self.id = id
+        self.created = created if created is not None else _now()
+        self.base_name = base_name
+        self.ones = ones
+        if name is not None:
+            self.name = name
+
+    @property
+    def name(self) -> str:
+        """The name of the thing."""
+        return self.base_name + '1' * self.ones
+
+    @name.setter
+    def name(self, name: str) -> None:
+        self.base_name = name.rstrip('1')
+        self.ones = len(name) - len(self.base_name)
+
+    @property
+    def name_length(self) -> int:
+        """The length of the name of the thing."""
+        return len(self.base_name) + self.ones
+
+    @property
+    def ones_in_name(self) -> int:
+        """The number of ones anywhere in the name of the thing."""
+        return self.base_name.count('1') + self.ones
+
     def is_persisted(self) -> bool:
         """Determine whether or not the thing has been persisted."""
         return bool(self.id is not None)
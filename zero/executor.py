@@ -0,0 +1,180 @@
+"""
+Runs tasks in a thread pool in this process, as an alternative to Celery.
+
+Small single-node deployments and performance test rigs do not need a broker
+and result backend. When ``TASK_EXECUTOR`` is set to ``local``, tasks are sent
+to a :class:`LocalExecutor` rather than to Celery, and their state is kept in
+the database (see :mod:`zero.services.taskstore`).
+
+:class:`LocalTask` wraps a Celery task with the same ``delay()`` and
+``apply_async()`` interface, so callers need not know which executor is in
+use; see :func:`zero.tasks.get_task`.
+
+Tasks run in threads rather than processes, since they need the Flask
+application (and its database connection pool) of the process that sent
+them. Note that tasks are lost if the process exits before they have run.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from threading import Lock
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from celery import uuid
+from flask import Flask, current_app
+
+from arxiv.base import logging
+from arxiv.base.globals import get_application_config
+
+from .services import taskstore
+from . import progress
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 4
+
+
+class LocalResult:
+    """Stands in for :class:`celery.result.AsyncResult` when sending."""
+
+    def __init__(self, task_id: str) -> None:
+        """Set the task ID."""
+        self.task_id = self.id = task_id
+
+
+class LocalExecutor:
+    """Runs tasks in a pool of threads, recording their state."""
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS) -> None:
+        """Start a thread pool with ``max_workers`` threads."""
+        self.max_workers = max_workers
+        self._pool = ThreadPoolExecutor(max_workers=max_workers,
+                                        thread_name_prefix='zero-task')
+        self._lock = Lock()
+        self._waiting = 0
+
+    @property
+    def backlog(self) -> int:
+        """Number of tasks that are waiting for a thread."""
+        with self._lock:
+            return self._waiting
+
+    def submit(self, func: Callable, args: Tuple = (),
+               kwargs: Optional[Dict[str, Any]] = None,
+               task_id: Optional[str] = None,
+               key: Optional[str] = None,
+               key_ttl: Optional[float] = None) -> str:
+        """
+        Send a task to the pool, unless another task with ``key`` is.
+
+        Must be called within a Flask application context; the task runs in
+        a context of the same application.
+
+        Parameters
+        ----------
+        func : callable
+            The task, e.g. a Celery task. Its return value must be
+            JSON-serializable.
+        args : tuple
+        kwargs : dict
+        task_id : str
+            If not provided, a new task ID is generated.
+        key : str
+            Stored with the task; see :func:`.taskstore.create_task`.
+        key_ttl : float
+            Number of seconds after which an unfinished task that has not
+            been updated no longer holds ``key``.
+
+        Returns
+        -------
+        str
+            The task ID, or the ID of the unfinished task with ``key``.
+
+        """
+        if task_id is None:
+            task_id = uuid()
+        app: Flask = current_app._get_current_object()  # type: ignore
+        name = getattr(func, 'name', None) or func.__name__
+        holder = taskstore.create_task(task_id, name, key, key_ttl)
+        if holder is not None:
+            return holder
+        with self._lock:
+            self._waiting += 1
+        self._pool.submit(self._run, app, task_id, func, args, kwargs or {})
+        return task_id
+
+    def _run(self, app: Flask, task_id: str, func: Callable, args: Tuple,
+             kwargs: Dict[str, Any]) -> None:
+        with self._lock:
+            self._waiting -= 1
+        write_progress = partial(taskstore.update_task, task_id,
+                                 progress.PROGRESS)
+        with app.app_context(), progress.writing_to(write_progress):
+            try:
+                taskstore.update_task(task_id, 'STARTED')
+                status, result = 'SUCCESS', func(*args, **kwargs)
+            except Exception as e:
+                logger.error('Task %s failed: %s', task_id, e)
+                status, result = 'FAILURE', str(e)
+            try:
+                taskstore.update_task(task_id, status, result)
+            except Exception as e:
+                # The task keeps its key until it is older than ``key_ttl``.
+                logger.error('Could not record that task %s finished (%s): %s',
+                             task_id, status, e)
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Stop accepting tasks, and optionally wait for running tasks."""
+        self._pool.shutdown(wait=wait)
+
+
+class LocalTask:
+    """Sends a Celery task to a :class:`LocalExecutor` instead."""
+
+    def __init__(self, task: Any, executor: LocalExecutor) -> None:
+        """Wrap ``task``."""
+        self.task = task
+        self.name = task.name
+        self.executor = executor
+
+    def delay(self, *args: Any, **kwargs: Any) -> LocalResult:
+        """Send the task with ``args`` and ``kwargs``."""
+        return self.apply_async(args, kwargs)
+
+    def apply_async(self, args: Tuple = (),
+                    kwargs: Optional[Dict[str, Any]] = None,
+                    task_id: Optional[str] = None,
+                    key: Optional[str] = None,
+                    key_ttl: Optional[float] = None,
+                    **options: Any) -> LocalResult:
+        """
+        Send the task, unless another task with ``key`` is unfinished.
+
+        See :meth:`LocalExecutor.submit`. Celery routing options (e.g.
+        ``queue``) are accepted and ignored.
+        """
+        return LocalResult(self.executor.submit(self.task, args, kwargs,
+                                                task_id, key, key_ttl))
+
+
+# This outlives the application instance; see ``wsgi.py``.
+_executor: Optional[LocalExecutor] = None
+_executor_lock = Lock()
+
+
+def is_enabled() -> bool:
+    """Check whether tasks should be run by the local executor."""
+    config = get_application_config()
+    return bool(config.get('TASK_EXECUTOR', 'celery') == 'local')
+
+
+def get_executor() -> LocalExecutor:
+    """Get the local executor for this process, starting it if necessary."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            config = get_application_config()
+            _executor = LocalExecutor(
+                int(config.get('LOCAL_EXECUTOR_WORKERS', DEFAULT_WORKERS))
+            )
+        return _executor
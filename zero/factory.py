@@ -11,6 +11,8 @@ from arxiv.base import Base
 from .routes import external_api, ui
 from .services import baz, things
 from .celery import celery_app
+from . import admission, templating
+from .middleware import CachingAuthMiddleware
 
 
 # We defer configuration to app creation time, so that we have an opportunity
@@ -30,19 +32,21 @@ def _create_base_app() -> Flask:
 
     Base(app)    # Gives us access to the base UI templates and resources.
     auth.Auth(app)    # Sets up authn/z machinery.
-    wrap(app, [auth.middleware.AuthMiddleware])
+    wrap(app, [CachingAuthMiddleware])
     return app
 
 
 def create_web_app() -> Flask:
     """Initialize and configure the zero application."""
     app = _create_base_app()
+    templating.init_app(app)
     app.register_blueprint(ui.blueprint)
     return app
 
 
 def create_api_app() -> Flask:
     app = _create_base_app()
+    admission.init_app(app)
     app.register_blueprint(external_api.blueprint)
     return app
 
@@ -0,0 +1,166 @@
+"""
+Lifecycle hooks for worker processes.
+
+The worker application is created, and an application context pushed, when
+:mod:`zero.worker` is imported in the main worker process. Pool processes are
+forked from it, and so inherit the application; left alone, each pool process
+would then lazily open its own database connections and HTTP sessions while
+running its first tasks.
+
+The hooks installed by :func:`init_worker`:
+
+1. Dispose of database connections in the main process before the pool is
+   forked, and refuse to use a connection in any process other than the one
+   that opened it. Connections must not be shared across a fork.
+2. Warm up each pool process as soon as it starts: open database connections
+   (``WORKER_WARM_DB_CONNECTIONS``) and create the :class:`.BazService`
+   session, optionally checking the status of the baz service
+   (``WORKER_WARM_BAZ``).
+3. Log the time from the start of each pool process to its first task.
+
+With the thread and green pools (see ``CELERY_WORKER_POOL``), there are no
+pool processes: the worker is warmed up once, when it starts, and each task
+runs in its own application context (see :class:`.celery.ContextTask`).
+"""
+
+import os
+import time
+from typing import Any, Dict, Optional
+
+from celery.signals import worker_init, worker_process_init, task_prerun
+from flask import Flask
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+
+from arxiv.base import logging
+
+from .celery import celery_app
+from .services import baz, things
+
+logger = logging.getLogger(__name__)
+
+FORKING_POOLS = ('prefork', 'processes')
+"""Pools that run tasks in child processes, which are warmed up one by one."""
+
+SOLO_POOLS = ('solo',)
+"""Pools that warm up their single process themselves."""
+
+_timings: Dict[str, Optional[float]] = {
+    'started': time.monotonic(),
+    'warmed': None,
+    'first_task': None,
+}
+"""Times at which this process started, was warmed up, and got a task."""
+
+
+def init_worker(app: Flask) -> None:
+    """
+    Install worker lifecycle hooks.
+
+    Must be called within an application context.
+    """
+    _guard_engine(things.db.engine)
+    celery_app.flask_app = app      # See ContextTask.
+
+    def on_worker_init(sender: Any = None, **kwargs: Any) -> None:
+        things.db.engine.dispose()
+        pool = _get_pool_name(getattr(sender, 'pool_cls', None))
+        if pool not in FORKING_POOLS + SOLO_POOLS:
+            warm_up(app)
+
+    def on_worker_process_init(**kwargs: Any) -> None:
+        _timings.update(started=time.monotonic(), warmed=None,
+                        first_task=None)
+        warm_up(app)
+
+    def on_task_prerun(**kwargs: Any) -> None:
+        record_first_task()
+
+    # The handlers are closures, so we must hold strong references.
+    worker_init.connect(on_worker_init, weak=False)
+    worker_process_init.connect(on_worker_process_init, weak=False)
+    task_prerun.connect(on_task_prerun, weak=False)
+
+
+def warm_up(app: Flask) -> None:
+    """Open database connections and create HTTP sessions."""
+    n_connections = int(app.config.get('WORKER_WARM_DB_CONNECTIONS', 1))
+    connections = []
+    try:
+        for _ in range(n_connections):
+            connections.append(things.db.engine.connect())
+    except exc.SQLAlchemyError as e:
+        logger.error('Could not warm up database connections: %s', e)
+    finally:
+        for connection in connections:
+            connection.close()   # Returns the connection to the pool.
+
+    # The session is bound to the application context that is pushed in
+    # ``zero.worker``, and so is re-used by tasks in this process.
+    session = baz.BazService.current_session()
+    if app.config.get('WORKER_WARM_BAZ', False) and not session.status():
+        logger.error('Could not warm up baz session')
+    _timings['warmed'] = time.monotonic()
+    logger.debug('Warmed up process %i in %.3f s', os.getpid(),
+                 _timings['warmed'] - _timings['started'])  # type: ignore
+
+
+def record_first_task() -> None:
+    """Log the time to the first task in this process."""
+    if _timings['first_task'] is not None:
+        return
+    _timings['first_task'] = now = time.monotonic()
+    started = _timings['started']
+    logger.info('Time to first task in process %i: %.3f s', os.getpid(),
+                now - started)  # type: ignore
+
+
+def get_timings() -> Dict[str, Optional[float]]:
+    """
+    Get startup timings for this process.
+
+    Returns
+    -------
+    dict
+        The number of seconds from the start of the process to the end of
+        warm up (``warmed``) and to the first task (``first_task``), or
+        ``None`` if those have not happened yet.
+
+    """
+    started = _timings['started']
+    return {name: _timings[name] - started  # type: ignore
+            if _timings[name] is not None else None
+            for name in ('warmed', 'first_task')}
+
+
+def _get_pool_name(pool_cls: Any) -> str:
+    """Get the name of a pool, given its alias or its class."""
+    if pool_cls is None:
+        return 'prefork'
+    if isinstance(pool_cls, str):
+        return pool_cls
+    return str(pool_cls.__module__).rsplit('.', 1)[-1]
+
+
+def _guard_engine(engine: Engine) -> None:
+    """Invalidate connections that were opened by another process."""
+    if getattr(engine, '_zero_guarded', False):
+        return
+
+    @event.listens_for(engine, 'connect')
+    def on_connect(dbapi_connection: Any, connection_record: Any) -> None:
+        connection_record.info['pid'] = os.getpid()
+
+    @event.listens_for(engine, 'checkout')
+    def on_checkout(dbapi_connection: Any, connection_record: Any,
+                    connection_proxy: Any) -> None:
+        pid = os.getpid()
+        if connection_record.info.get('pid', pid) != pid:
+            # Detach without closing; the connection belongs to the parent.
+            connection_record.connection = connection_proxy.connection = None
+            raise exc.DisconnectionError(
+                'Connection record belongs to pid %s, attempting to check out'
+                ' in pid %s' % (connection_record.info['pid'], pid)
+            )
+
+    engine._zero_guarded = True    # type: ignore
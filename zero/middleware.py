@@ -0,0 +1,102 @@
+"""
+WSGI middlewares.
+
+See :mod:`arxiv.base.middleware` for how these are installed.
+"""
+
+import hashlib
+import os
+from datetime import datetime
+from typing import Callable, Mapping, Optional
+
+import jwt
+from pytz import UTC
+
+from arxiv.base import logging
+from arxiv.users import domain
+from arxiv.users.auth.middleware import AuthMiddleware, WSGIRequest
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SESSION_CACHE_SIZE = 10000
+DEFAULT_SESSION_CACHE_TTL = 300.
+
+# This outlives the application instance; see ``wsgi.py``.
+sessions: TTLCache[domain.Session] = TTLCache(DEFAULT_SESSION_CACHE_SIZE)
+"""Verified sessions, keyed by a hash of the auth token."""
+
+
+class CachingAuthMiddleware(AuthMiddleware):
+    """
+    An :class:`AuthMiddleware` that remembers tokens that it has verified.
+
+    Decoding and verifying the JWT on each request is a measurable share of
+    the cost of handling a request, and clients tend to use the same token
+    for many requests. So when a token is successfully verified, we cache the
+    resulting session. Cache entries expire after ``AUTH_SESSION_CACHE_TTL``
+    seconds, or when the token expires (per its ``exp`` claim or the end time
+    of the session), whichever comes first.
+
+    Invalid tokens are not cached.
+    """
+
+    def __init__(self, wsgi_app: Callable, config: Mapping = {}) -> None:
+        """Size the session cache per ``AUTH_SESSION_CACHE_SIZE``."""
+        super(CachingAuthMiddleware, self).__init__(wsgi_app, config)
+        sessions.maxsize = int(config.get('AUTH_SESSION_CACHE_SIZE',
+                                          DEFAULT_SESSION_CACHE_SIZE))
+
+    def before(self, environ: dict, start_response: Callable) -> WSGIRequest:
+        """Get the session for the auth token from cache, or decode it."""
+        token = environ.get('HTTP_AUTHORIZATION')
+        secret = environ.get('JWT_SECRET', os.environ.get('JWT_SECRET'))
+        if token is None or secret is None:
+            return super(CachingAuthMiddleware, self).before(environ,
+                                                             start_response)
+        # The secret is part of the key, so that rotating the secret
+        # invalidates sessions that were verified with the old secret.
+        key = hashlib.sha256(f'{secret}:{token}'.encode('utf-8')).hexdigest()
+        session = sessions.get(key)
+        if session is not None:
+            environ['session'] = session
+            environ['token'] = token
+            return environ, start_response
+
+        environ, start_response = \
+            super(CachingAuthMiddleware, self).before(environ, start_response)
+        session = environ['session']
+        if isinstance(session, domain.Session):
+            ttl = self._get_ttl(token, session)
+            if ttl > 0:
+                sessions.set(key, session, ttl)
+        return environ, start_response
+
+    def _get_ttl(self, token: str, session: domain.Session) -> float:
+        """Get the number of seconds for which a session may be cached."""
+        ttl = float(self.config.get('AUTH_SESSION_CACHE_TTL',
+                                    DEFAULT_SESSION_CACHE_TTL))
+        now = datetime.now(tz=UTC)
+        if session.end_time is not None:
+            end_time = session.end_time
+            if end_time.tzinfo is None:
+                end_time = end_time.replace(tzinfo=UTC)
+            ttl = min(ttl, (end_time - now).total_seconds())
+        expires = _get_expiry(token)
+        if expires is not None:
+            ttl = min(ttl, (expires - now).total_seconds())
+        return ttl
+
+
+def _get_expiry(token: str) -> Optional[datetime]:
+    """Get the value of the ``exp`` claim of an already-verified token."""
+    try:
+        claims = jwt.decode(token, algorithms=['HS256'],
+                            options={'verify_signature': False,
+                                     'verify_exp': False})
+    except jwt.exceptions.InvalidTokenError:  # type: ignore
+        return None
+    if 'exp' not in claims:
+        return None
+    return datetime.fromtimestamp(int(claims['exp']), tz=UTC)
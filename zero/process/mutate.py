@@ -1,8 +1,27 @@
-"""Provides functions that mutate domain objects."""
+"""
+Provides functions that mutate domain objects.
+
+Each mutation comes in two forms: one that mutates a single object, and a
+batch form that mutates many objects at once. The batch forms work on whole
+columns of values (e.g. the numbers of ones to add to many things) and only
+touch the objects themselves to write the results back, which saves a lot of
+per-object overhead in batch mutation tasks.
+
+Mutations add to :attr:`.Thing.ones` rather than to the name itself, so the
+cost of a mutation does not grow with the length of the name.
+"""
 
 import random
+from typing import Iterable, List, Optional, Sequence
+
 from zero.domain import Thing, Baz
 
+MIN_ONES = 1
+MAX_ONES = 10
+"""Bounds of the number of ones that are added to a name."""
+
+_ONES_COUNTS = range(MIN_ONES, MAX_ONES + 1)
+
 
 def add_some_one_to_the_thing(the_thing: Thing) -> None:
     """
@@ -13,7 +32,7 @@ def add_some_one_to_the_thing(the_thing: Thing) -> None:
     the_thing : :class:`.Thing`
 
     """
-    the_thing.name += "1" * random.randint(1, 10)
+    the_thing.ones += random.randint(MIN_ONES, MAX_ONES)
 
 
 def increment_mukluk(a_thing: Thing, a_baz: Baz) -> None:
@@ -26,4 +45,67 @@ def increment_mukluk(a_thing: Thing, a_baz: Baz) -> None:
     a_baz : :class:`.Baz`
 
     """
-    a_baz.mukluk += a_thing.name.count('1')
\ No newline at end of file
+    a_baz.mukluk += a_thing.ones_in_name
+
+
+def draw_ones_counts(n: int,
+                     rng: Optional[random.Random] = None) -> List[int]:
+    """
+    Draw the number of ones to add to each of ``n`` names, all at once.
+
+    The counts are uniformly distributed between :const:`MIN_ONES` and
+    :const:`MAX_ONES`, just like in :func:`add_some_one_to_the_thing`.
+
+    Parameters
+    ----------
+    n : int
+    rng : :class:`random.Random`
+        Pass a generator with a seed to get repeatable counts. Defaults to
+        the module-level generator of :mod:`random`.
+
+    Returns
+    -------
+    list
+
+    """
+    choices = random.choices if rng is None else rng.choices
+    return choices(_ONES_COUNTS, k=n)
+
+
+def add_some_one_to_many_things(the_things: Sequence[Thing],
+                                rng: Optional[random.Random] = None) -> None:
+    """
+    Add some ones to the names of many things.
+
+    Parameters
+    ----------
+    the_things : sequence
+        :class:`.Thing` instances. Each should appear only once.
+    rng : :class:`random.Random`
+        See :func:`draw_ones_counts`.
+
+    """
+    counts = draw_ones_counts(len(the_things), rng)
+    for a_thing, count in zip(the_things, counts):
+        a_thing.ones += count
+
+
+def count_ones(the_things: Iterable[Thing]) -> List[int]:
+    """Count the ones in the name of each of many things."""
+    return [a_thing.ones_in_name for a_thing in the_things]
+
+
+def increment_mukluk_many(the_things: Iterable[Thing], a_baz: Baz) -> None:
+    """
+    More mukluk, from many things at once.
+
+    Same as calling :func:`increment_mukluk` with each of ``the_things``.
+
+    Parameters
+    ----------
+    the_things : iterable
+        :class:`.Thing` instances.
+    a_baz : :class:`.Baz`
+
+    """
+    a_baz.mukluk += sum(count_ones(the_things))
@@ -0,0 +1,140 @@
+"""
+Runs a chain of mutations on a :class:`.Thing` in one go.
+
+A pipeline is a list of steps, each a dict with the name of the ``step`` and
+its parameters, for example:
+
+.. code-block:: python
+
+   [{'step': 'add_some_one'},
+    {'step': 'increment_mukluk', 'baz_id': 5}]
+
+
+Every step runs in memory; it is up to the caller to persist the thing once
+the pipeline has run (see :func:`zero.tasks.run_pipeline`). Steps are
+registered in :const:`STEPS` with :func:`step`.
+"""
+
+from typing import Any, Callable, Dict, List, Sequence
+
+from zero.domain import Thing, Baz
+from . import mutate
+
+StepSpec = Dict[str, Any]
+GetBaz = Callable[[int], Baz]
+
+
+class Context:
+    """Shared by the steps of a pipeline that is running."""
+
+    def __init__(self, get_baz: GetBaz) -> None:
+        """Set the function with which bazs are retrieved."""
+        self._get_baz = get_baz
+        self.bazs: Dict[int, Baz] = {}
+
+    def get_baz(self, baz_id: int) -> Baz:
+        """Get a baz, retrieving it only once per pipeline."""
+        if baz_id not in self.bazs:
+            self.bazs[baz_id] = self._get_baz(baz_id)
+        return self.bazs[baz_id]
+
+
+class Step:
+    """A mutation that can be used in a pipeline."""
+
+    def __init__(self, func: Callable[..., None],
+                 params: Sequence[str] = ()) -> None:
+        """Set the function that runs the step, and its required params."""
+        self.func = func
+        self.params = tuple(params)
+
+
+STEPS: Dict[str, Step] = {}
+"""Steps that can be used in a pipeline, by name."""
+
+MAX_STEPS = 100
+"""The maximum number of steps in a pipeline."""
+
+
+def step(name: str, params: Sequence[str] = ()) -> Callable:
+    """
+    Register a function as a pipeline step.
+
+    The function is called with the thing, the :class:`Context` of the
+    pipeline and the parameters of the step as keyword arguments.
+    """
+    def register(func: Callable[..., None]) -> Callable[..., None]:
+        STEPS[name] = Step(func, params)
+        return func
+    return register
+
+
+@step('add_some_one')
+def _add_some_one(a_thing: Thing, context: Context) -> None:
+    mutate.add_some_one_to_the_thing(a_thing)
+
+
+@step('increment_mukluk', params=('baz_id',))
+def _increment_mukluk(a_thing: Thing, context: Context, baz_id: int) -> None:
+    mutate.increment_mukluk(a_thing, context.get_baz(baz_id))
+
+
+def validate(steps: Any) -> None:
+    """
+    Check that a pipeline can be run.
+
+    Raises
+    ------
+    ValueError
+        If the pipeline is not a non-empty list of known steps with their
+        parameters.
+
+    """
+    if not isinstance(steps, list) or not steps:
+        raise ValueError('a pipeline is a list of steps')
+    if len(steps) > MAX_STEPS:
+        raise ValueError(f'a pipeline has at most {MAX_STEPS} steps')
+    for spec in steps:
+        if not isinstance(spec, dict) or spec.get('step') not in STEPS:
+            raise ValueError('steps must be one of: %s'
+                             % ', '.join(sorted(STEPS)))
+        expected = set(STEPS[spec['step']].params)
+        given = set(spec) - {'step'}
+        if given != expected:
+            raise ValueError('step %s takes parameters: %s'
+                             % (spec['step'], ', '.join(sorted(expected))
+                                or 'none'))
+        if 'baz_id' in spec and not isinstance(spec['baz_id'], int):
+            raise ValueError('baz_id must be an integer')
+
+
+def run(a_thing: Thing, steps: List[StepSpec],
+        get_baz: GetBaz) -> Dict[int, Baz]:
+    """
+    Run each step of a pipeline on a thing, in memory.
+
+    Parameters
+    ----------
+    a_thing : :class:`.Thing`
+    steps : list
+        See :func:`validate`.
+    get_baz : callable
+        Retrieves a :class:`.Baz` by ID.
+
+    Returns
+    -------
+    dict
+        The bazs that were used by the steps, by ID.
+
+    Raises
+    ------
+    ValueError
+        If the pipeline is not valid; in that case no step is run.
+
+    """
+    validate(steps)
+    context = Context(get_baz)
+    for spec in steps:
+        params = {key: value for key, value in spec.items() if key != 'step'}
+        STEPS[spec['step']].func(a_thing, context, **params)
+    return context.bazs
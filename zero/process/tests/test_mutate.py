@@ -1,8 +1,11 @@
 """Tests for :mod:`zero.process.mutate`."""
 
+import random
+from collections import Counter
 from unittest import TestCase
 from datetime import datetime
-from ...domain import Thing
+from ...domain import Thing, Baz
+from .. import mutate
 from ..mutate import add_some_one_to_the_thing
 
 
@@ -16,3 +19,44 @@ class TestMutateThing(TestCase):
         N_after = len([c for c in a_thing.name if c == '1'])
         self.assertGreater(N_after, 0)
         self.assertLess(N_after, 11)
+
+
+class TestMutateManyThings(TestCase):
+    """The batch mutations mutate many things at once."""
+
+    def test_seed(self) -> None:
+        """The same seed gives the same counts."""
+        self.assertEqual(mutate.draw_ones_counts(10, random.Random(42)),
+                         mutate.draw_ones_counts(10, random.Random(42)))
+
+    def test_same_distribution(self) -> None:
+        """The number of ones has the same distribution as one at a time."""
+        n = 20000
+        scalar = Counter(random.randint(1, 10) for _ in range(n))
+        batch = Counter(mutate.draw_ones_counts(n))
+        self.assertEqual(set(batch), set(range(1, 11)))
+        for count in range(1, 11):
+            # Each count should turn up about 2000 times.
+            self.assertAlmostEqual(batch[count] / n, scalar[count] / n,
+                                   delta=0.02)
+
+    def test_add_some_one_to_many_things(self) -> None:
+        """The names of the things are written back."""
+        the_things = [Thing(id=i, name='foo', created=datetime.now())
+                      for i in range(3)]
+        mutate.add_some_one_to_many_things(the_things)
+        for a_thing in the_things:
+            self.assertTrue(a_thing.name.startswith('foo1'))
+        self.assertEqual(mutate.count_ones(the_things),
+                         [a_thing.name.count('1') for a_thing in the_things])
+
+    def test_increment_mukluk_many(self) -> None:
+        """Same as incrementing mukluk with each thing."""
+        the_things = [Thing(id=1, name='foo11', created=datetime.now()),
+                      Thing(id=2, name='1bar1', created=datetime.now())]
+        a_baz, another_baz = Baz(foo='a', mukluk=1), Baz(foo='a', mukluk=1)
+        mutate.increment_mukluk_many(the_things, a_baz)
+        for a_thing in the_things:
+            mutate.increment_mukluk(a_thing, another_baz)
+        self.assertEqual(a_baz.mukluk, 5)
+        self.assertEqual(a_baz.mukluk, another_baz.mukluk)
@@ -0,0 +1,42 @@
+"""Tests for :mod:`zero.process.pipeline`."""
+
+from unittest import TestCase, mock
+from datetime import datetime
+
+from ...domain import Thing, Baz
+from .. import pipeline
+
+
+class TestValidate(TestCase):
+    """:func:`.pipeline.validate` checks pipelines before they run."""
+
+    def test_valid(self) -> None:
+        """Known steps with their parameters are valid."""
+        pipeline.validate([{'step': 'add_some_one'},
+                           {'step': 'increment_mukluk', 'baz_id': 5}])
+
+    def test_invalid(self) -> None:
+        """Anything else is not."""
+        for steps in [[], {'step': 'add_some_one'}, [{'step': 'foo'}],
+                      [{'step': 'increment_mukluk'}],
+                      [{'step': 'increment_mukluk', 'baz_id': 'five'}],
+                      [{'step': 'add_some_one', 'baz_id': 5}],
+                      [{'step': 'add_some_one'}] * (pipeline.MAX_STEPS + 1)]:
+            with self.assertRaises(ValueError):
+                pipeline.validate(steps)
+
+
+class TestRun(TestCase):
+    """:func:`.pipeline.run` runs each step in memory."""
+
+    def test_run(self) -> None:
+        """The steps run in order, and each baz is retrieved once."""
+        a_thing = Thing(id=1, name='foo', created=datetime.now())
+        get_baz = mock.MagicMock(return_value=Baz(foo='bar', mukluk=0))
+        bazs = pipeline.run(a_thing, [
+            {'step': 'increment_mukluk', 'baz_id': 5},
+            {'step': 'add_some_one'},
+            {'step': 'increment_mukluk', 'baz_id': 5},
+        ], get_baz)
+        get_baz.assert_called_once_with(5)
+        self.assertEqual(bazs[5].mukluk, a_thing.name.count('1'))
@@ -0,0 +1,136 @@
+"""
+Progress reporting for long-running tasks.
+
+A task reports its progress with a :class:`ProgressReporter`, for example:
+
+.. code-block:: python
+
+   progress = reporter(total=len(thing_ids))
+   for thing_id in thing_ids:
+       ...
+       progress.advance()
+
+
+Progress is stored as the ``PROGRESS`` state of the task, with the number of
+steps ``done`` and the ``total``, the ``percent`` complete and an estimate of
+the number of seconds remaining (``eta``). Writes are throttled to at most
+one per ``PROGRESS_MIN_INTERVAL`` seconds, so that reporting progress never
+costs much compared to the work itself.
+"""
+
+import time
+from contextlib import contextmanager
+from threading import local
+from typing import Any, Callable, Dict, Generator, Optional
+
+from celery import current_task
+
+from arxiv.base import logging
+from arxiv.base.globals import get_application_config
+
+logger = logging.getLogger(__name__)
+
+PROGRESS = 'PROGRESS'
+"""Task state while progress is being reported."""
+
+DEFAULT_MIN_INTERVAL = 1.
+
+Writer = Callable[[Dict[str, Any]], None]
+
+_local = local()
+
+
+class ProgressReporter:
+    """Keeps track of the progress of a task, and reports it now and then."""
+
+    def __init__(self, total: int, write: Writer,
+                 min_interval: float = DEFAULT_MIN_INTERVAL,
+                 timer: Callable[[], float] = time.monotonic) -> None:
+        """
+        Start reporting progress.
+
+        Parameters
+        ----------
+        total : int
+            Number of steps in the task.
+        write : callable
+            Stores the progress of the task.
+        min_interval : float
+            Minimum number of seconds between writes.
+        timer : callable
+            Returns the current time, in seconds.
+
+        """
+        self.total = max(total, 1)
+        self.done = 0
+        self.min_interval = min_interval
+        self._write = write
+        self._timer = timer
+        self._started = self._last_write = timer()
+        self._written = False
+
+    @property
+    def progress(self) -> Dict[str, Any]:
+        """The current progress of the task."""
+        done = min(self.done, self.total)
+        elapsed = self._timer() - self._started
+        eta: Optional[float] = None
+        if done > 0:
+            eta = round(elapsed / done * (self.total - done), 1)
+        return {'done': done, 'total': self.total,
+                'percent': round(100. * done / self.total, 1), 'eta': eta}
+
+    def advance(self, steps: int = 1) -> None:
+        """Record that ``steps`` more steps are done."""
+        self.done += steps
+        now = self._timer()
+        if self._written and now - self._last_write < self.min_interval:
+            return
+        self._last_write = now
+        self._written = True
+        try:
+            self._write(self.progress)
+        except Exception as e:  # Progress is nice to have; the task isn't.
+            logger.error('Could not write progress: %s', e)
+
+
+def reporter(total: int) -> ProgressReporter:
+    """
+    Get a :class:`ProgressReporter` for the task that is running.
+
+    Progress is written to the Celery result backend, or to the local task
+    store if the task is run by the local executor (see :func:`writing_to`).
+    If the task is not running asynchronously at all (e.g. it was called
+    directly), progress is not written anywhere.
+    """
+    config = get_application_config()
+    min_interval = float(config.get('PROGRESS_MIN_INTERVAL',
+                                    DEFAULT_MIN_INTERVAL))
+    return ProgressReporter(total, _get_writer(), min_interval)
+
+
+@contextmanager
+def writing_to(write: Writer) -> Generator:
+    """Write progress of tasks in this thread with ``write``."""
+    _local.write = write
+    try:
+        yield
+    finally:
+        del _local.write
+
+
+def _get_writer() -> Writer:
+    write: Optional[Writer] = getattr(_local, 'write', None)
+    if write is not None:
+        return write
+    if current_task and current_task.request.id is not None:
+        task = current_task._get_current_object()
+
+        def write_state(meta: Dict[str, Any]) -> None:
+            task.update_state(state=PROGRESS, meta=meta)
+        return write_state
+    return _discard
+
+
+def _discard(meta: Dict[str, Any]) -> None:
+    pass
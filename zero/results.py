@@ -0,0 +1,536 @@
+"""
+Helpers for reading from and writing to the Celery result backend.
+
+Most of the time :class:`celery.result.AsyncResult` is all we need. The
+functions here cover cases where going through ``AsyncResult`` one task at a
+time would cost us a backend round-trip per task.
+"""
+
+from contextlib import contextmanager
+from datetime import timedelta
+from threading import local
+from typing import Any, Dict, Generator, Iterable, List, Optional, Set
+
+from celery import current_app
+from celery.result import AsyncResult
+from kombu.utils.encoding import bytes_to_str
+
+from arxiv.base import logging
+
+logger = logging.getLogger(__name__)
+
+Meta = Dict[str, Any]
+
+LOCK_PREFIX = 'zero-lock-'
+"""Prefix for the keys of locks in the result backend."""
+
+REGISTRY_PREFIX = 'zero-task-'
+"""Prefix for the keys of registered tasks in the result backend."""
+
+DEAD_LETTER_KEY = 'zero-dead-letters'
+"""Key of the list of tasks that failed for good; see :mod:`zero.retries`."""
+
+KEY_TYPES = [
+    ('result', 'celery-task-meta-'),
+    ('registry', REGISTRY_PREFIX),
+    ('lock', LOCK_PREFIX),
+    ('dead-letter', DEAD_LETTER_KEY),
+    ('broker', '_kombu.'),
+    ('broker', 'unacked'),
+]
+"""Key prefixes by which :func:`sweep` groups keys."""
+
+DEFAULT_TTL = 86400
+"""Lifetime of registry entries and locks if results do not expire."""
+
+_ACQUIRE_LOCK = """
+if redis.call('SET', KEYS[1], ARGV[1], 'NX', 'EX', ARGV[2]) then
+    if KEYS[2] then
+        redis.call('SET', KEYS[2], '1', 'EX', ARGV[3])
+    end
+    return false
+end
+return redis.call('GET', KEYS[1])
+"""
+"""
+Lua script that acquires a lock unless it is held, and then optionally
+registers its owner.
+"""
+
+_REPLACE_LOCK = """
+local holder = redis.call('GET', KEYS[1])
+if holder and holder ~= ARGV[1] then
+    return holder
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+if KEYS[2] then
+    redis.call('SET', KEYS[2], '1', 'EX', ARGV[4])
+end
+return false
+"""
+"""
+Lua script that takes over a lock if it is held by a given owner, and then
+optionally registers the new owner.
+"""
+
+_RELEASE_LOCK = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+"""Lua script that releases a lock if it is held by a given owner."""
+
+
+def get_backend() -> Any:
+    """Get the result backend for the current Celery application."""
+    return current_app.backend
+
+
+def get_result_ttl(state: Optional[str] = None) -> int:
+    """
+    Get the number of seconds for which task results are kept.
+
+    Parameters
+    ----------
+    state : str
+        If provided, get the lifetime of results of tasks that finished in
+        this state (see ``result_expires_by_state`` in
+        :mod:`zero.celeryconfig`).
+
+    Returns
+    -------
+    int
+
+    """
+    expires = current_app.conf.result_expires
+    if state is not None:
+        by_state = current_app.conf.get('result_expires_by_state') or {}
+        expires = by_state.get(state, expires)
+    if isinstance(expires, timedelta):
+        return int(expires.total_seconds())
+    if expires:
+        return int(expires)
+    return DEFAULT_TTL
+
+
+def expire_task(task_id: str, ttl: int,
+                backend: Optional[Any] = None) -> None:
+    """
+    Set the lifetime of the result and registry entry for a task.
+
+    Only Redis backends are supported; for other backends, this does nothing.
+
+    Parameters
+    ----------
+    task_id : str
+    ttl : int
+        Number of seconds after which the result and registry entry expire.
+    backend : object
+        Celery result backend. If not provided, uses the backend of the current
+        Celery application.
+
+    """
+    if backend is None:
+        backend = get_backend()
+    client = getattr(backend, 'client', None)
+    if client is None:
+        return
+    pipe = client.pipeline(transaction=False)
+    pipe.expire(backend.get_key_for_task(task_id), ttl)
+    pipe.expire(REGISTRY_PREFIX + task_id, ttl)
+    pipe.execute()
+
+
+def get_many(task_ids: Iterable[str], backend: Optional[Any] = None) \
+        -> Dict[str, Meta]:
+    """
+    Get metadata for many tasks using a single multi-get on the backend.
+
+    Key/value backends (e.g. Redis) support retrieving many keys at once. For
+    other backends, we fall back to retrieving each task individually.
+
+    Parameters
+    ----------
+    task_ids : iterable
+        Task IDs of interest.
+    backend : object
+        Celery result backend. If not provided, uses the backend of the current
+        Celery application.
+
+    Returns
+    -------
+    dict
+        Maps task IDs onto task metadata (with at least ``status`` and
+        ``result`` keys). Tasks for which the backend has no record are
+        reported as ``PENDING``, just like ``AsyncResult`` would.
+
+    """
+    if backend is None:
+        backend = get_backend()
+    task_ids = list(dict.fromkeys(task_ids))    # De-duplicate, keep order.
+    if not task_ids:
+        return {}
+    if not hasattr(backend, 'mget') \
+            or not hasattr(backend, 'get_key_for_task'):
+        logger.debug('Backend does not support mget; getting tasks one by one')
+        return {task_id: _get_one(task_id, backend) for task_id in task_ids}
+
+    keys = [backend.get_key_for_task(task_id) for task_id in task_ids]
+    values: List[Optional[bytes]] = backend.mget(keys)
+    metas: Dict[str, Meta] = {}
+    for task_id, value in zip(task_ids, values):
+        if value is None:
+            metas[task_id] = {'status': 'PENDING', 'result': None}
+        else:
+            metas[task_id] = backend.decode_result(value)
+    return metas
+
+
+def _get_one(task_id: str, backend: Any) -> Meta:
+    celery_task = AsyncResult(task_id, backend=backend)
+    return {'status': celery_task.status, 'result': celery_task.result}
+
+
+def acquire_lock(name: str, owner: str, ttl: int,
+                 backend: Optional[Any] = None,
+                 register: bool = False) -> Optional[str]:
+    """
+    Acquire a named lock in the result backend, unless it is already held.
+
+    With a Redis backend the lock is acquired atomically. Other key/value
+    backends are supported on a best-effort basis: two clients that try to
+    acquire the same lock at exactly the same time may both succeed. If the
+    backend does not store keys and values at all, the lock is always
+    acquired.
+
+    Parameters
+    ----------
+    name : str
+        Name of the lock.
+    owner : str
+        Identifies the holder of the lock, e.g. a task ID.
+    ttl : int
+        Number of seconds after which the lock expires.
+    backend : object
+        Celery result backend. If not provided, uses the backend of the current
+        Celery application.
+    register : bool
+        If ``True`` and the lock is acquired, ``owner`` is a task ID, and the
+        task is registered (see :class:`TaskRegistry`) in the same
+        round-trip.
+
+    Returns
+    -------
+    str or None
+        ``None`` if the lock was acquired; otherwise, the current owner of the
+        lock.
+
+    """
+    if backend is None:
+        backend = get_backend()
+    key = LOCK_PREFIX + name
+    client = getattr(backend, 'client', None)
+    if client is not None:
+        keys = [key, REGISTRY_PREFIX + owner] if register else [key]
+        holder = client.eval(_ACQUIRE_LOCK, len(keys), *keys, owner, ttl,
+                             get_result_ttl())
+        return bytes_to_str(holder) if holder is not None else None
+    if hasattr(backend, 'get') and hasattr(backend, 'set'):
+        holder = backend.get(_key_t(backend, key))
+        if holder is not None:
+            return bytes_to_str(holder)
+        backend.set(_key_t(backend, key), owner)
+    else:
+        logger.debug('Backend does not support locks')
+    if register:
+        TaskRegistry(backend)._write([owner])
+    return None
+
+
+def replace_lock(name: str, old_owner: str, new_owner: str, ttl: int,
+                 backend: Optional[Any] = None,
+                 register: bool = False) -> Optional[str]:
+    """
+    Take over a named lock, if it is still held by ``old_owner``.
+
+    This is a compare-and-set: with a Redis backend, the lock is taken over
+    atomically, so that of several clients that find the same stale lock,
+    only one takes it over. As with :func:`acquire_lock`, other key/value
+    backends are supported on a best-effort basis. A lock that is no longer
+    held at all is acquired, and ``register`` works as it does there.
+
+    Returns
+    -------
+    str or None
+        ``None`` if the lock was taken over; otherwise, the current owner of
+        the lock.
+
+    """
+    if backend is None:
+        backend = get_backend()
+    key = LOCK_PREFIX + name
+    client = getattr(backend, 'client', None)
+    if client is not None:
+        keys = [key, REGISTRY_PREFIX + new_owner] if register else [key]
+        holder = client.eval(_REPLACE_LOCK, len(keys), *keys, old_owner,
+                             new_owner, ttl, get_result_ttl())
+        return bytes_to_str(holder) if holder is not None else None
+    if hasattr(backend, 'get') and hasattr(backend, 'set'):
+        holder = backend.get(_key_t(backend, key))
+        if holder is not None and bytes_to_str(holder) != old_owner:
+            return bytes_to_str(holder)
+        backend.set(_key_t(backend, key), new_owner)
+    if register:
+        TaskRegistry(backend)._write([new_owner])
+    return None
+
+
+def release_lock(name: str, owner: Optional[str] = None,
+                 backend: Optional[Any] = None) -> None:
+    """
+    Release a named lock.
+
+    If ``owner`` is given, the lock is only released if it is still held by
+    ``owner`` (atomically, with a Redis backend).
+    """
+    if backend is None:
+        backend = get_backend()
+    key = LOCK_PREFIX + name
+    client = getattr(backend, 'client', None)
+    if client is not None:
+        if owner is None:
+            client.delete(key)
+        else:
+            client.eval(_RELEASE_LOCK, 1, key, owner)
+    elif hasattr(backend, 'delete'):
+        if owner is not None and hasattr(backend, 'get'):
+            holder = backend.get(_key_t(backend, key))
+            if holder is None or bytes_to_str(holder) != owner:
+                return
+        backend.delete(_key_t(backend, key))
+
+
+def _key_t(backend: Any, key: str) -> Any:
+    """Convert a key to the type used by a key/value backend."""
+    key_t = getattr(backend, 'key_t', None)
+    return key_t(key) if callable(key_t) else key
+
+
+class TaskRegistry:
+    """
+    Keeps track of which tasks exist, so that we can tell them apart from
+    tasks that have never been sent.
+
+    Celery reports ``PENDING`` both for tasks that are waiting in the queue
+    and for tasks that it has never heard of. Rather than writing a
+    placeholder result for each task when it is published, we register the
+    task ID here. Each registration is written to the result backend before
+    :meth:`register` returns, so that a task can be found by any process as
+    soon as its ID has been handed out. Tasks that are published together
+    can be registered in a :meth:`batch`, which writes all of their
+    registrations in a single pipelined round-trip at the end of the block.
+    A task can also be registered along with a lock (see
+    :func:`acquire_lock`), and then sent while it is :meth:`registered`.
+    Each entry expires along with the results of the task.
+    """
+
+    def __init__(self, backend: Optional[Any] = None) -> None:
+        """
+        Set the backend in which tasks are registered.
+
+        Parameters
+        ----------
+        backend : object
+            Celery result backend. If not provided, uses the backend of the
+            current Celery application.
+
+        """
+        self._backend = backend
+        self._local = local()
+
+    @property
+    def backend(self) -> Any:
+        """The result backend in which the registry is stored."""
+        if self._backend is None:
+            return get_backend()
+        return self._backend
+
+    def register(self, task_id: str) -> None:
+        """Register a task that has been (or is about to be) sent."""
+        if task_id == getattr(self._local, 'registered', None):
+            return
+        buffer: Optional[List[str]] = getattr(self._local, 'buffer', None)
+        if buffer is not None:
+            buffer.append(task_id)
+        else:
+            self._write([task_id])
+
+    @contextmanager
+    def batch(self) -> Generator:
+        """
+        Register the tasks that are sent in this thread within the block.
+
+        The registrations are written when the block exits, so the IDs of the
+        tasks must not be handed out until then.
+        """
+        if getattr(self._local, 'buffer', None) is not None:    # Nested.
+            yield
+            return
+        self._local.buffer = []
+        try:
+            yield
+        finally:
+            task_ids, self._local.buffer = self._local.buffer, None
+            self._write(task_ids)
+
+    @contextmanager
+    def registered(self, task_id: str) -> Generator:
+        """
+        Skip registering ``task_id`` in this thread within the block.
+
+        For a task that has already been registered, e.g. along with a lock,
+        so that sending it does not write its registration again.
+        """
+        self._local.registered = task_id
+        try:
+            yield
+        finally:
+            self._local.registered = None
+
+    def _write(self, task_ids: List[str]) -> None:
+        if not task_ids:
+            return
+        backend = self.backend
+        ttl = get_result_ttl()
+        client = getattr(backend, 'client', None)
+        if client is not None:
+            pipe = client.pipeline(transaction=False)
+            for task_id in task_ids:
+                pipe.set(REGISTRY_PREFIX + task_id, b'1', ex=ttl)
+            pipe.execute()
+        elif hasattr(backend, 'set'):
+            for task_id in task_ids:
+                backend.set(_key_t(backend, REGISTRY_PREFIX + task_id), b'1')
+        else:   # There is nowhere else to keep track of the task.
+            for task_id in task_ids:
+                backend.store_result(task_id, None, 'SENT')
+        logger.debug('Registered %i tasks', len(task_ids))
+
+    def exists(self, task_id: str) -> bool:
+        """Check whether a task has been registered."""
+        return task_id in self.exists_many([task_id])
+
+    def exists_many(self, task_ids: Iterable[str]) -> Set[str]:
+        """
+        Check which of several tasks have been registered.
+
+        Returns
+        -------
+        set
+            The task IDs that have been registered.
+
+        """
+        task_ids = list(task_ids)
+        buffer = getattr(self._local, 'buffer', None) or []
+        found = set(buffer).intersection(task_ids)
+        unknown = [task_id for task_id in task_ids if task_id not in found]
+        if not unknown:
+            return found
+        backend = self.backend
+        keys = [REGISTRY_PREFIX + task_id for task_id in unknown]
+        client = getattr(backend, 'client', None)
+        if client is not None:
+            values = client.mget(keys)
+        elif hasattr(backend, 'mget'):
+            values = backend.mget([_key_t(backend, key) for key in keys])
+        else:
+            values = [_get_one(task_id, backend)['status'] != 'PENDING'
+                      or None for task_id in unknown]
+        found.update(task_id for task_id, value in zip(unknown, values)
+                     if value is not None)
+        return found
+
+
+# This outlives the application instance; see ``wsgi.py``.
+registry = TaskRegistry()
+"""The task registry for this process."""
+
+
+def sweep(backend: Optional[Any] = None, batch_size: int = 1000,
+          missing_ttl: Optional[int] = None) -> Dict[str, Dict[str, int]]:
+    """
+    Report on memory used in the result backend, by type of key.
+
+    Iterates over all keys with ``SCAN``, so this is safe (if not fast) to
+    run against a live Redis instance. The size and lifetime of each batch of
+    keys are fetched in a single pipelined round-trip.
+
+    Parameters
+    ----------
+    backend : object
+        Celery result backend. Must be backed by Redis. If not provided, uses
+        the backend of the current Celery application.
+    batch_size : int
+        Number of keys to fetch at a time.
+    missing_ttl : int
+        If provided, keys of known types (see :const:`KEY_TYPES`) that have no
+        lifetime are set to expire after this many seconds.
+
+    Returns
+    -------
+    dict
+        Maps key types onto the number of ``keys``, the memory used by those
+        keys in ``bytes``, and the number of keys with ``no_ttl``.
+
+    """
+    if backend is None:
+        backend = get_backend()
+    client = getattr(backend, 'client', None)
+    if client is None:
+        raise RuntimeError('Sweep requires a Redis result backend')
+    report: Dict[str, Dict[str, int]] = {}
+    keys: List[bytes] = []
+    for key in client.scan_iter(count=batch_size):
+        keys.append(key)
+        if len(keys) >= batch_size:
+            _sweep_batch(client, keys, report, missing_ttl)
+            keys = []
+    if keys:
+        _sweep_batch(client, keys, report, missing_ttl)
+    return report
+
+
+def _sweep_batch(client: Any, keys: List[bytes],
+                 report: Dict[str, Dict[str, int]],
+                 missing_ttl: Optional[int]) -> None:
+    pipe = client.pipeline(transaction=False)
+    for key in keys:
+        pipe.execute_command('MEMORY', 'USAGE', key)
+        pipe.ttl(key)
+    values = pipe.execute()
+    expire = client.pipeline(transaction=False)
+    to_expire = 0
+    for key, size, ttl in zip(keys, values[::2], values[1::2]):
+        if ttl == -2:   # The key was deleted since it was scanned.
+            continue
+        key_type = _get_key_type(bytes_to_str(key))
+        counts = report.setdefault(key_type,
+                                   {'keys': 0, 'bytes': 0, 'no_ttl': 0})
+        counts['keys'] += 1
+        counts['bytes'] += size or 0
+        if ttl == -1:
+            counts['no_ttl'] += 1
+            if missing_ttl and key_type in ('result', 'registry', 'lock'):
+                expire.expire(key, missing_ttl)
+                to_expire += 1
+    if to_expire:
+        expire.execute()
+        logger.debug('Set missing TTL on %i keys', to_expire)
+
+
+def _get_key_type(key: str) -> str:
+    for key_type, prefix in KEY_TYPES:
+        if key.startswith(prefix):
+            return key_type
+    return 'other'
@@ -0,0 +1,245 @@
+"""
+Retries of tasks that fail for transient reasons, and dead-lettering.
+
+A task that hits a transient error (e.g. the database is briefly
+unavailable) is retried after a random delay between zero and an
+exponentially growing ceiling ("full jitter"; see :func:`get_countdown`).
+Without jitter, every task that failed during a blip would be retried at the
+same moment, and could cause a second outage. Retries are sent to the
+``retry`` queue, so that they do not hold up new mutations.
+
+When a task runs out of retries, it fails, and is recorded in a dead-letter
+list in the result backend. Dead letters can be inspected with
+:func:`get_dead_letters` and sent again with :func:`replay`; see also
+``dead_letters.py``.
+"""
+
+import json
+import random
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from celery import current_app
+from sqlalchemy.exc import OperationalError
+from kombu.utils.encoding import bytes_to_str
+
+from arxiv.base import logging
+from arxiv.base.globals import get_application_config
+
+from . import results
+
+logger = logging.getLogger(__name__)
+
+TRANSIENT_ERRORS: Tuple[Type[Exception], ...] = (IOError, OperationalError)
+"""Errors after which a task is worth retrying."""
+
+DeadLetter = Dict[str, Any]
+
+
+def get_countdown(retries: int, base: float, cap: float,
+                  rand: Callable[[float, float], float] = random.uniform) \
+        -> float:
+    """
+    Get the number of seconds to wait before retrying a task.
+
+    Parameters
+    ----------
+    retries : int
+        Number of times the task has already been retried.
+    base : float
+        Ceiling of the delay before the first retry.
+    cap : float
+        Maximum ceiling of the delay.
+    rand : callable
+        Picks a number between its two arguments.
+
+    Returns
+    -------
+    float
+
+    """
+    return rand(0, min(cap, base * 2 ** retries))
+
+
+def retry_or_dead_letter(task: Any, exc: Exception) -> Exception:
+    """
+    Retry a bound task that failed with ``exc``, or give up on it.
+
+    Should be called from within the task, and the return value raised.
+
+    Parameters
+    ----------
+    task : :class:`celery.Task`
+        The task that is running; i.e. ``self`` in a bound task.
+    exc : :class:`Exception`
+        The transient error.
+
+    Returns
+    -------
+    :class:`Exception`
+        A :class:`celery.exceptions.Retry` if the task will be retried.
+        Otherwise, ``exc``; if the task was sent by Celery, it is then
+        recorded as a dead letter.
+
+    """
+    request = task.request
+    if request.called_directly:     # E.g. by the local executor.
+        return exc
+    config = get_application_config()
+    max_retries = int(config.get('MUTATION_MAX_RETRIES', 5))
+    if request.retries >= max_retries:
+        logger.error('Task %s failed after %i retries: %s', request.id,
+                     request.retries, exc)
+        try:
+            dead_letter(task.name, request.id, request.args, request.kwargs,
+                        exc, request.retries)
+        except Exception as e:
+            logger.error('Could not record dead letter %s: %s', request.id, e)
+        return exc
+
+    countdown = get_countdown(
+        request.retries,
+        float(config.get('MUTATION_RETRY_BACKOFF', 2)),
+        float(config.get('MUTATION_RETRY_BACKOFF_MAX', 300))
+    )
+    logger.debug('Retrying task %s in %.1f s: %s', request.id, countdown, exc)
+    options: Dict[str, Any] = {}
+    queues = current_app.conf.get('mutation_queues') or {}
+    if 'retry' in queues:
+        options['queue'] = queues['retry']
+    retry: Exception = task.retry(exc=exc, countdown=countdown,
+                                  max_retries=max_retries, throw=False,
+                                  **options)
+    return retry
+
+
+def dead_letter(name: str, task_id: str, args: Any, kwargs: Any,
+                exc: Exception, retries: int = 0,
+                backend: Optional[Any] = None) -> None:
+    """
+    Record a task that has failed for good in the dead-letter list.
+
+    The list holds at most ``DEAD_LETTER_MAX_LENGTH`` entries; the oldest are
+    dropped. Only Redis backends are supported; for other backends, this
+    does nothing.
+
+    Parameters
+    ----------
+    name : str
+        Name of the task.
+    task_id : str
+    args : list
+    kwargs : dict
+    exc : :class:`Exception`
+        The error with which the task failed.
+    retries : int
+        Number of times the task was retried.
+    backend : object
+        Celery result backend. If not provided, uses the backend of the
+        current Celery application.
+
+    """
+    client = _get_client(backend)
+    if client is None:
+        return
+    config = get_application_config()
+    max_length = int(config.get('DEAD_LETTER_MAX_LENGTH', 10000))
+    entry = json.dumps({'task': name, 'task_id': task_id,
+                        'args': list(args or []), 'kwargs': kwargs or {},
+                        'error': str(exc), 'retries': retries,
+                        'failed': datetime.now().isoformat()})
+    pipe = client.pipeline(transaction=False)
+    pipe.lpush(results.DEAD_LETTER_KEY, entry)
+    pipe.ltrim(results.DEAD_LETTER_KEY, 0, max_length - 1)
+    pipe.execute()
+
+
+def get_dead_letters(backend: Optional[Any] = None) -> List[DeadLetter]:
+    """
+    Get the tasks in the dead-letter list, most recent first.
+
+    Returns
+    -------
+    list
+        Each entry has the ``task`` name, ``task_id``, ``args``, ``kwargs``,
+        ``error``, number of ``retries``, and when the task ``failed``.
+
+    """
+    client = _get_client(backend)
+    if client is None:
+        return []
+    return [json.loads(bytes_to_str(raw))
+            for raw in client.lrange(results.DEAD_LETTER_KEY, 0, -1)]
+
+
+def replay(task_ids: Optional[List[str]] = None,
+           backend: Optional[Any] = None) -> List[str]:
+    """
+    Send tasks in the dead-letter list again, and remove them from the list.
+
+    Each task is sent with a new task ID, to the ``retry`` queue. Mutations
+    of a thing are started with :func:`.tasks.start_mutation`, so a replayed
+    mutation is not sent if the same mutation of the thing is in flight; the
+    ID of that mutation is returned instead. If a task cannot be sent, it is
+    put back in the list, and the exception propagates.
+
+    Parameters
+    ----------
+    task_ids : list
+        IDs of the tasks to replay. If not provided, all of them.
+    backend : object
+        Celery result backend. If not provided, uses the backend of the
+        current Celery application.
+
+    Returns
+    -------
+    list
+        The IDs of the tasks that were sent.
+
+    """
+    client = _get_client(backend)
+    if client is None:
+        return []
+    queues = current_app.conf.get('mutation_queues') or {}
+    sent: List[str] = []
+    for raw in client.lrange(results.DEAD_LETTER_KEY, 0, -1):
+        entry = json.loads(bytes_to_str(raw))
+        if task_ids is not None and entry['task_id'] not in task_ids:
+            continue
+        # Only the client that removes the entry sends it again.
+        if not client.lrem(results.DEAD_LETTER_KEY, 1, raw):
+            continue
+        try:
+            task_id = _send_again(entry, queues.get('retry'))
+        except Exception:
+            # Put it back, at the end with the older entries.
+            client.rpush(results.DEAD_LETTER_KEY, raw)
+            raise
+        logger.info('Replayed task %s as %s', entry['task_id'], task_id)
+        sent.append(task_id)
+    return sent
+
+
+def _send_again(entry: DeadLetter, queue: Optional[str]) -> str:
+    from . import tasks     # Which imports this module.
+    name, args = entry['task'], entry['args']
+    if entry['kwargs'] or name not in (tasks.mutate_a_thing.name,
+                                       tasks.run_pipeline.name):
+        result = current_app.send_task(name, args=args,
+                                       kwargs=entry['kwargs'], queue=queue)
+        return str(result.id)
+    # Mutations take the lock on the thing, like any other mutation.
+    steps = args[1] if name == tasks.run_pipeline.name else None
+    task_id, started = tasks.start_mutation(args[0], 'retry', steps)
+    if not started:
+        logger.info('Thing %s is already being mutated', args[0])
+    return task_id
+
+
+def _get_client(backend: Optional[Any]) -> Any:
+    if backend is None:
+        backend = results.get_backend()
+    client = getattr(backend, 'client', None)
+    if client is None:
+        logger.debug('Backend does not support dead letters')
+    return client
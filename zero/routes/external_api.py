@@ -45,6 +45,16 @@ def read_baz(baz_id: int) -> Response:
     return response
 
 
+@blueprint.route('/baz', methods=['GET'])
+def read_bazs() -> Response:
+    """Provide some data about many bazs, given as ``?ids=1,2,3``."""
+    data, status_code, headers = controllers.get_bazs(request.args.get('ids'))
+    response: Response = jsonify(data)
+    response.headers.extend(headers)
+    response.status_code = status_code
+    return response
+
+
 @blueprint.route('/thing/<int:thing_id>', methods=['GET'])
 @scoped(READ_THING)
 def read_thing(thing_id: int) -> Response:
@@ -75,8 +85,30 @@ def create_thing() -> Response:
 @blueprint.route('/thing/<int:thing_id>', methods=['POST'])
 @scoped(WRITE_THING)
 def mutate_thing(thing_id: int) -> Response:
-    """Request that the thing be mutated."""
-    data, status_code, headers = controllers.start_mutating_a_thing(thing_id)
+    """
+    Request that the thing be mutated.
+
+    The ``priority`` query parameter selects the priority class of the
+    mutation; see :const:`zero.tasks.PRIORITIES`. The body may describe a
+    chain of mutation ``steps``; see :mod:`zero.process.pipeline`.
+    """
+    priority = request.args.get('priority')
+    payload = request.get_json(force=True, silent=True)
+    data, status_code, headers = \
+        controllers.start_mutating_a_thing(thing_id, priority, payload)
+    response: Response = jsonify(data)
+    response.headers.extend(headers)
+    response.status_code = status_code
+    return response
+
+
+@blueprint.route('/mutations', methods=['POST'])
+@scoped(WRITE_THING)
+def mutate_things() -> Response:
+    """Request that many things be mutated."""
+    payload = request.get_json(force=True)    # Ignore Content-Type header.
+    data, status_code, headers = \
+        controllers.start_mutating_many_things(payload)
     response: Response = jsonify(data)
     response.headers.extend(headers)
     response.status_code = status_code
@@ -86,8 +118,27 @@ def mutate_thing(thing_id: int) -> Response:
 @blueprint.route('/mutation/<string:task_id>', methods=['GET'])
 @scoped(WRITE_THING)
 def mutation_status(task_id: str) -> Response:
-    """Get the status of the mutation task."""
-    data, status_code, headers = controllers.mutation_status(task_id)
+    """
+    Get the status of the mutation task.
+
+    For a task that mutates many things, the ``thing_id`` query parameter
+    selects the mutation of a single thing.
+    """
+    thing_id = request.args.get('thing_id', type=int)
+    data, status_code, headers = controllers.mutation_status(task_id,
+                                                             thing_id)
+    response: Response = jsonify(data)
+    response.headers.extend(headers)
+    response.status_code = status_code
+    return response
+
+
+@blueprint.route('/mutations/status', methods=['POST'])
+@scoped(WRITE_THING)
+def mutation_statuses() -> Response:
+    """Get the status of many mutation tasks at once."""
+    payload = request.get_json(force=True)    # Ignore Content-Type header.
+    data, status_code, headers = controllers.mutation_statuses(payload)
     response: Response = jsonify(data)
     response.headers.extend(headers)
     response.status_code = status_code
@@ -12,7 +12,8 @@ from flask import Flask
 
 from arxiv.users.helpers import generate_token
 from zero.factory import create_api_app
-from ...services import things
+from ...domain import Baz
+from ...services import baz, things
 from .. import external_api
 from ..external_api import READ_THING, WRITE_THING
 
@@ -49,6 +50,49 @@ class TestExternalAPIRoutes(TestCase):
         except jsonschema.exceptions.SchemaError as e:
             self.fail(e)
 
+    @mock.patch(f'{external_api.__name__}.controllers.get_bazs')
+    def test_get_bazs(self, mock_get_bazs: Any) -> None:
+        """Endpoint /zero/api/baz?ids=... returns JSON about many Bazs."""
+        bazs_data = {'bazs': [{'id': 1, 'mukluk': 1, 'foo': 'bar'}]}
+        mock_get_bazs.return_value = bazs_data, HTTPStatus.OK, {}
+
+        response = self.client.get('/zero/api/baz?ids=1')
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertDictEqual(json.loads(response.data), bazs_data)
+        mock_get_bazs.assert_called_once_with('1')
+
+    @mock.patch('zero.controllers.baz.baz.BazService.current_session')
+    def test_get_bazs_retrieves_each_once(self, mock_session: Any) -> None:
+        """Each baz is retrieved once, and results are in the given order."""
+        def retrieve_baz(baz_id: int) -> Baz:
+            if baz_id == 2:
+                raise baz.NoBaz('nope')
+            if baz_id == 3:
+                raise IOError('nope')
+            return Baz(foo=f'foo{baz_id}', mukluk=baz_id)
+        mock_session.return_value.retrieve_baz.side_effect = retrieve_baz
+
+        response = self.client.get('/zero/api/baz?ids=4,2,3,4')
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(json.loads(response.data), {'bazs': [
+            {'id': 4, 'foo': 'foo4', 'mukluk': 4},
+            {'id': 2, 'error': 'No such baz', 'status': 404},
+            {'id': 3, 'error': 'could not get the baz', 'status': 500},
+            {'id': 4, 'foo': 'foo4', 'mukluk': 4},
+        ]})
+        self.assertEqual(
+            mock_session.return_value.retrieve_baz.call_count, 3
+        )
+
+    def test_get_bazs_bad_ids(self) -> None:
+        """Baz IDs must be given, as integers."""
+        for query in ['', '?ids=', '?ids=1,foo',
+                      '?ids=' + ','.join(['1'] * 101)]:
+            response = self.client.get(f'/zero/api/baz{query}')
+            self.assertEqual(response.status_code, HTTPStatus.BAD_REQUEST)
+
     @mock.patch(f'{external_api.__name__}.controllers.get_thing')
     def test_get_thing(self, mock_get_thing: Any) -> None:
         """Endpoint /zero/api/thing/<int> returns JSON about a Thing."""
@@ -105,3 +149,66 @@ class TestExternalAPIRoutes(TestCase):
 
         self.assertEqual(response.status_code, HTTPStatus.CREATED, "Created")
         self.assertDictEqual(json.loads(response.data), expected_data)
+
+    @mock.patch(f'{external_api.__name__}.controllers.mutation_statuses')
+    def test_mutation_statuses(self, mock_mutation_statuses: Any) -> None:
+        """POST to /zero/api/mutations/status gets the status of many tasks."""
+        return_data = {'tasks': {'foo': {'status': 'in progress'}}}
+        mock_mutation_statuses.return_value = return_data, HTTPStatus.OK, {}
+
+        token = generate_token('1234', 'foo@user.com', 'foouser',
+                               scope=[READ_THING, WRITE_THING])
+        response = self.client.post('/zero/api/mutations/status',
+                                    data=json.dumps({'task_ids': ['foo']}),
+                                    headers={'Authorization': token},
+                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertDictEqual(json.loads(response.data), return_data)
+        self.assertEqual(mock_mutation_statuses.call_args[0][0],
+                         {'task_ids': ['foo']})
+
+    @mock.patch(f'{external_api.__name__}.controllers.mutation_status')
+    def test_mutation_status_of_thing(self, mock_mutation_status: Any) -> None:
+        """The ``thing_id`` parameter selects a thing in a batch mutation."""
+        return_data = {'status': 'complete', 'result': {'thing_id': 3}}
+        headers = {'Location': '/zero/api/thing/3'}
+        mock_mutation_status.return_value = \
+            return_data, HTTPStatus.SEE_OTHER, headers
+
+        token = generate_token('1234', 'foo@user.com', 'foouser',
+                               scope=[READ_THING, WRITE_THING])
+        response = self.client.get('/zero/api/mutation/foo?thing_id=3',
+                                   headers={'Authorization': token})
+
+        self.assertEqual(response.status_code, HTTPStatus.SEE_OTHER)
+        self.assertEqual(mock_mutation_status.call_args[0], ('foo', 3))
+
+    @mock.patch(f'{external_api.__name__}.controllers.start_mutating_a_thing')
+    def test_mutate_thing_with_priority(self, mock_start: Any) -> None:
+        """The ``priority`` parameter selects the priority class."""
+        mock_start.return_value = \
+            {'reason': 'mutation in progress'}, HTTPStatus.ACCEPTED, {}
+
+        token = generate_token('1234', 'foo@user.com', 'foouser',
+                               scope=[READ_THING, WRITE_THING])
+        response = self.client.post('/zero/api/thing/4?priority=bulk',
+                                    headers={'Authorization': token})
+
+        self.assertEqual(response.status_code, HTTPStatus.ACCEPTED)
+        self.assertEqual(mock_start.call_args[0], (4, 'bulk', None))
+
+    @mock.patch(f'{external_api.__name__}.controllers.start_mutating_a_thing')
+    def test_mutate_thing_with_steps(self, mock_start: Any) -> None:
+        """The body may describe a mutation pipeline."""
+        mock_start.return_value = \
+            {'reason': 'mutation in progress'}, HTTPStatus.ACCEPTED, {}
+        payload = {'steps': [{'step': 'add_some_one'}]}
+
+        token = generate_token('1234', 'foo@user.com', 'foouser',
+                               scope=[READ_THING, WRITE_THING])
+        response = self.client.post('/zero/api/thing/4', json=payload,
+                                    headers={'Authorization': token})
+
+        self.assertEqual(response.status_code, HTTPStatus.ACCEPTED)
+        self.assertEqual(mock_start.call_args[0], (4, None, payload))
@@ -8,6 +8,7 @@ from typing import Any, Optional
 from flask import Flask
 
 from arxiv.users.helpers import generate_token
+from zero.domain import Baz, Thing
 from zero.factory import create_web_app
 from .. import ui
 from ..ui import READ_THING
@@ -48,3 +49,45 @@ class TestUIRoutes(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.headers['Content-Type'],
                          'text/html; charset=utf-8')
+
+    # The web app does not register the API blueprint, whose URL is built.
+    @mock.patch('zero.controllers.things.url_for', mock.MagicMock())
+    @mock.patch('zero.controllers.things.baz.BazService.current_session')
+    @mock.patch('zero.controllers.things.things.get_a_thing')
+    def test_get_thing_with_baz(self, mock_get_a_thing: Any,
+                                mock_session: Any) -> None:
+        """Endpoint /thing/<int>?baz_id=<int> also shows a Baz."""
+        mock_get_a_thing.return_value = \
+            Thing(id=4, name='First thing', created=datetime.now())
+        mock_session.return_value.retrieve_baz.return_value = \
+            Baz(foo='fooville', mukluk=12346)
+        token = generate_token('1234', 'foo@user.com', 'foouser',
+                               scope=[READ_THING])
+
+        response = self.client.get('/thing/4?baz_id=2',
+                                   headers={'Authorization': token})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'First thing', response.data)
+        self.assertIn(b'fooville', response.data)
+        mock_session.return_value.retrieve_baz.assert_called_once_with(2)
+
+    # The web app does not register the API blueprint, whose URL is built.
+    @mock.patch('zero.controllers.things.url_for', mock.MagicMock())
+    @mock.patch('zero.controllers.things.baz.BazService.current_session')
+    @mock.patch('zero.controllers.things.things.get_a_thing')
+    def test_get_thing_without_baz(self, mock_get_a_thing: Any,
+                                   mock_session: Any) -> None:
+        """If the Baz cannot be retrieved, the Thing is still shown."""
+        mock_get_a_thing.return_value = \
+            Thing(id=4, name='First thing', created=datetime.now())
+        mock_session.return_value.retrieve_baz.side_effect = IOError('nope')
+        token = generate_token('1234', 'foo@user.com', 'foouser',
+                               scope=[READ_THING])
+
+        response = self.client.get('/thing/4?baz_id=2',
+                                   headers={'Authorization': token})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'First thing', response.data)
+        self.assertIn(b'not available', response.data)
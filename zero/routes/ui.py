@@ -22,9 +22,18 @@ http://github.com/arxiv/arxiv-base/tree/master/arxiv/base/templates/base
 
 See :func:`handle_bad_request`.
 
+Caching
+-------
+Pages are rendered with :func:`.templating.render_cached`, which can serve a
+previously rendered page if the data on the page has not changed. Since the
+page header shows who is logged in, the current user is part of the key.
+
 """
 
-from flask import Blueprint, render_template, url_for, Response, make_response
+from typing import Optional
+
+from flask import Blueprint, render_template, url_for, Response, \
+    make_response, request
 from werkzeug.exceptions import BadRequest, NotFound, Unauthorized, \
     Forbidden, InternalServerError
 from arxiv import status
@@ -33,6 +42,7 @@ from arxiv.users.domain import Scope
 from arxiv.users.auth.decorators import scoped
 
 from .. import controllers
+from ..templating import render_cached
 
 # Normally these would be defined in the ``arxiv.users`` package, so that we
 # can explicitly grant them when an authenticated session is created. These
@@ -49,7 +59,9 @@ def read_baz(baz_id: int) -> Response:
     data, status_code, headers = controllers.get_baz(baz_id)
     if not isinstance(data, dict):
         raise InternalServerError('Unexpected data')
-    resp: Response = make_response(render_template("zero/baz.html", **data))
+    rendered = render_cached(('baz', baz_id, _viewer()), "zero/baz.html",
+                             **data)
+    resp: Response = make_response(rendered)
     resp.headers.extend(headers)
     resp.status_code = status_code
     return resp
@@ -58,16 +70,27 @@ def read_baz(baz_id: int) -> Response:
 @blueprint.route('/thing/<int:thing_id>', methods=['GET'])
 @scoped(READ_THING)
 def read_thing(thing_id: int) -> Response:
-    """Provide some data about the thing."""
-    data, status_code, headers = controllers.get_thing_description(thing_id)
+    """Provide some data about the thing, and a baz if ``?baz_id=`` is set."""
+    baz_id: Optional[int] = request.args.get('baz_id', type=int)
+    data, status_code, headers = \
+        controllers.get_thing_description(thing_id, baz_id)
     if not isinstance(data, dict):
         raise InternalServerError('Unexpected data')
-    resp: Response = make_response(render_template("zero/thing.html", **data))
+    rendered = render_cached(('thing', thing_id, baz_id, _viewer()),
+                             "zero/thing.html", **data)
+    resp: Response = make_response(rendered)
     resp.headers.extend(headers)
     resp.status_code = status_code
     return resp
 
 
+def _viewer() -> Optional[str]:
+    """Get the identifier of the logged-in user, if there is one."""
+    session = request.environ.get('session')
+    user = getattr(session, 'user', None)
+    return getattr(user, 'user_id', None)
+
+
 # Here's where we register custom error handlers for this blueprint. These will
 # catch the indicated Werkzeug exceptions that are raised within the context
 # of this blueprint (i.e. while executing any of the routes above).
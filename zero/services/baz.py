@@ -2,20 +2,114 @@
 import json
 from urllib.parse import urlparse, urljoin
 from urllib3 import Retry
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
 from functools import wraps
+from threading import Lock
 
 import requests
+from flask import Flask
 from werkzeug.local import LocalProxy
 
 from arxiv.base import logging
 from arxiv.integration.api import service
 from arxiv.base.globals import get_application_config, get_application_global
 from zero.domain import Baz
+from zero.cache import StaleWhileRevalidate
+from zero.breaker import CircuitBreaker
 
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
+DEFAULT_CACHE_TTL = 60.
+DEFAULT_CACHE_STALE_TTL = 300.
+DEFAULT_POOL_CONNECTIONS = 1
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 1.
+DEFAULT_READ_TIMEOUT = 5.
+DEFAULT_STATUS_TIMEOUT = 1.
+DEFAULT_STATUS_TTL = 10.
+DEFAULT_BREAKER_THRESHOLD = 5
+DEFAULT_BREAKER_COOLDOWN = 30.
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_RETRY_BACKOFF = 0.1
+RETRY_STATUSES = (502, 503, 504)
+"""Responses from the baz service that are worth retrying."""
+
+PoolParams = Tuple[int, int, int, float]
+
+# This outlives the application instance; see ``wsgi.py``.
+responses: StaleWhileRevalidate[Dict[str, Any]] = StaleWhileRevalidate()
+"""Decoded responses from the baz service, keyed by URL."""
+
+statuses: StaleWhileRevalidate[bool] = StaleWhileRevalidate()
+"""Results of checking the status of the baz service, keyed by URL."""
+
+breaker = CircuitBreaker('baz')
+"""Trips when the baz service keeps failing; see :class:`BazService`."""
+
+# These outlive the application instance, too. Since each request gets a new
+# BazService, the connection pools are shared so that connections are kept
+# alive between requests. Pools never block: requests does not pass a timeout
+# for getting a connection from the pool, so a full pool would block forever.
+_adapters: Dict[PoolParams, requests.adapters.HTTPAdapter] = {}
+_adapters_lock = Lock()
+
+
+def _get_adapter(params: PoolParams) -> requests.adapters.HTTPAdapter:
+    """Get the shared adapter (and its connection pools) for ``params``."""
+    pool_connections, pool_maxsize, max_retries, backoff = params
+    with _adapters_lock:
+        if params not in _adapters:
+            retry = Retry(total=max_retries, connect=max_retries,
+                          read=max_retries, status=max_retries,
+                          backoff_factor=backoff,
+                          status_forcelist=RETRY_STATUSES,
+                          raise_on_status=False)
+            _adapters[params] = requests.adapters.HTTPAdapter(
+                pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                max_retries=retry
+            )
+        return _adapters[params]
+
+
+def get_pool_stats() -> List[Dict[str, Any]]:
+    """
+    Get the state of the connection pools to the baz service.
+
+    Returns
+    -------
+    list
+        A dict for each pool, with the ``host``, the ``maxsize`` of the pool,
+        the number of connections that are ``in_use`` and ``idle``, the
+        ``saturation`` of the pool (the share of ``maxsize`` in use), and the
+        total number of connections ``opened`` and ``requests`` made. If more
+        connections were opened than the pool holds, it is too small.
+
+    """
+    stats = []
+    with _adapters_lock:
+        adapters = list(_adapters.values())
+    for adapter in adapters:
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None or pool.pool is None:
+                continue
+            idle = sum(1 for conn in list(pool.pool.queue) if conn is not None)
+            in_use = max(pool.pool.maxsize - pool.pool.qsize(), 0)
+            stats.append({
+                'host': f'{pool.scheme}://{pool.host}:{pool.port}',
+                'maxsize': pool.pool.maxsize,
+                'in_use': in_use,
+                'idle': idle,
+                'saturation': round(in_use / pool.pool.maxsize, 2),
+                'opened': pool.num_connections,
+                'requests': pool.num_requests
+            })
+    return stats
+
 
 class NoBaz(Exception):
     """An operation on a non-existant :class:`.Baz` was attempted."""
@@ -26,6 +120,22 @@ class BazService(service.HTTPIntegration):
     Preserves state re:baz that must persist throughout the request context.
 
     This could be an HTTP session, database connection, etc.
+
+    Responses are cached for ``BAZ_CACHE_TTL`` seconds, and may then be served
+    stale for up to ``BAZ_CACHE_STALE_TTL`` more seconds while they are
+    refreshed in the background (see :class:`.StaleWhileRevalidate`). Errors
+    are not cached.
+
+    Connections are pooled per process (see :func:`get_pool_stats`), and
+    every request to the baz service has connect and read timeouts. Failed
+    connections and reads, and responses with one of
+    :const:`RETRY_STATUSES`, are retried up to ``BAZ_MAX_RETRIES`` times.
+
+    After ``BAZ_BREAKER_THRESHOLD`` consecutive failures, the circuit
+    :data:`breaker` opens, and calls fail immediately for
+    ``BAZ_BREAKER_COOLDOWN`` seconds (a cached baz may still be served in
+    the meantime). The result of :meth:`status` is cached for
+    ``BAZ_STATUS_TTL`` seconds.
     """
 
     bazcave = 'https://ifconfig.co/json'
@@ -33,6 +143,65 @@ class BazService(service.HTTPIntegration):
     class Meta:
         service_name = 'baz'
 
+    def __init__(self, endpoint: str, verify: bool = True,
+                 headers: dict = {}, **extra: Any) -> None:
+        """
+        Create a new HTTP session.
+
+        Responses are only cached if ``cache_ttl`` (i.e. ``BAZ_CACHE_TTL``)
+        is provided and positive; likewise for ``status_ttl``. The circuit
+        breaker is only used if ``breaker_threshold`` is provided and
+        positive; its threshold and cooldown are set by :meth:`init_app`.
+        The other parameters in ``extra`` are the
+        ``BAZ_*`` configuration parameters that set up the connection pool,
+        timeouts and retries; see :mod:`zero.config`.
+        """
+        super(BazService, self).__init__(endpoint, verify, headers, **extra)
+        pool_connections = int(extra.get('pool_connections',
+                                         DEFAULT_POOL_CONNECTIONS))
+        pool_maxsize = int(extra.get('pool_maxsize', DEFAULT_POOL_MAXSIZE))
+        adapter = _get_adapter((
+            pool_connections, pool_maxsize,
+            int(extra.get('max_retries', DEFAULT_MAX_RETRIES)),
+            float(extra.get('retry_backoff', DEFAULT_RETRY_BACKOFF))
+        ))
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        # Status probes are not retried, so that a probe gives up within
+        # ``status_timeout``; the session is created when it is first needed.
+        self._status_adapter = _get_adapter((pool_connections, pool_maxsize,
+                                             0, 0.))
+        self._status_session: Optional[requests.Session] = None
+        if not extra.get('keep_alive', True):
+            self._session.headers['Connection'] = 'close'
+        self._timeout = (
+            float(extra.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT)),
+            float(extra.get('read_timeout', DEFAULT_READ_TIMEOUT))
+        )
+        self._status_timeout = float(extra.get('status_timeout',
+                                               DEFAULT_STATUS_TIMEOUT))
+        self._cache_ttl = float(extra.get('cache_ttl', 0))
+        self._cache_stale_ttl = float(extra.get('cache_stale_ttl',
+                                                DEFAULT_CACHE_STALE_TTL))
+        self._status_ttl = float(extra.get('status_ttl', 0))
+        self._use_breaker = int(extra.get('breaker_threshold', 0)) > 0
+
+    @classmethod
+    def init_app(cls, app: Flask) -> None:
+        """Set default configuration parameters for an application instance."""
+        super(BazService, cls).init_app(app)
+        app.config.setdefault('BAZ_CACHE_TTL', DEFAULT_CACHE_TTL)
+        app.config.setdefault('BAZ_CACHE_STALE_TTL', DEFAULT_CACHE_STALE_TTL)
+        app.config.setdefault('BAZ_STATUS_TTL', DEFAULT_STATUS_TTL)
+        app.config.setdefault('BAZ_BREAKER_THRESHOLD',
+                              DEFAULT_BREAKER_THRESHOLD)
+        app.config.setdefault('BAZ_BREAKER_COOLDOWN', DEFAULT_BREAKER_COOLDOWN)
+        # The breaker is shared by all instances, so it is configured here.
+        threshold = int(app.config['BAZ_BREAKER_THRESHOLD'])
+        if threshold > 0:
+            breaker.failure_threshold = threshold
+            breaker.cooldown = float(app.config['BAZ_BREAKER_COOLDOWN'])
+
     # def __init__(self, baz_param: str) -> None:
     #     """Create a new HTTP session."""
     #     self.baz_param = baz_param
@@ -42,15 +211,42 @@ class BazService(service.HTTPIntegration):
     #     logger.debug('New BazService with baz_param = %s', baz_param)
 
     def status(self) -> bool:
-        """Check the availability of the Baz service."""
+        """
+        Check the availability of the Baz service.
+
+        If the status is cached, a stale status is returned while it is
+        checked again in the background, so this only waits on the baz
+        service (for at most ``BAZ_STATUS_TIMEOUT`` seconds) when there is no
+        status at all.
+        """
+        if self._status_ttl > 0:
+            return statuses.get(self.bazcave, self._probe_status,
+                                self._status_ttl, self._status_ttl)
+        return self._probe_status()
+
+    def _probe_status(self) -> bool:
         try:
-            response = self._session.head(self.bazcave)
-        except requests.exceptions.RequestException:
-            return False
-        if not response.ok:
+            self._call(self._head)
+        except IOError:     # Includes RequestException and CircuitOpen.
             return False
         return True
 
+    def _head(self) -> None:
+        if self._status_session is None:
+            self._status_session = requests.Session()
+            self._status_session.headers = self._session.headers
+            self._status_session.mount('http://', self._status_adapter)
+            self._status_session.mount('https://', self._status_adapter)
+        response = self._status_session.head(self.bazcave,
+                                             timeout=self._status_timeout)
+        if not response.ok:
+            raise IOError('Baz status is %i' % response.status_code)
+
+    def _call(self, func: Callable[[], T]) -> T:
+        if self._use_breaker:
+            return breaker.call(func)
+        return func()
+
     def retrieve_baz(self, baz_id: int) -> Baz:
         """
         Go get a baz and bring it back.
@@ -74,7 +270,18 @@ class BazService(service.HTTPIntegration):
         """
         logger.debug('Retrieve a baz with id = %i', baz_id)
         # It's sad to say, but all baz are really just the same.
-        response = self._session.get(self.bazcave)
+        if self._cache_ttl > 0:
+            data = responses.get(self.bazcave, self._get_baz_data,
+                                 self._cache_ttl, self._cache_stale_ttl)
+        else:
+            data = self._get_baz_data()
+        return Baz(foo=data['city'], mukluk=data['ip_decimal'])  # type: ignore
+
+    def _get_baz_data(self) -> Dict[str, Any]:
+        return self._call(self._request_baz_data)
+
+    def _request_baz_data(self) -> Dict[str, Any]:
+        response = self._session.get(self.bazcave, timeout=self._timeout)
         if not response.ok:
             logger.debug('Baz responded with status %i', response.status_code)
             if response.status_code == requests.codes['-o-']:
@@ -86,7 +293,7 @@ class BazService(service.HTTPIntegration):
             logger.debug('Baz response could not be decoded')
             raise IOError('Could not read the baz') from e
         logger.debug('Got a baz with foo: %s', data.get('foo'))
-        return Baz(foo=data['city'], mukluk=data['ip_decimal'])  # type: ignore
+        return data
 
 
 # def init_app(app: Optional[LocalProxy] = None) -> None:
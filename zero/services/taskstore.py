@@ -0,0 +1,230 @@
+"""
+Keeps the state of tasks run by the local executor in the database.
+
+See :mod:`zero.executor`. Task state is stored alongside things (see
+:mod:`zero.services.things`), so that no other infrastructure is required.
+Task metadata are returned in the same shape as :func:`zero.results.get_many`
+returns them, i.e. dicts with ``status`` and ``result`` keys.
+"""
+
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional
+
+from sqlalchemy import Column, DateTime, String, Text
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from arxiv.base import logging
+from .things.models import db
+
+logger = logging.getLogger(__name__)
+
+Meta = Dict[str, Any]
+
+FINISHED = ('SUCCESS', 'FAILURE')
+"""Task states after which a task will not change state again."""
+
+
+class DBTask(db.Model):    # type: ignore
+    """Model for tasks run by the local executor."""
+
+    __tablename__ = 'local_tasks'
+
+    task_id = Column(String(36), primary_key=True)
+    """The unique identifier for a task."""
+
+    name = Column(String(255))
+    """The name of the task function."""
+
+    key = Column(String(255), index=True)
+    """Identifies tasks that should not run concurrently; may be null."""
+
+    lock = Column(String(255), unique=True)
+    """
+    Equal to ``key`` until the task finishes or is abandoned, else null.
+
+    Since null values do not collide, this allows no more than one
+    unfinished task per key, in any database.
+    """
+
+    status = Column(String(16))
+    """A Celery task state, e.g. ``SENT`` or ``SUCCESS``."""
+
+    result = Column(Text)
+    """The JSON-encoded result of the task, if it has finished."""
+
+    created = Column(DateTime)
+    """The datetime when the task was sent."""
+
+    updated = Column(DateTime)
+    """The datetime when the status of the task last changed."""
+
+
+def create_task(task_id: str, name: str, key: Optional[str] = None,
+                max_age: Optional[float] = None) -> Optional[str]:
+    """
+    Record that a task has been sent, unless another task has the same key.
+
+    Parameters
+    ----------
+    task_id : str
+    name : str
+        Name of the task function.
+    key : str
+        If provided, can be used to find the task with :func:`find_unfinished`,
+        and no other unfinished task may have the same key.
+    max_age : float
+        Number of seconds after its last update that an unfinished task is
+        considered to be abandoned, and no longer holds its key.
+
+    Returns
+    -------
+    str or None
+        The ID of an unfinished task with ``key``, if there is one; in that
+        case, the task was not recorded.
+
+    Raises
+    ------
+    IOError
+        When there is a problem querying the database.
+
+    """
+    while True:
+        now = datetime.now()
+        db.session.add(DBTask(task_id=task_id, name=name, key=key, lock=key,
+                              status='SENT', created=now, updated=now))
+        try:
+            _commit()
+            return None
+        except IntegrityError:
+            db.session.rollback()
+            if key is None:
+                raise
+        holder = find_unfinished(key, max_age)
+        if holder is not None:
+            return holder
+        if max_age is not None:
+            # The holder is abandoned, unless another request freed the key
+            # and took it in the meantime.
+            _release_abandoned(key, max_age)
+
+
+def update_task(task_id: str, status: str, result: Any = None) -> None:
+    """
+    Update the status, and possibly the result, of a task.
+
+    Parameters
+    ----------
+    task_id : str
+    status : str
+        A Celery task state.
+    result : object
+        Must be JSON-serializable.
+
+    Raises
+    ------
+    IOError
+        When there is a problem querying the database.
+
+    """
+    values = {'status': status, 'result': json.dumps(result),
+              'updated': datetime.now()}
+    if status in FINISHED:
+        values['lock'] = None
+    try:
+        db.session.query(DBTask) \
+            .filter(DBTask.task_id == task_id) \
+            .update(values, synchronize_session=False)
+    except OperationalError as e:
+        db.session.rollback()
+        raise IOError('Could not query database: %s' % e.detail) from e
+    _commit()
+
+
+def get_many_tasks(task_ids: Iterable[str]) -> Dict[str, Meta]:
+    """
+    Get metadata for many tasks with a single query.
+
+    Parameters
+    ----------
+    task_ids : iterable
+
+    Returns
+    -------
+    dict
+        Maps task IDs onto task metadata. Unknown tasks are omitted.
+
+    Raises
+    ------
+    IOError
+        When there is a problem querying the database.
+
+    """
+    task_ids = list(task_ids)
+    try:
+        rows = db.session.query(DBTask) \
+            .filter(DBTask.task_id.in_(task_ids)) \
+            .all()
+    except OperationalError as e:
+        raise IOError('Could not query database: %s' % e.detail) from e
+    return {row.task_id: {'status': row.status,
+                          'result': json.loads(row.result)
+                          if row.result is not None else None}
+            for row in rows}
+
+
+def find_unfinished(key: str, max_age: Optional[float] = None) \
+        -> Optional[str]:
+    """
+    Find a task with ``key`` that has not yet finished.
+
+    Parameters
+    ----------
+    key : str
+    max_age : float
+        If provided, tasks that have not been updated for this many seconds
+        are ignored.
+
+    Returns
+    -------
+    str or None
+        The ID of the task, if there is one.
+
+    Raises
+    ------
+    IOError
+        When there is a problem querying the database.
+
+    """
+    query = db.session.query(DBTask.task_id).filter(DBTask.lock == key)
+    if max_age is not None:
+        query = query.filter(DBTask.updated >= _get_cutoff(max_age))
+    try:
+        row = query.first()
+    except OperationalError as e:
+        raise IOError('Could not query database: %s' % e.detail) from e
+    return row.task_id if row is not None else None
+
+
+def _release_abandoned(key: str, max_age: float) -> None:
+    try:
+        db.session.query(DBTask) \
+            .filter(DBTask.lock == key) \
+            .filter(DBTask.updated < _get_cutoff(max_age)) \
+            .update({'lock': None}, synchronize_session=False)
+    except OperationalError as e:
+        db.session.rollback()
+        raise IOError('Could not query database: %s' % e.detail) from e
+    _commit()
+
+
+def _get_cutoff(max_age: float) -> datetime:
+    return datetime.now() - timedelta(seconds=max_age)
+
+
+def _commit() -> None:
+    try:
+        db.session.commit()
+    except OperationalError as e:
+        db.session.rollback()
+        raise IOError('Could not query database: %s' % e.detail) from e
@@ -4,6 +4,7 @@ from unittest import mock, TestCase
 from functools import partial
 import json
 import requests
+from flask import Flask
 from zero.services import baz
 from zero.domain import Baz
 
@@ -116,3 +117,158 @@ class TestBazServiceRetrieve(TestCase):
         bazSession = baz.BazService('foo')
         with self.assertRaises(IOError):
             bazSession.retrieve_baz(4)
+
+
+class TestRetrieveBazCached(TestCase):
+    """Responses from the baz service can be cached."""
+
+    def setUp(self) -> None:
+        """Start with an empty cache."""
+        baz.responses.clear()
+        self.addCleanup(baz.responses.clear)
+
+    @mock.patch('zero.services.baz.requests.Session')
+    def test_cached(self, mock_session: Any) -> None:
+        """The baz service is called once while the response is fresh."""
+        mock_json = mock.MagicMock(return_value={
+            'city': 'fooville',
+            'ip_decimal': 12346
+        })
+        mock_get_response = mock.MagicMock(status_code=200, ok=True,
+                                           json=mock_json)
+        mock_session.return_value.get.return_value = mock_get_response
+
+        bazSession = baz.BazService('foo', cache_ttl=60)
+        self.assertEqual(bazSession.retrieve_baz(4).foo, 'fooville')
+        self.assertEqual(bazSession.retrieve_baz(5).mukluk, 12346)
+        self.assertEqual(mock_session.return_value.get.call_count, 1)
+
+    @mock.patch('zero.services.baz.requests.Session')
+    def test_errors_not_cached(self, mock_session: Any) -> None:
+        """If the baz service fails, the next call tries again."""
+        mock_get_response = mock.MagicMock(status_code=500, ok=False)
+        mock_session.return_value.get.return_value = mock_get_response
+
+        bazSession = baz.BazService('foo', cache_ttl=60)
+        for _ in range(2):
+            with self.assertRaises(IOError):
+                bazSession.retrieve_baz(4)
+        self.assertEqual(mock_session.return_value.get.call_count, 2)
+
+
+class TestBazConnections(TestCase):
+    """Connections to the baz service are pooled, and time out."""
+
+    @mock.patch('zero.services.baz.requests.Session')
+    def test_timeouts(self, mock_session: Any) -> None:
+        """Requests to the baz service have timeouts."""
+        mock_session.return_value.get.return_value = \
+            mock.MagicMock(status_code=500, ok=False)
+        bazSession = baz.BazService('foo', connect_timeout=2,
+                                    read_timeout=3, status_timeout=4)
+        with self.assertRaises(IOError):
+            bazSession.retrieve_baz(4)
+        self.assertEqual(mock_session.return_value.get.call_args[1],
+                         {'timeout': (2., 3.)})
+        bazSession.status()
+        self.assertEqual(mock_session.return_value.head.call_args[1],
+                         {'timeout': 4.})
+
+    def test_shared_pool(self) -> None:
+        """Sessions with the same configuration share connection pools."""
+        one = baz.BazService('foo', pool_maxsize=3, max_retries=1)
+        two = baz.BazService('foo', pool_maxsize=3, max_retries=1)
+        three = baz.BazService('foo', pool_maxsize=4, max_retries=1)
+        adapter = one._session.get_adapter('https://foo')
+        self.assertIs(two._session.get_adapter('https://foo'), adapter)
+        self.assertIsNot(three._session.get_adapter('https://foo'), adapter)
+        self.assertEqual(adapter.max_retries.total, 1)
+
+    @mock.patch.object(requests.Session, 'head')
+    def test_status_not_retried(self, mock_head: Any) -> None:
+        """Status probes do not retry, whatever ``max_retries`` is."""
+        mock_head.return_value = mock.MagicMock(status_code=200, ok=True)
+        bazSession = baz.BazService('foo', max_retries=2)
+        self.assertTrue(bazSession.status())
+        adapter = bazSession._status_session.get_adapter(bazSession.bazcave)
+        self.assertEqual(adapter.max_retries.total, 0)
+        self.assertEqual(
+            bazSession._session.get_adapter(bazSession.bazcave)
+            .max_retries.total, 2
+        )
+
+    def test_pool_stats(self) -> None:
+        """The state of connection pools can be inspected."""
+        bazSession = baz.BazService('foo', pool_maxsize=2, max_retries=0)
+        adapter = bazSession._session.get_adapter('http://baz.test')
+        pool = adapter.poolmanager.connection_from_url('http://baz.test:81')
+        connection = pool._get_conn()
+        stats = [pool_stats for pool_stats in baz.get_pool_stats()
+                 if pool_stats['host'] == 'http://baz.test:81']
+        self.assertEqual(stats, [{'host': 'http://baz.test:81',
+                                  'maxsize': 2, 'in_use': 1, 'idle': 0,
+                                  'saturation': 0.5, 'opened': 1,
+                                  'requests': 0}])
+        pool._put_conn(connection)
+        stats = [pool_stats for pool_stats in baz.get_pool_stats()
+                 if pool_stats['host'] == 'http://baz.test:81']
+        self.assertEqual(stats[0]['in_use'], 0)
+        self.assertEqual(stats[0]['idle'], 1)
+
+
+class TestBazCircuitBreaker(TestCase):
+    """Calls to the baz service fail fast once it has failed repeatedly."""
+
+    def setUp(self) -> None:
+        """Start with a closed breaker, and no cached status."""
+        for cleanup in (baz.breaker.reset, baz.statuses.clear):
+            cleanup()
+            self.addCleanup(cleanup)
+        self.addCleanup(setattr, baz.breaker, 'failure_threshold',
+                        baz.breaker.failure_threshold)
+
+    @mock.patch('zero.services.baz.requests.Session')
+    def test_fails_fast(self, mock_session: Any) -> None:
+        """Once the breaker opens, the baz service is not called."""
+        mock_get = mock_session.return_value.get
+        mock_get.return_value = mock.MagicMock(status_code=503, ok=False)
+        baz.breaker.failure_threshold = 2
+        bazSession = baz.BazService('foo', breaker_threshold=2)
+        for _ in range(3):
+            with self.assertRaises(IOError):
+                bazSession.retrieve_baz(4)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertFalse(bazSession.status())
+        self.assertEqual(mock_session.return_value.head.call_count, 0)
+
+    def test_configured_by_init_app(self) -> None:
+        """The shared breaker is configured when the app is set up."""
+        self.addCleanup(setattr, baz.breaker, 'cooldown',
+                        baz.breaker.cooldown)
+        app = Flask('test')
+        app.config.update(BAZ_BREAKER_THRESHOLD=3, BAZ_BREAKER_COOLDOWN=7)
+        baz.BazService.init_app(app)
+        self.assertEqual(baz.breaker.failure_threshold, 3)
+        self.assertEqual(baz.breaker.cooldown, 7.)
+
+    @mock.patch('zero.services.baz.requests.Session')
+    def test_no_baz_is_not_a_failure(self, mock_session: Any) -> None:
+        """If there is no baz, the baz service is still up."""
+        mock_get = mock_session.return_value.get
+        mock_get.return_value = mock.MagicMock(status_code=404, ok=False)
+        baz.breaker.failure_threshold = 1
+        bazSession = baz.BazService('foo', breaker_threshold=1)
+        for _ in range(2):
+            with self.assertRaises(baz.NoBaz):
+                bazSession.retrieve_baz(4)
+        self.assertEqual(baz.breaker.state, 'closed')
+
+    @mock.patch('zero.services.baz.requests.Session')
+    def test_status_cached(self, mock_session: Any) -> None:
+        """The status of the baz service is cached."""
+        mock_head = mock_session.return_value.head
+        mock_head.return_value = mock.MagicMock(status_code=200, ok=True)
+        bazSession = baz.BazService('foo', status_ttl=60)
+        self.assertTrue(bazSession.status())
+        self.assertTrue(bazSession.status())
+        self.assertEqual(mock_head.call_count, 1)
@@ -0,0 +1,65 @@
+"""Tests for :mod:`zero.services.taskstore`."""
+
+from datetime import datetime, timedelta
+from unittest import TestCase, mock
+
+from zero.services import taskstore, things
+
+
+class TestTaskStore(TestCase):
+    """The state of local tasks is kept in the database."""
+
+    def setUp(self) -> None:
+        """Initialize an in-memory SQLite database."""
+        app = mock.MagicMock(
+            config={
+                'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                'SQLALCHEMY_TRACK_MODIFICATIONS': False
+            }, extensions={}, root_path=''
+        )
+        things.db.init_app(app)
+        things.db.app = app
+        things.db.create_all()
+
+    def tearDown(self) -> None:
+        """Clear the database and tear down all tables."""
+        things.db.session.remove()
+        things.db.drop_all()
+
+    def test_lifecycle(self) -> None:
+        """A task is created, updated, and retrieved."""
+        taskstore.create_task('foo', 'zero.tasks.mutate_a_thing', 'thing-1')
+        self.assertEqual(taskstore.get_many_tasks(['foo', 'bar']),
+                         {'foo': {'status': 'SENT', 'result': None}})
+        self.assertEqual(taskstore.find_unfinished('thing-1'), 'foo')
+
+        taskstore.update_task('foo', 'SUCCESS', {'thing_id': 1, 'result': 5})
+        self.assertEqual(taskstore.get_many_tasks(['foo'])['foo'],
+                         {'status': 'SUCCESS',
+                          'result': {'thing_id': 1, 'result': 5}})
+        self.assertIsNone(taskstore.find_unfinished('thing-1'))
+
+    def test_one_unfinished_task_per_key(self) -> None:
+        """A task is not recorded while another with its key is unfinished."""
+        self.assertIsNone(taskstore.create_task('foo', 'mutate', 'thing-1'))
+        self.assertEqual(taskstore.create_task('bar', 'mutate', 'thing-1'),
+                         'foo')
+        self.assertEqual(taskstore.get_many_tasks(['bar']), {})
+
+        taskstore.update_task('foo', 'FAILURE', 'No such thing!')
+        self.assertIsNone(taskstore.create_task('bar', 'mutate', 'thing-1'))
+        self.assertEqual(taskstore.find_unfinished('thing-1'), 'bar')
+
+    def test_abandoned_task(self) -> None:
+        """A task that has not been updated for too long loses its key."""
+        taskstore.create_task('foo', 'mutate', 'thing-1')
+        an_hour_ago = datetime.now() - timedelta(hours=1)
+        things.db.session.query(taskstore.DBTask) \
+            .update({'updated': an_hour_ago})
+        things.db.session.commit()
+        self.assertEqual(taskstore.find_unfinished('thing-1'), 'foo')
+        self.assertIsNone(taskstore.find_unfinished('thing-1', 60))
+
+        self.assertIsNone(taskstore.create_task('bar', 'mutate', 'thing-1',
+                                                max_age=60))
+        self.assertEqual(taskstore.find_unfinished('thing-1'), 'bar')
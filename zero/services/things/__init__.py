@@ -1,17 +1,23 @@
 """Provides access to the Things data store."""
 
-from typing import Any, Dict, Optional, Generator
+import time
+from typing import Any, Dict, Optional, Generator, Iterable
 from contextlib import contextmanager
+from dataclasses import replace
 
 from flask import Flask
 from sqlalchemy.exc import OperationalError
 
 from arxiv.base import logging
 from ...domain import Thing
+from ...concurrency import SingleFlight
 from .models import db, DBThing
 
 logger = logging.getLogger(__name__)
 
+_reads: SingleFlight[Thing] = SingleFlight()
+"""Coalesces concurrent reads of the same thing; see :func:`get_a_thing`."""
+
 
 class NoSuchThing(Exception):
     """An operation was attempted on a non-existant thing."""
@@ -58,10 +64,37 @@ def create_all() -> None:
     db.create_all()
 
 
+def ping() -> float:
+    """
+    Measure the time it takes the database to respond to a trivial query.
+
+    Returns
+    -------
+    float
+        Latency in seconds.
+
+    Raises
+    ------
+    IOError
+        When there is a problem querying the database.
+
+    """
+    start = time.monotonic()
+    try:
+        db.session.execute('SELECT 1')
+    except OperationalError as e:
+        raise IOError('Could not query database: %s' % e.detail) from e
+    return time.monotonic() - start
+
+
 def get_a_thing(thing_id: int) -> Thing:
     """
     Get data about a thing.
 
+    If several threads ask for the same thing at the same time, only one of
+    them queries the database; the others wait for and share its result (or
+    its exception). Each caller gets its own copy of the :class:`.Thing`.
+
     Parameters
     ----------
     thing_id : int
@@ -80,6 +113,10 @@ def get_a_thing(thing_id: int) -> Thing:
         When there is no such thing.
 
     """
+    return replace(_reads.do(thing_id, _get_a_thing, thing_id))
+
+
+def _get_a_thing(thing_id: int) -> Thing:
     logger.debug('Get a thing: %s', thing_id)
     try:
         thing_data = db.session.query(DBThing).get(thing_id)
@@ -88,9 +125,47 @@ def get_a_thing(thing_id: int) -> Thing:
         raise IOError('Could not query database: %s' % e.detail) from e
     if thing_data is None:
         raise NoSuchThing(f'There is no {thing_id}')
-    return Thing(id=thing_data.id,
-                 name=thing_data.name,
-                 created=thing_data.created)
+    return _to_thing(thing_data)
+
+
+def get_many_things(thing_ids: Iterable[int]) -> Dict[int, Thing]:
+    """
+    Get data about many things with a single query.
+
+    Parameters
+    ----------
+    thing_ids : iterable
+        Unique identifiers for the things.
+
+    Returns
+    -------
+    dict
+        Maps thing ids onto :class:`.Thing` instances. Ids for which there
+        is no thing are omitted.
+
+    Raises
+    ------
+    IOError
+        When there is a problem querying the database.
+
+    """
+    thing_ids = list(thing_ids)
+    logger.debug('Get %i things', len(thing_ids))
+    try:
+        rows = db.session.query(DBThing) \
+            .filter(DBThing.id.in_(thing_ids)) \
+            .all()
+    except OperationalError as e:
+        logger.debug('Encountered OperationalError: %s', e)
+        raise IOError('Could not query database: %s' % e.detail) from e
+    return {row.id: _to_thing(row) for row in rows}
+
+
+def _to_thing(row: DBThing) -> Thing:
+    a_thing = Thing(id=row.id, name=row.name, created=row.created)
+    # Names written before the ``ones`` column was added end with their ones.
+    a_thing.ones += row.ones or 0
+    return a_thing
 
 
 def store_a_thing(the_thing: Thing) -> Thing:
@@ -108,7 +183,8 @@ def store_a_thing(the_thing: Thing) -> Thing:
     RuntimeError
         When there is some other problem.
     """
-    thing_data = DBThing(name=the_thing.name, created=the_thing.created)
+    thing_data = DBThing(name=the_thing.base_name, ones=the_thing.ones,
+                         created=the_thing.created)
     try:
         db.session.add(thing_data)
         db.session.commit()
@@ -141,10 +217,53 @@ def update_a_thing(the_thing: Thing) -> None:
         raise IOError('Could not query database: %s' % e.detail) from e
     if thing_data is None:
         raise RuntimeError('Cannot find the thing!')
-    thing_data.name = the_thing.name
+    thing_data.name = the_thing.base_name
+    thing_data.ones = the_thing.ones
     db.session.add(thing_data)
     try:
         db.session.commit()
+    except OperationalError as e:
+        db.session.rollback()
+        raise IOError('Could not query database: %s' % e.detail) from e
+    except Exception as e:
+        db.session.rollback()
+        raise RuntimeError('Ack! %s' % e) from e
+
+
+def update_many_things(the_things: Iterable[Thing]) -> None:
+    """
+    Update the database with the latest data for many things at once.
+
+    All of the updates are written in a single transaction; if any of them
+    fails, none of them are applied.
+
+    Parameters
+    ----------
+    the_things : iterable
+        :class:`.Thing` instances to update.
+
+    Raises
+    ------
+    IOError
+        When there is a problem querying the database.
+    RuntimeError
+        When there is some other problem.
+
+    """
+    mappings = []
+    for the_thing in the_things:
+        if not the_thing.id:
+            raise RuntimeError('The thing has no id!')
+        mappings.append({'id': the_thing.id, 'name': the_thing.base_name,
+                         'ones': the_thing.ones})
+    if not mappings:
+        return
+    try:
+        db.session.bulk_update_mappings(DBThing, mappings)
+        db.session.commit()
+    except OperationalError as e:
+        db.session.rollback()
+        raise IOError('Could not query database: %s' % e.detail) from e
     except Exception as e:
         db.session.rollback()
         raise RuntimeError('Ack! %s' % e) from e
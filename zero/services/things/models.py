@@ -15,7 +15,15 @@ class DBThing(db.Model):
     """The unique identifier for a thing."""
 
     name = Column(String(255))
-    """The name of the thing."""
+    """
+    The base name of the thing, without the ones at the end.
+
+    See :class:`.Thing`. Names written before :attr:`ones` was added may
+    still end with ones; they are counted when the thing is read.
+    """
+
+    ones = Column(Integer, nullable=False, default=0, server_default='0')
+    """The number of ones at the end of the name of the thing."""
 
     created = Column(DateTime)
     """The datetime when the thing was created."""
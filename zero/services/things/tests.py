@@ -1,12 +1,14 @@
 """Tests for :mod:`zero.services.things`."""
 
+import threading
+import time
 from unittest import TestCase, mock
 from datetime import datetime
 from zero.services import things
 import sqlalchemy
 from zero.domain import Thing
 
-from typing import Any
+from typing import Any, List
 
 
 class TestThingGetter(TestCase):
@@ -60,6 +62,37 @@ class TestThingGetter(TestCase):
             self.things.get_a_thing(1)  # type: ignore
 
 
+class TestPing(TestCase):
+    """:func:`.ping` measures database latency."""
+
+    def setUp(self) -> None:
+        """Initialize an in-memory SQLite database."""
+        app = mock.MagicMock(
+            config={
+                'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                'SQLALCHEMY_TRACK_MODIFICATIONS': False
+            }, extensions={}, root_path=''
+        )
+        things.db.init_app(app)
+        things.db.app = app
+
+    def tearDown(self) -> None:
+        """Clear the database session."""
+        things.db.session.remove()
+
+    def test_ping(self) -> None:
+        """Returns the time taken to run a trivial query."""
+        self.assertGreaterEqual(things.ping(), 0.)
+
+    @mock.patch('zero.services.things.db.session.execute')
+    def test_ping_when_db_is_unavailable(self, mock_execute: Any) -> None:
+        """When the database squawks, raises an IOError."""
+        mock_execute.side_effect = \
+            sqlalchemy.exc.OperationalError('statement', {}, None)
+        with self.assertRaises(IOError):
+            things.ping()
+
+
 class TestThingCreator(TestCase):
     """:func:`.store_a_thing` creates a new record in the database."""
 
@@ -145,6 +178,29 @@ class TestThingUpdater(TestCase):
 
         self.assertEqual(dbthing.name, the_thing.name)
 
+    def test_update_ones(self) -> None:
+        """The ones at the end of the name are stored as a count."""
+        the_thing = self.things.get_a_thing(self.dbthing.id)  # type: ignore
+        the_thing.ones += 300
+        self.things.update_a_thing(the_thing)   # type: ignore
+
+        session = self.things.db.session
+        query = session.query(self.things.DBThing)  # type: ignore
+        dbthing = query.get(self.dbthing.id)    # type: ignore
+        self.assertEqual(dbthing.name, 'The first thing')
+        self.assertEqual(dbthing.ones, 300)
+        self.assertEqual(self.things.get_a_thing(1).name,   # type: ignore
+                         'The first thing' + '1' * 300)
+
+    def test_legacy_name(self) -> None:
+        """A name that was stored with its ones is read correctly."""
+        self.dbthing.name = 'The first thing111'
+        self.dbthing.ones = 2
+        self.things.db.session.commit()     # type: ignore
+        the_thing = self.things.get_a_thing(1)  # type: ignore
+        self.assertEqual(the_thing.base_name, 'The first thing')
+        self.assertEqual(the_thing.ones, 5)
+
     @mock.patch('zero.services.things.db.session.query')
     def test_operationalerror_is_handled(self, mock_query: Any) -> None:
         """When the db raises an OperationalError, an IOError is raised."""
@@ -157,6 +213,15 @@ class TestThingUpdater(TestCase):
         with self.assertRaises(IOError):
             self.things.update_a_thing(the_thing)   # type: ignore
 
+    @mock.patch('zero.services.things.db.session.commit')
+    def test_commit_operationalerror(self, mock_commit: Any) -> None:
+        """If the update can't be committed, an IOError is raised."""
+        the_thing = Thing(id=self.dbthing.id, name='Whoops')
+        mock_commit.side_effect = \
+            sqlalchemy.exc.OperationalError('statement', {}, None)
+        with self.assertRaises(IOError):
+            self.things.update_a_thing(the_thing)   # type: ignore
+
     def test_thing_really_does_not_exist(self) -> None:
         """If the :class:`.Thing` doesn't exist, a RuntimeError is raised."""
         the_thing = Thing(
@@ -179,3 +244,126 @@ class TestThingUpdater(TestCase):
         )
         with self.assertRaises(RuntimeError):
             self.things.update_a_thing(the_thing)   # type: ignore
+
+
+class TestManyThings(TestCase):
+    """:func:`.get_many_things` and :func:`.update_many_things` batch work."""
+
+    def setUp(self) -> None:
+        """Initialize an in-memory SQLite database with a few things."""
+        app = mock.MagicMock(
+            config={
+                'SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+                'SQLALCHEMY_TRACK_MODIFICATIONS': False
+            }, extensions={}, root_path=''
+        )
+        things.db.init_app(app)
+        things.db.app = app
+        things.db.create_all()
+        for i in range(3):
+            things.db.session.add(    # type: ignore
+                things.DBThing(name=f'Thing {i}', created=datetime.now())
+            )
+        things.db.session.commit()     # type: ignore
+
+    def tearDown(self) -> None:
+        """Clear the database and tear down all tables."""
+        things.db.session.remove()
+        things.db.drop_all()
+
+    def test_get_many_things(self) -> None:
+        """Things that exist are returned; others are omitted."""
+        the_things = things.get_many_things([1, 3, 99])
+        self.assertEqual(set(the_things.keys()), {1, 3})
+        self.assertEqual(the_things[3].name, 'Thing 2')
+
+    @mock.patch('zero.services.things.db.session.query')
+    def test_get_many_when_db_is_unavailable(self, mock_query: Any) -> None:
+        """When the database squawks, raises an IOError."""
+        def raise_op_error(*args: str, **kwargs: str) -> None:
+            raise sqlalchemy.exc.OperationalError('statement', {}, None)
+        mock_query.side_effect = raise_op_error
+        with self.assertRaises(IOError):
+            things.get_many_things([1, 2])
+
+    def test_update_many_things(self) -> None:
+        """All of the things are updated."""
+        the_things = things.get_many_things([1, 2])
+        for the_thing in the_things.values():
+            the_thing.name += '1'
+        things.update_many_things(the_things.values())
+
+        things.db.session.expire_all()     # type: ignore
+        updated = things.get_many_things([1, 2, 3])
+        self.assertEqual(updated[1].name, 'Thing 01')
+        self.assertEqual(updated[2].name, 'Thing 11')
+        self.assertEqual(updated[3].name, 'Thing 2')
+
+    def test_update_thing_without_id(self) -> None:
+        """If a :class:`.Thing` has no id, a RuntimeError is raised."""
+        with self.assertRaises(RuntimeError):
+            things.update_many_things([Thing(name='Whoops')])
+
+
+class TestConcurrentThingGetter(TestCase):
+    """Concurrent calls to :func:`.get_a_thing` are coalesced."""
+
+    @mock.patch('zero.services.things._get_a_thing')
+    def test_one_query_for_many_readers(self, mock_get: Any) -> None:
+        """Only one call reaches the database; all callers get the thing."""
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_get(thing_id: int) -> Thing:
+            started.set()
+            release.wait()
+            return Thing(id=thing_id, name='The thing')
+        mock_get.side_effect = slow_get
+
+        results: List[Thing] = []
+
+        def read() -> None:
+            results.append(things.get_a_thing(1))
+
+        readers = [threading.Thread(target=read) for _ in range(5)]
+        readers[0].start()
+        started.wait()
+        for reader in readers[1:]:
+            reader.start()
+        time.sleep(0.1)     # Give the other readers a chance to pile up.
+        release.set()
+        for reader in readers:
+            reader.join()
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all(r.name == 'The thing' for r in results))
+        self.assertEqual(len({id(r) for r in results}), 5,
+                         'Each caller gets its own copy')
+
+    @mock.patch('zero.services.things._get_a_thing')
+    def test_errors_propagate(self, mock_get: Any) -> None:
+        """An exception is raised for every waiting caller."""
+        release = threading.Event()
+
+        def slow_get(thing_id: int) -> Thing:
+            release.wait()
+            raise IOError('nope')
+        mock_get.side_effect = slow_get
+
+        errors: List[Exception] = []
+
+        def read() -> None:
+            try:
+                things.get_a_thing(1)
+            except IOError as e:
+                errors.append(e)
+
+        readers = [threading.Thread(target=read) for _ in range(3)]
+        for reader in readers:
+            reader.start()
+        time.sleep(0.1)     # Give the readers a chance to pile up.
+        release.set()
+        for reader in readers:
+            reader.join()
+        self.assertEqual(len(errors), 3)
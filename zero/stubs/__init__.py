@@ -0,0 +1,7 @@
+"""
+Stand-ins for upstream services, for tests and benchmarks.
+
+Stubs run in this process, need no network access, and behave the same way
+from run to run, so that performance work on our integrations can be measured
+repeatably.
+"""
@@ -0,0 +1,282 @@
+"""
+A stub of the baz service (i.e. :attr:`.BazService.bazcave`).
+
+:class:`BazStub` serves bazs from fixtures over HTTP on the loopback
+interface, and can be made slow or unreliable in ways that the real baz
+service sometimes is. For example:
+
+.. code-block:: python
+
+   with BazStub(latency=lognormal(0.05, 0.5), error_rate=0.01,
+                seed=1) as stub:
+       service = BazService('foo', max_retries=0)
+       service.bazcave = stub.url
+       service.retrieve_baz(1)
+
+
+Fixtures follow ``schema/baz.json`` (see :func:`load_fixtures`), and are
+served in the format of the upstream service. Latency is drawn from a
+distribution (see :func:`fixed`, :func:`uniform`, :func:`lognormal`), or
+replayed from latencies recorded from the real service (see :func:`replay`
+and :func:`record_latencies`). With ``slow_loris``, the body of each response
+is sent one byte at a time, to exercise read timeouts.
+
+Everything is seeded, so a stub with the same ``seed`` draws the same
+sequence of latencies, errors and fixtures.
+"""
+
+import json
+import math
+import os
+import random
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from itertools import cycle
+from socketserver import ThreadingMixIn
+from threading import Lock, Thread
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+import requests
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'fixtures')
+FIXTURES = os.path.join(FIXTURES_DIR, 'bazs.json')
+"""Bazs, per ``schema/baz.json``."""
+
+LATENCIES = os.path.join(FIXTURES_DIR, 'baz_latencies.json')
+"""
+Latencies to replay by default, in seconds.
+
+These are a sample with a long tail; record the latencies of the real service
+with :func:`record_latencies` (or ``baz_stub.py record``) to replace them.
+"""
+
+Latency = Callable[[random.Random], float]
+"""Draws the number of seconds to wait before responding."""
+
+
+def fixed(seconds: float) -> Latency:
+    """Always wait ``seconds``."""
+    return lambda rng: seconds
+
+
+def uniform(low: float, high: float) -> Latency:
+    """Wait between ``low`` and ``high`` seconds."""
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median: float, sigma: float) -> Latency:
+    """Wait a log-normally distributed time, i.e. with a long tail."""
+    if median <= 0:
+        return fixed(0.)
+    mu = math.log(median)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+def replay(samples: Sequence[float]) -> Latency:
+    """Wait for each of the recorded ``samples`` in turn, over and over."""
+    if not samples:
+        raise ValueError('no latencies to replay')
+    samples_cycle = cycle(samples)
+    return lambda rng: next(samples_cycle)
+
+
+def parse_latency(spec: str) -> Latency:
+    """
+    Get a latency distribution from a spec, e.g. from the command line.
+
+    Parameters
+    ----------
+    spec : str
+        One of ``fixed:SECONDS``, ``uniform:LOW,HIGH``,
+        ``lognormal:MEDIAN,SIGMA`` or ``replay[:PATH]``; ``PATH`` is a JSON
+        list of seconds and defaults to :const:`LATENCIES`.
+
+    Raises
+    ------
+    ValueError
+        If the spec cannot be parsed.
+
+    """
+    kind, _, args = spec.partition(':')
+    if kind == 'replay':
+        with open(args or LATENCIES) as f:
+            return replay(json.load(f))
+    params = [float(arg) for arg in args.split(',') if arg]
+    distributions: Dict[str, Callable[..., Latency]] = {
+        'fixed': fixed, 'uniform': uniform, 'lognormal': lognormal
+    }
+    if kind not in distributions:
+        raise ValueError('latency must be one of: fixed, uniform, lognormal,'
+                         ' replay')
+    try:
+        return distributions[kind](*params)
+    except TypeError as e:
+        raise ValueError(f'bad parameters for {kind} latency: {args}') from e
+
+
+def load_fixtures(path: str = FIXTURES) -> List[Dict[str, Any]]:
+    """Load bazs from a JSON list of objects with ``foo`` and ``mukluk``."""
+    with open(path) as f:
+        fixtures: List[Dict[str, Any]] = json.load(f)
+    if not fixtures:
+        raise ValueError('no bazs in %s' % path)
+    return fixtures
+
+
+def record_latencies(url: str, n: int = 100, timeout: float = 10.) \
+        -> List[float]:
+    """
+    Record the latency of the real baz service, for :func:`replay`.
+
+    Parameters
+    ----------
+    url : str
+        E.g. :attr:`.BazService.bazcave`.
+    n : int
+        Number of requests to make, one after another.
+    timeout : float
+        Seconds after which a request is given up on; it is recorded as
+        taking that long.
+
+    Returns
+    -------
+    list
+        Seconds to the end of each response.
+
+    """
+    latencies = []
+    with requests.Session() as session:
+        for _ in range(n):
+            start = time.monotonic()
+            try:
+                session.get(url, timeout=timeout).content
+            except requests.exceptions.RequestException:
+                pass
+            latencies.append(round(time.monotonic() - start, 4))
+    return latencies
+
+
+class _Server(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    request_queue_size = 128    # Clients connect in bursts.
+
+
+class BazStub:
+    """Serves bazs over HTTP on the loopback interface, in a thread."""
+
+    def __init__(self, fixtures: Optional[List[Dict[str, Any]]] = None,
+                 latency: Optional[Latency] = None, error_rate: float = 0.,
+                 error_status: int = 503, slow_loris: float = 0.,
+                 seed: Optional[int] = None, port: int = 0) -> None:
+        """
+        Configure the stub; it is started by :meth:`start`.
+
+        Parameters
+        ----------
+        fixtures : list
+            Bazs to serve, in turn. Defaults to :const:`FIXTURES`.
+        latency : callable
+            Draws the time to wait before responding. Defaults to no wait.
+        error_rate : float
+            Share of requests that get an error response.
+        error_status : int
+            Status code of error responses; e.g. 404 for "there is no baz".
+        slow_loris : float
+            If set, seconds to wait between each byte of the response body.
+        seed : int
+            Seeds the random number generator.
+        port : int
+            Port to listen on. By default, any free port.
+
+        """
+        self.fixtures = fixtures if fixtures is not None else load_fixtures()
+        self.latency = latency or fixed(0.)
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.slow_loris = slow_loris
+        self.port = port
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._bazs: Iterator[Dict[str, Any]] = cycle(self.fixtures)
+        self._lock = Lock()
+        self._server: Optional[_Server] = None
+
+    @property
+    def url(self) -> str:
+        """URL at which bazs are served."""
+        return f'http://127.0.0.1:{self.port}/json'
+
+    def start(self) -> 'BazStub':
+        """Start serving, in a daemon thread."""
+        self._server = _Server(('127.0.0.1', self.port), _make_handler(self))
+        self.port = self._server.server_address[1]
+        Thread(target=self._server.serve_forever, daemon=True,
+               name='baz-stub').start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> 'BazStub':
+        """Start serving in a ``with`` block."""
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        """Stop serving at the end of the block."""
+        self.stop()
+
+    def next_response(self) -> Dict[str, Any]:
+        """Draw the delay, status and body of the next response."""
+        with self._lock:
+            self.requests += 1
+            delay = max(self.latency(self._rng), 0.)
+            if self._rng.random() < self.error_rate:
+                return {'delay': delay, 'status': self.error_status,
+                        'body': {'error': 'stub error'}}
+            the_baz = next(self._bazs)
+        # This is the format of the upstream service, not of our API.
+        return {'delay': delay, 'status': 200,
+                'body': {'city': the_baz['foo'],
+                         'ip_decimal': the_baz['mukluk']}}
+
+
+def _make_handler(stub: BazStub) -> type:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'    # Supports keep-alive.
+        disable_nagle_algorithm = True
+
+        def do_GET(self) -> None:
+            self._respond(send_body=True)
+
+        def do_HEAD(self) -> None:
+            self._respond(send_body=False)
+
+        def _respond(self, send_body: bool) -> None:
+            response = stub.next_response()
+            time.sleep(response['delay'])
+            body = json.dumps(response['body']).encode('utf-8')
+            self.send_response(response['status'])
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if not send_body:
+                return
+            if not stub.slow_loris:
+                self.wfile.write(body)
+                return
+            try:
+                for i in range(len(body)):
+                    self.wfile.write(body[i:i + 1])
+                    self.wfile.flush()
+                    time.sleep(stub.slow_loris)
+            except (BrokenPipeError, ConnectionResetError):
+                pass    # The client gave up, as it should.
+
+        def log_message(self, format: str, *args: Any) -> None:
+            pass
+    return Handler
@@ -0,0 +1,107 @@
+"""Tests for :mod:`zero.stubs.baz`."""
+
+import json
+import random
+import time
+from unittest import TestCase
+
+import jsonschema
+
+from zero.domain import Baz
+from zero.services import baz
+from zero.stubs.baz import BazStub, load_fixtures, parse_latency, replay, \
+    LATENCIES
+
+
+class TestFixtures(TestCase):
+    """The fixtures are realistic."""
+
+    def test_bazs(self) -> None:
+        """Baz fixtures follow the baz schema."""
+        with open('schema/baz.json') as f:
+            schema = json.load(f)
+        for fixture in load_fixtures():
+            jsonschema.validate(fixture, schema)
+
+    def test_latencies(self) -> None:
+        """Latency fixtures can be replayed."""
+        with open(LATENCIES) as f:
+            samples = json.load(f)
+        latency = parse_latency('replay')
+        rng = random.Random()
+        self.assertEqual([latency(rng) for _ in samples], samples)
+
+
+class TestLatency(TestCase):
+    """Latency distributions can be given as specs."""
+
+    def test_parse(self) -> None:
+        """Each kind of distribution can be parsed."""
+        rng = random.Random(1)
+        self.assertEqual(parse_latency('fixed:0.5')(rng), 0.5)
+        self.assertTrue(0.1 <= parse_latency('uniform:0.1,0.2')(rng) <= 0.2)
+        self.assertGreater(parse_latency('lognormal:0.05,0.5')(rng), 0)
+        for spec in ['fixed', 'foo:1', 'uniform:1']:
+            with self.assertRaises(ValueError):
+                parse_latency(spec)
+
+    def test_replay(self) -> None:
+        """Recorded latencies are replayed in order, over and over."""
+        latency = replay([1., 2.])
+        rng = random.Random()
+        self.assertEqual([latency(rng) for _ in range(3)], [1., 2., 1.])
+
+    def test_seeded(self) -> None:
+        """Stubs with the same seed respond the same way."""
+        def draw(stub: BazStub) -> list:
+            return [stub.next_response() for _ in range(20)]
+        stubs = [BazStub(latency=parse_latency('lognormal:0.05,0.5'),
+                         error_rate=0.3, seed=1) for _ in range(2)]
+        self.assertEqual(draw(stubs[0]), draw(stubs[1]))
+
+
+class TestBazStub(TestCase):
+    """:class:`.BazStub` stands in for the baz service over HTTP."""
+
+    def _get_service(self, stub: BazStub, **config: float) -> baz.BazService:
+        service = baz.BazService('http://baz-stub/', max_retries=0, **config)
+        service.bazcave = stub.url
+        return service
+
+    def test_serves_fixtures(self) -> None:
+        """The baz service retrieves bazs from the fixtures, in turn."""
+        fixtures = [{'foo': 'fooville', 'mukluk': 1},
+                    {'foo': 'barville', 'mukluk': 2}]
+        with BazStub(fixtures) as stub:
+            service = self._get_service(stub)
+            self.assertEqual([service.retrieve_baz(baz_id)
+                              for baz_id in range(3)],
+                             [Baz(foo='fooville', mukluk=1),
+                              Baz(foo='barville', mukluk=2),
+                              Baz(foo='fooville', mukluk=1)])
+            self.assertTrue(service.status())
+        self.assertEqual(stub.requests, 4)
+
+    def test_errors(self) -> None:
+        """The stub can respond with errors."""
+        with BazStub(error_rate=1.) as stub:
+            with self.assertRaises(IOError):
+                self._get_service(stub).retrieve_baz(1)
+        with BazStub(error_rate=1., error_status=404) as stub:
+            with self.assertRaises(baz.NoBaz):
+                self._get_service(stub).retrieve_baz(1)
+
+    def test_latency(self) -> None:
+        """The stub can be slow to respond."""
+        with BazStub(latency=parse_latency('fixed:0.3')) as stub:
+            with self.assertRaises(IOError):
+                self._get_service(stub, read_timeout=0.1).retrieve_baz(1)
+            start = time.monotonic()
+            self._get_service(stub).retrieve_baz(1)
+            self.assertGreaterEqual(time.monotonic() - start, 0.3)
+
+    def test_slow_loris(self) -> None:
+        """The stub can trickle out responses."""
+        with BazStub(slow_loris=0.1) as stub:
+            with self.assertRaises(IOError):
+                self._get_service(stub, read_timeout=0.05).retrieve_baz(1)
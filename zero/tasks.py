@@ -1,35 +1,54 @@
 """Asynchronous tasks."""
 
+import hashlib
+import json
 import time
-from typing import Optional, Dict, Any, Tuple, Callable
+from typing import Optional, Dict, Any, Tuple, Callable, Iterable, List
 
 from celery import shared_task
 from celery.result import AsyncResult
-from celery.signals import after_task_publish
-from celery import current_app
+from celery.states import READY_STATES
+from celery.signals import after_task_publish, task_postrun
+from celery import current_app, uuid
+from kombu.exceptions import ChannelError
 
-from .services import things
+from .services import baz, things, taskstore
 from .domain import Thing, Task
-from .process import mutate
+from .process import mutate, pipeline
+from . import executor, results, retries
+from .progress import PROGRESS, reporter
 
 
-STATE_MAP = {'SENT': Task.Status.IN_PROGRESS,
+STATE_MAP = {'PENDING': Task.Status.IN_PROGRESS,
+             'SENT': Task.Status.IN_PROGRESS,
              'STARTED': Task.Status.IN_PROGRESS,
+             PROGRESS: Task.Status.IN_PROGRESS,
              'RETRY': Task.Status.IN_PROGRESS,
              'FAILURE': Task.Status.FAILURE,
              'SUCCESS': Task.Status.SUCCESS}
 """Maps Celery task states to :class:`.Task.Status`."""
 
 
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+PRIORITIES = (INTERACTIVE, BULK)
+"""Priority classes that clients may choose for mutations."""
+
+
 class NoSuchTask(Exception):
     """An operation on a non-existant task was attempted."""
 
 
-@shared_task
-def mutate_a_thing(thing_id: int, with_sleep: int = 5) -> Dict[str, Any]:
+@shared_task(bind=True)
+def mutate_a_thing(self: Any, thing_id: int,
+                   with_sleep: int = 5) -> Dict[str, Any]:
     """
     Perform some expen$ive mutations on a :class:`.Thing`.
 
+    Progress is reported as the task goes (see :mod:`zero.progress`). If the
+    database is unavailable, the task is retried with backoff and, failing
+    that, dead-lettered (see :mod:`zero.retries`).
+
     Parameters
     ----------
     thing_id : int
@@ -39,13 +58,249 @@ def mutate_a_thing(thing_id: int, with_sleep: int = 5) -> Dict[str, Any]:
     int
         The number of characters in :attr:`.Thing.name` after mutation.
     """
+    try:
+        return _mutate_a_thing(thing_id, with_sleep)
+    except retries.TRANSIENT_ERRORS as e:
+        raise retries.retry_or_dead_letter(self, e)
+
+
+def _mutate_a_thing(thing_id: int, with_sleep: int) -> Dict[str, Any]:
+    progress = reporter(total=3)
     a_thing: Optional[Thing] = things.get_a_thing(thing_id)
     if a_thing is None:
         raise RuntimeError('No such thing! %s' % thing_id)
+    progress.advance()
     mutate.add_some_one_to_the_thing(a_thing)
     time.sleep(with_sleep)
+    progress.advance()
     things.update_a_thing(a_thing)
-    return {'thing_id': thing_id, 'result': len(a_thing.name)}
+    return {'thing_id': thing_id, 'result': a_thing.name_length}
+
+
+@shared_task(bind=True)
+def run_pipeline(self: Any, thing_id: int,
+                 steps: List[pipeline.StepSpec]) -> Dict[str, Any]:
+    """
+    Run a chain of mutations on a :class:`.Thing`, and store it once.
+
+    All of the steps (see :mod:`zero.process.pipeline`) run in memory, and
+    the thing is written back to the database only when they are done.
+    Transient errors are handled as in :func:`mutate_a_thing`.
+
+    Parameters
+    ----------
+    thing_id : int
+    steps : list
+        See :func:`.pipeline.validate`.
+
+    Returns
+    -------
+    dict
+        Has the same shape as the return value of :func:`mutate_a_thing`,
+        with the ``mukluk`` of each baz that was used, by baz ID.
+
+    """
+    try:
+        return _run_pipeline(thing_id, steps)
+    except retries.TRANSIENT_ERRORS as e:
+        raise retries.retry_or_dead_letter(self, e)
+
+
+def _run_pipeline(thing_id: int,
+                  steps: List[pipeline.StepSpec]) -> Dict[str, Any]:
+    pipeline.validate(steps)
+    a_thing: Optional[Thing] = things.get_a_thing(thing_id)
+    if a_thing is None:
+        raise RuntimeError('No such thing! %s' % thing_id)
+    session = baz.BazService.current_session()
+    bazs = pipeline.run(a_thing, steps, session.retrieve_baz)
+    things.update_a_thing(a_thing)
+    return {'thing_id': thing_id, 'result': a_thing.name_length,
+            'mukluk': {str(baz_id): a_baz.mukluk
+                       for baz_id, a_baz in bazs.items()}}
+
+
+def get_queue(priority: str) -> str:
+    """
+    Get the name of the queue for mutations of a priority class.
+
+    Parameters
+    ----------
+    priority : str
+        One of :const:`PRIORITIES`, or ``'retry'``.
+
+    Returns
+    -------
+    str
+
+    """
+    queues: Dict[str, str] = current_app.conf.get('mutation_queues') or {}
+    if priority not in queues:
+        raise ValueError(f'No such priority: {priority}')
+    return queues[priority]
+
+
+def get_task(task: Any) -> Any:
+    """
+    Get something that will send ``task`` to the configured executor.
+
+    Parameters
+    ----------
+    task : :class:`celery.Task`
+
+    Returns
+    -------
+    object
+        ``task`` itself, or a :class:`.executor.LocalTask` if tasks are run
+        by the local executor (see ``TASK_EXECUTOR``). Either way, it has
+        ``delay()`` and ``apply_async()`` methods.
+
+    """
+    if executor.is_enabled():
+        return executor.LocalTask(task, executor.get_executor())
+    return task
+
+
+def start_mutation(thing_id: int, priority: str = INTERACTIVE,
+                   steps: Optional[List[pipeline.StepSpec]] = None,
+                   admit: Optional[Callable[[str], None]] = None) \
+        -> Tuple[str, bool]:
+    """
+    Start a mutation task, unless the same one is in flight for the thing.
+
+    The task is :func:`mutate_a_thing`, or :func:`run_pipeline` if ``steps``
+    are given. Pipelines with different steps are different mutations, and
+    are not deduplicated against one another or against plain mutations.
+
+    A lock in the result backend maps the thing onto the ID of its mutation
+    task. The lock is released when the task finishes (see
+    :func:`release_mutation_lock`), and expires no later than the result of
+    the task; a lock that still refers to a task that has completed is taken
+    over by the new task. With the local executor, the database allows only
+    one unfinished task for the thing instead, and a task that has not been
+    updated for as long as the lock would last is taken to be abandoned.
+
+    Parameters
+    ----------
+    thing_id : int
+    priority : str
+        One of :const:`PRIORITIES`, or ``'retry'``.
+    steps : list
+        The steps of a mutation pipeline; see :func:`.pipeline.validate`.
+    admit : callable
+        Called with the name of the queue only if a new task is to be sent,
+        e.g. :func:`.admission.check_capacity`. If it raises an exception,
+        no task is started, and the exception propagates.
+
+    Returns
+    -------
+    str
+        The ID of the mutation task.
+    bool
+        ``True`` if a new task was started; ``False`` if the same mutation of
+        the thing was already queued or running.
+
+    """
+    queue = get_queue(priority)
+    name = _get_lock_name(thing_id, steps)
+    if steps is None:
+        task, args = mutate_a_thing, (thing_id,)
+    else:
+        task, args = run_pipeline, (thing_id, steps)
+    # The lock must not outlive the result of the task that holds it.
+    ttl = min(results.get_result_ttl(state) for state in READY_STATES)
+    task_id = uuid()
+    if executor.is_enabled():
+        holder = taskstore.find_unfinished(name, ttl)
+        if holder is not None:
+            return holder, False
+        if admit is not None:
+            admit(queue)
+        result = get_task(task).apply_async(args, task_id=task_id, key=name,
+                                            key_ttl=ttl)
+        return result.task_id, result.task_id == task_id
+
+    # The task is registered along with the lock, in the same round-trip.
+    holder = results.acquire_lock(name, task_id, ttl, register=True)
+    while holder is not None:
+        if AsyncResult(holder).state not in READY_STATES:
+            return holder, False
+        # Take over the stale lock, unless another request beat us to it.
+        holder = results.replace_lock(name, holder, task_id, ttl,
+                                      register=True)
+
+    try:
+        if admit is not None:
+            admit(queue)
+        with results.registry.registered(task_id):
+            task.apply_async(args, task_id=task_id, queue=queue)
+    except Exception:
+        results.release_lock(name, task_id)
+        raise
+    return task_id, True
+
+
+def _get_lock_name(thing_id: int,
+                   steps: Optional[List[pipeline.StepSpec]] = None) -> str:
+    if steps is None:
+        return f'mutate-a-thing-{thing_id}'
+    # Only identical pipelines are duplicates of one another.
+    digest = hashlib.sha1(json.dumps(steps, sort_keys=True).encode('utf-8'))
+    return f'mutate-a-thing-{thing_id}-{digest.hexdigest()[:16]}'
+
+
+@shared_task(bind=True)
+def mutate_many_things(self: Any, thing_ids: List[int],
+                       with_sleep: int = 5) -> Dict[str, Any]:
+    """
+    Perform some expen$ive mutations on a chunk of things.
+
+    The things are loaded with a single query, and written back in a single
+    transaction. Progress is reported as the task goes (see
+    :mod:`zero.progress`), and transient errors are handled as in
+    :func:`mutate_a_thing`.
+
+    Parameters
+    ----------
+    thing_ids : list
+        Unique identifiers of the things to mutate.
+
+    Returns
+    -------
+    dict
+        The key ``results`` contains a list with an entry for each thing, in
+        the same order as ``thing_ids``. Each entry has the same shape as the
+        return value of :func:`mutate_a_thing`, or has an ``error`` in place
+        of a ``result`` if the thing could not be found.
+
+    """
+    try:
+        return _mutate_many_things(thing_ids, with_sleep)
+    except retries.TRANSIENT_ERRORS as e:
+        raise retries.retry_or_dead_letter(self, e)
+
+
+def _mutate_many_things(thing_ids: List[int],
+                        with_sleep: int) -> Dict[str, Any]:
+    # The mutation, the sleep and the write-back.
+    progress = reporter(total=3)
+    the_things = things.get_many_things(thing_ids)
+    mutate.add_some_one_to_many_things(list(the_things.values()))
+    progress.advance()
+    time.sleep(with_sleep)
+    progress.advance()
+    things.update_many_things(the_things.values())
+    progress.advance()
+    outcomes: List[Dict[str, Any]] = []
+    for thing_id in thing_ids:
+        a_thing = the_things.get(thing_id)
+        if a_thing is None:
+            outcomes.append({'thing_id': thing_id,
+                             'error': 'No such thing! %s' % thing_id})
+        else:
+            outcomes.append({'thing_id': thing_id,
+                             'result': a_thing.name_length})
+    return {'results': outcomes}
 
 
 def check_mutation_status(task_id: str) -> Task:
@@ -65,26 +320,141 @@ def check_mutation_status(task_id: str) -> Task:
     if not isinstance(task_id, str):
         raise ValueError('task_id must be string, not %s' % type(task_id))
 
+    if executor.is_enabled():
+        meta = taskstore.get_many_tasks([task_id]).get(task_id)
+        if meta is None:
+            raise NoSuchTask(f'No such task: {task_id}')
+        return _to_task(task_id, meta['status'], meta['result'])
+
     celery_task = AsyncResult(task_id)
 
-    # Since we are explicitly setting the state to SENT upon publication of the
-    # task (see ``update_sent_state()``), any AsyncResult in ``PENDING`` refers
-    # to a non-existant task.
-    if celery_task.status == 'PENDING':
+    # Since we register each task upon publication (see ``register_task()``),
+    # an unregistered AsyncResult in ``PENDING`` refers to a non-existant
+    # task.
+    if celery_task.status == 'PENDING' \
+            and not results.registry.exists(task_id):
         raise NoSuchTask(f'No such task: {task_id}')
 
-    task = Task(task_id=task_id, status=STATE_MAP[celery_task.status])
+    return _to_task(task_id, celery_task.status, celery_task.result)
+
+
+def check_mutation_statuses(task_ids: Iterable[str]) -> Dict[str, Task]:
+    """
+    Check the status of many mutation tasks at once.
+
+    Task metadata are retrieved from the result backend in bulk (see
+    :func:`.results.get_many`), rather than with one round-trip per task.
+
+    Parameters
+    ----------
+    task_ids : iterable
+        Mutation task IDs.
+
+    Returns
+    -------
+    dict
+        Maps task IDs onto :class:`.Task` instances. Task IDs that do not
+        refer to a known task are omitted.
+
+    """
+    task_ids = list(task_ids)
+    for task_id in task_ids:
+        if not isinstance(task_id, str):
+            raise ValueError('task_id must be string, not %s' % type(task_id))
+
+    if executor.is_enabled():
+        local_metas = taskstore.get_many_tasks(task_ids)
+        return {task_id: _to_task(task_id, meta['status'], meta['result'])
+                for task_id, meta in local_metas.items()}
+
+    metas = results.get_many(task_ids)
+    pending = [task_id for task_id, meta in metas.items()
+               if meta['status'] == 'PENDING']
+    registered = results.registry.exists_many(pending) if pending else set()
+
+    tasks: Dict[str, Task] = {}
+    for task_id, meta in metas.items():
+        # See check_mutation_status().
+        if meta['status'] == 'PENDING' and task_id not in registered:
+            continue
+        tasks[task_id] = _to_task(task_id, meta['status'], meta['result'])
+    return tasks
+
+
+def _to_task(task_id: str, state: str, result: Any) -> Task:
+    task = Task(task_id=task_id, status=STATE_MAP[state])
     if task.is_complete:
-        task.result = celery_task.result
+        task.result = result
+    elif state == PROGRESS:
+        task.progress = result
     return task
 
 
+def get_queue_backlog(queue: Optional[str] = None) -> int:
+    """
+    Get the number of tasks waiting in a queue.
+
+    Parameters
+    ----------
+    queue : str
+        Name of the queue. Defaults to the default task queue.
+
+    Returns
+    -------
+    int
+
+    """
+    if executor.is_enabled():    # There is only one queue.
+        return executor.get_executor().backlog
+    if queue is None:
+        queue = current_app.conf.task_default_queue
+    with current_app.connection_for_read() as connection:
+        try:
+            _, message_count, _ = connection.default_channel.queue_declare(
+                queue=queue,
+                passive=True
+            )
+        except ChannelError:    # The queue doesn't exist yet.
+            return 0
+    return int(message_count)
+
+
 @after_task_publish.connect
-def update_sent_state(sender: Optional[Callable] = None,
-                      headers: Optional[dict] = None, body: Any = None,
-                      **kwargs: Any) -> None:
-    """Set state to SENT, so that we can tell whether a task exists."""
-    task = current_app.tasks.get(sender)
-    backend = task.backend if task else current_app.backend
+def register_task(sender: Optional[Callable] = None,
+                  headers: Optional[dict] = None, body: Any = None,
+                  **kwargs: Any) -> None:
+    """Register the task, so that we can tell whether a task exists."""
     if headers is not None:
-        backend.store_result(headers['id'], None, "SENT")
+        results.registry.register(headers['id'])
+
+
+@task_postrun.connect
+def expire_result(sender: Optional[Any] = None,
+                  task_id: Optional[str] = None, state: Optional[str] = None,
+                  **kwargs: Any) -> None:
+    """Set the lifetime of the result of a task, per its final state."""
+    if task_id is None or state is None:
+        return
+    ttl = results.get_result_ttl(state)
+    if ttl == results.get_result_ttl():     # Already set by the backend.
+        return
+    backend = sender.backend if sender is not None else None
+    results.expire_task(task_id, ttl, backend)
+
+
+@task_postrun.connect
+def release_mutation_lock(sender: Optional[Any] = None,
+                          task_id: Optional[str] = None,
+                          args: Optional[tuple] = None,
+                          state: Optional[str] = None,
+                          **kwargs: Any) -> None:
+    """Release the lock on a thing once its mutation task has finished."""
+    if task_id is None or not args or state not in READY_STATES:
+        return
+    if getattr(sender, 'name', None) not in (mutate_a_thing.name,
+                                             run_pipeline.name):
+        return
+    steps = args[1] if sender.name == run_pipeline.name else None
+    # Only if the lock is still ours; it may have expired and been taken.
+    results.release_lock(_get_lock_name(args[0], steps), task_id,
+                         sender.backend)
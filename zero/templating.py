@@ -0,0 +1,136 @@
+"""
+Caching for template rendering in the user interface.
+
+Rendering a page through the full arxiv-base layout is relatively expensive,
+so we cache at three levels:
+
+1. Compiled templates are stored in a persistent Jinja bytecode cache, so
+   that new worker processes (and new application instances; see ``wsgi.py``)
+   do not need to compile templates from scratch.
+2. Static parts of the layout are cached as rendered fragments, using the
+   ``{% cache %}`` tag provided by :class:`FragmentCacheExtension`.
+3. Whole pages can be cached with :func:`render_cached`. This is disabled
+   unless ``UI_PAGE_CACHE_TTL`` is set.
+"""
+
+import hashlib
+import json
+from typing import Any, Hashable, Optional
+
+from flask import Flask, render_template
+from jinja2 import nodes, FileSystemBytecodeCache
+from jinja2.ext import Extension
+from jinja2.parser import Parser
+
+from arxiv.base import logging
+from arxiv.base.globals import get_application_config
+
+from .cache import TTLCache
+
+logger = logging.getLogger(__name__)
+
+# These outlive the application instance; see ``wsgi.py``.
+fragments: TTLCache[str] = TTLCache(maxsize=256)
+"""Rendered template fragments."""
+
+pages: TTLCache[str] = TTLCache(maxsize=1024)
+"""Rendered pages."""
+
+
+class FragmentCacheExtension(Extension):
+    """
+    Adds a ``{% cache %}`` tag for caching rendered template fragments.
+
+    For example:
+
+    .. code-block:: html
+
+       {% cache "footer" %}{{ super() }}{% endcache %}
+
+
+    An optional second argument sets the lifetime of the fragment in seconds;
+    otherwise, ``FRAGMENT_CACHE_TTL`` is used. Only use this for fragments
+    that do not vary from request to request, unless the variation is captured
+    in the key.
+    """
+
+    tags = {'cache'}
+
+    def __init__(self, environment: Any) -> None:
+        """Set defaults on the environment."""
+        super(FragmentCacheExtension, self).__init__(environment)
+        environment.extend(fragment_cache=fragments, fragment_cache_ttl=None)
+
+    def parse(self, parser: Parser) -> nodes.Node:
+        """Parse the ``{% cache key[, ttl] %}...{% endcache %}`` block."""
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        if parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+        else:
+            args.append(nodes.Const(None))
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        call = self.call_method('_cache', args)
+        return nodes.CallBlock(call, [], [], body).set_lineno(lineno)
+
+    def _cache(self, key: str, ttl: Optional[float], caller: Any) -> str:
+        cache = self.environment.fragment_cache
+        rendered: Optional[str] = cache.get(key)
+        if rendered is None:
+            rendered = caller()
+            if ttl is None:
+                ttl = self.environment.fragment_cache_ttl
+            cache.set(key, rendered, ttl)
+        return rendered
+
+
+def init_app(app: Flask) -> None:
+    """Set configuration defaults and configure the Jinja environment."""
+    app.config.setdefault('JINJA_BYTECODE_CACHE', True)
+    app.config.setdefault('JINJA_BYTECODE_CACHE_DIR', None)
+    app.config.setdefault('FRAGMENT_CACHE_TTL', 300.)
+    app.config.setdefault('UI_PAGE_CACHE_TTL', 0.)
+
+    if app.config['JINJA_BYTECODE_CACHE']:
+        # If no directory is given, Jinja uses a private directory in the
+        # system temporary directory.
+        directory = app.config['JINJA_BYTECODE_CACHE_DIR']
+        app.jinja_env.bytecode_cache = FileSystemBytecodeCache(directory)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+    app.jinja_env.fragment_cache_ttl = app.config['FRAGMENT_CACHE_TTL']
+
+
+def render_cached(key: Hashable, template: str, **context: Any) -> str:
+    """
+    Render a template, or get a cached rendering of it.
+
+    The cache key is composed of ``key`` and the template context, so a
+    change to the data in the context produces a new rendering. The key should
+    capture anything else that the page depends upon, e.g. the current user.
+
+    Parameters
+    ----------
+    key : hashable
+        Identifies the page, e.g. the id of the object it describes.
+    template : str
+        Name of the template to render.
+    context : kwargs
+        Passed to the template.
+
+    Returns
+    -------
+    str
+
+    """
+    ttl = get_application_config().get('UI_PAGE_CACHE_TTL', 0)
+    if not ttl:
+        return render_template(template, **context)
+    version = hashlib.sha1(
+        json.dumps(context, sort_keys=True, default=str).encode('utf-8')
+    ).hexdigest()
+    page_key = (template, key, version)
+    rendered = pages.get(page_key)
+    if rendered is None:
+        rendered = render_template(template, **context)
+        pages.set(page_key, rendered, ttl)
+    return rendered
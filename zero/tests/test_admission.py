@@ -0,0 +1,161 @@
+"""Tests for :mod:`zero.admission`."""
+
+import time
+from unittest import TestCase, mock
+from http import HTTPStatus
+from typing import Any
+
+from flask import Flask
+
+from .. import admission
+
+
+class TestTokenBucket(TestCase):
+    """:class:`.TokenBucket` limits the rate at which tokens are taken."""
+
+    def test_burst_then_wait(self) -> None:
+        """Up to ``capacity`` tokens can be taken, then the caller waits."""
+        bucket = admission.TokenBucket(rate=1., capacity=3)
+        for _ in range(3):
+            self.assertEqual(bucket.take(), 0.)
+        wait = bucket.take()
+        self.assertGreater(wait, 0.)
+        self.assertLessEqual(wait, 1.)
+
+    def test_refill(self) -> None:
+        """The bucket is refilled over time."""
+        bucket = admission.TokenBucket(rate=100., capacity=1)
+        self.assertEqual(bucket.take(), 0.)
+        self.assertGreater(bucket.take(), 0.)
+        time.sleep(0.02)
+        self.assertEqual(bucket.take(), 0.)
+
+
+class TestRateLimiter(TestCase):
+    """:class:`.RateLimiter` keeps a separate bucket for each client."""
+
+    def test_clients_are_independent(self) -> None:
+        """One client exhausting its bucket does not affect another."""
+        limiter = admission.RateLimiter(rate=1., capacity=1)
+        self.assertEqual(limiter.take('foo'), 0.)
+        self.assertGreater(limiter.take('foo'), 0.)
+        self.assertEqual(limiter.take('bar'), 0.)
+
+    def test_forgets_old_clients(self) -> None:
+        """The least recently seen clients are forgotten."""
+        limiter = admission.RateLimiter(rate=1., capacity=1, max_clients=2)
+        limiter.take('foo')
+        limiter.take('bar')
+        limiter.take('baz')
+        self.assertEqual(limiter.take('foo'), 0., 'Got a fresh bucket')
+
+
+class TestAdmissionHooks(TestCase):
+    """:func:`.admission.init_app` installs request hooks on the app."""
+
+    def setUp(self) -> None:
+        """Create an app with a route that we can hammer on."""
+        admission._limiters.clear()
+        admission._semaphores.clear()
+        self.app = Flask('test')
+        self.app.config['RATE_LIMIT_PER_SECOND'] = 1.
+        self.app.config['RATE_LIMIT_BURST'] = 2
+        admission.init_app(self.app)
+
+        @self.app.route('/')
+        def index() -> str:
+            return 'ok'
+        self.client = self.app.test_client()
+
+    def test_rate_limited(self) -> None:
+        """A client that exceeds its rate gets a 429 response."""
+        session = mock.MagicMock(session_id='foosession')
+        for _ in range(2):
+            response = self.client.get('/', environ_base={'session': session})
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+        response = self.client.get('/', environ_base={'session': session})
+        self.assertEqual(response.status_code, HTTPStatus.TOO_MANY_REQUESTS)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+        other = mock.MagicMock(session_id='othersession')
+        response = self.client.get('/', environ_base={'session': other})
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_exempt(self) -> None:
+        """Status checks are not rate limited."""
+        self.app.add_url_rule('/status', 'external_api.ok', lambda: 'ok')
+        for _ in range(5):
+            response = self.client.get('/status')
+            self.assertEqual(response.status_code, HTTPStatus.OK)
+
+    def test_off_by_default(self) -> None:
+        """Rate limiting is only on if it is configured."""
+        app = Flask('test')
+        admission.init_app(app)
+        self.assertEqual(app.config['RATE_LIMIT_PER_SECOND'], 0)
+
+    def test_concurrency_limit(self) -> None:
+        """Requests beyond the concurrency limit get a 503 response."""
+        self.app.config['RATE_LIMIT_PER_SECOND'] = 0
+        self.app.config['MAX_CONCURRENT_REQUESTS'] = 1
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, HTTPStatus.OK,
+                         'The slot is released after each request')
+        admission._get_semaphore(1).acquire()
+        response = self.client.get('/')
+        self.assertEqual(response.status_code, HTTPStatus.SERVICE_UNAVAILABLE)
+        self.assertIn('Retry-After', response.headers)
+
+
+class TestCheckCapacity(TestCase):
+    """:func:`.admission.check_capacity` sheds load."""
+
+    def setUp(self) -> None:
+        """Create an app with load shedding enabled."""
+        admission._samples.clear()
+        self.app = Flask('test')
+        self.app.config['MUTATION_QUEUE_MAX_BACKLOG'] = 10
+        self.app.config['DB_LATENCY_THRESHOLD'] = 0.5
+        admission.init_app(self.app)
+
+    @mock.patch(f'{admission.__name__}.things')
+    @mock.patch(f'{admission.__name__}.tasks')
+    def test_has_capacity(self, mock_tasks: Any, mock_things: Any) -> None:
+        """Nothing happens when we are below the thresholds."""
+        mock_tasks.get_queue_backlog.return_value = 5
+        mock_things.ping.return_value = 0.1
+        with self.app.app_context():
+            admission.check_capacity()
+            admission.check_capacity()
+        self.assertEqual(mock_tasks.get_queue_backlog.call_count, 1,
+                         'Samples are re-used')
+
+    @mock.patch(f'{admission.__name__}.things')
+    @mock.patch(f'{admission.__name__}.tasks')
+    def test_backlog(self, mock_tasks: Any, mock_things: Any) -> None:
+        """:class:`.Overloaded` is raised when the backlog is too long."""
+        mock_tasks.get_queue_backlog.return_value = 50
+        mock_things.ping.return_value = 0.1
+        with self.app.app_context():
+            with self.assertRaises(admission.Overloaded):
+                admission.check_capacity()
+
+    @mock.patch(f'{admission.__name__}.things')
+    @mock.patch(f'{admission.__name__}.tasks')
+    def test_slow_database(self, mock_tasks: Any, mock_things: Any) -> None:
+        """:class:`.Overloaded` is raised when the database is slow."""
+        mock_tasks.get_queue_backlog.return_value = 0
+        mock_things.ping.return_value = 2.
+        with self.app.app_context():
+            with self.assertRaises(admission.Overloaded):
+                admission.check_capacity()
+
+    @mock.patch(f'{admission.__name__}.things')
+    @mock.patch(f'{admission.__name__}.tasks')
+    def test_database_down(self, mock_tasks: Any, mock_things: Any) -> None:
+        """:class:`.Overloaded` is raised when the database is unavailable."""
+        mock_tasks.get_queue_backlog.return_value = 0
+        mock_things.ping.side_effect = IOError
+        with self.app.app_context():
+            with self.assertRaises(admission.Overloaded):
+                admission.check_capacity()
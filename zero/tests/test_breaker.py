@@ -0,0 +1,93 @@
+"""Tests for :mod:`zero.breaker`."""
+
+import asyncio
+from unittest import TestCase
+
+from ..breaker import CircuitBreaker, CircuitOpen
+from .test_cache import Clock
+
+
+class TestCircuitBreaker(TestCase):
+    """:class:`.CircuitBreaker` fails calls fast after repeated failures."""
+
+    def setUp(self) -> None:
+        """Create a breaker with a fake clock."""
+        self.clock = Clock()
+        self.breaker = CircuitBreaker('foo', failure_threshold=2,
+                                      cooldown=10., timer=self.clock)
+        self.calls = 0
+
+    def _fail(self) -> None:
+        self.calls += 1
+        raise IOError('nope')
+
+    def _succeed(self) -> str:
+        self.calls += 1
+        return 'yes'
+
+    def _trip(self) -> None:
+        for _ in range(2):
+            with self.assertRaises(IOError):
+                self.breaker.call(self._fail)
+
+    def test_closed(self) -> None:
+        """Calls are made while failures are below the threshold."""
+        with self.assertRaises(IOError):
+            self.breaker.call(self._fail)
+        self.assertEqual(self.breaker.call(self._succeed), 'yes')
+        with self.assertRaises(IOError):
+            self.breaker.call(self._fail)
+        self.assertEqual(self.breaker.state, 'closed',
+                         'Only consecutive failures count')
+
+    def test_open(self) -> None:
+        """Once open, calls fail without being made."""
+        self._trip()
+        self.assertEqual(self.breaker.state, 'open')
+        with self.assertRaises(CircuitOpen):
+            self.breaker.call(self._succeed)
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.breaker.stats['rejected'], 1)
+
+    def test_half_open(self) -> None:
+        """After the cooldown, one call probes the service."""
+        self._trip()
+        self.clock.now = 10.
+        self.assertEqual(self.breaker.state, 'half-open')
+        self.assertEqual(self.breaker.call(self._succeed), 'yes')
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_probe_fails(self) -> None:
+        """If the probe fails, the breaker stays open for another cooldown."""
+        self._trip()
+        self.clock.now = 10.
+        with self.assertRaises(IOError):
+            self.breaker.call(self._fail)
+        self.clock.now = 19.
+        with self.assertRaises(CircuitOpen):
+            self.breaker.call(self._succeed)
+        self.assertEqual(self.calls, 3)
+
+    def test_probe_cancelled(self) -> None:
+        """If the probe is cancelled, the next call probes the service."""
+        self._trip()
+        self.clock.now = 10.
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        probe = loop.create_task(self.breaker.call_async(asyncio.sleep, 60))
+        loop.call_soon(probe.cancel)
+        with self.assertRaises(asyncio.CancelledError):
+            loop.run_until_complete(probe)
+        self.assertEqual(self.breaker.state, 'half-open')
+        self.assertEqual(self.breaker.call(self._succeed), 'yes')
+        self.assertEqual(self.breaker.state, 'closed')
+
+    def test_other_errors(self) -> None:
+        """Errors that are not failures mean that the service is up."""
+        with self.assertRaises(IOError):
+            self.breaker.call(self._fail)
+        with self.assertRaises(KeyError):
+            self.breaker.call({}.__getitem__, 'foo')
+        with self.assertRaises(IOError):
+            self.breaker.call(self._fail)
+        self.assertEqual(self.breaker.state, 'closed')
@@ -0,0 +1,138 @@
+"""Tests for :mod:`zero.cache`."""
+
+from typing import Callable, List
+from unittest import TestCase
+
+from ..cache import TTLCache, StaleWhileRevalidate
+
+
+class Clock:
+    """A clock that only moves when we say so."""
+
+    def __init__(self) -> None:
+        """Start at zero."""
+        self.now = 0.
+
+    def __call__(self) -> float:
+        """Get the current time."""
+        return self.now
+
+
+class TestTTLCache(TestCase):
+    """:class:`.TTLCache` is a bounded cache with expiring entries."""
+
+    def setUp(self) -> None:
+        """Create a small cache with a fake clock."""
+        self.clock = Clock()
+        self.cache: TTLCache[str] = TTLCache(maxsize=2, ttl=10.,
+                                             timer=self.clock)
+
+    def test_get_and_set(self) -> None:
+        """Values can be set and retrieved, and are counted."""
+        self.assertIsNone(self.cache.get('foo'))
+        self.cache.set('foo', 'bar')
+        self.assertEqual(self.cache.get('foo'), 'bar')
+        self.assertEqual(self.cache.stats['hits'], 1)
+        self.assertEqual(self.cache.stats['misses'], 1)
+
+    def test_expiry(self) -> None:
+        """Entries expire after their TTL."""
+        self.cache.set('foo', 'bar')
+        self.cache.set('baz', 'bat', ttl=20.)
+        self.clock.now = 10.
+        self.assertIsNone(self.cache.get('foo'))
+        self.assertEqual(self.cache.get('baz'), 'bat')
+        self.clock.now = 20.
+        self.assertIsNone(self.cache.get('baz'))
+        self.assertEqual(len(self.cache), 0)
+
+    def test_zero_ttl(self) -> None:
+        """Entries with no lifetime are not stored."""
+        self.cache.set('foo', 'bar', ttl=0)
+        self.assertIsNone(self.cache.get('foo'))
+
+    def test_eviction(self) -> None:
+        """The least recently used entry is evicted when the cache is full."""
+        self.cache.set('foo', 'bar')
+        self.cache.set('baz', 'bat')
+        self.cache.get('foo')
+        self.cache.set('qux', 'quux')
+        self.assertIsNone(self.cache.get('baz'))
+        self.assertEqual(self.cache.get('foo'), 'bar')
+        self.assertEqual(self.cache.stats['evictions'], 1)
+
+    def test_delete_and_clear(self) -> None:
+        """Entries can be removed."""
+        self.cache.set('foo', 'bar')
+        self.cache.set('baz', 'bat')
+        self.cache.delete('foo')
+        self.assertIsNone(self.cache.get('foo'))
+        self.cache.clear()
+        self.assertIsNone(self.cache.get('baz'))
+
+
+class TestStaleWhileRevalidate(TestCase):
+    """:class:`.StaleWhileRevalidate` serves stale values while refreshing."""
+
+    def setUp(self) -> None:
+        """Create a cache with a fake clock that refreshes on demand."""
+        self.clock = Clock()
+        self.refreshes: List[Callable[[], None]] = []
+        self.cache: StaleWhileRevalidate[int] = StaleWhileRevalidate(
+            ttl=10., stale_ttl=20., timer=self.clock,
+            spawn=self.refreshes.append
+        )
+        self.loads = 0
+
+    def _load(self) -> int:
+        self.loads += 1
+        return self.loads
+
+    def _fail(self) -> int:
+        raise IOError('nope')
+
+    def test_fresh(self) -> None:
+        """A fresh value is served without loading it again."""
+        self.assertEqual(self.cache.get('foo', self._load), 1)
+        self.clock.now = 9.
+        self.assertEqual(self.cache.get('foo', self._load), 1)
+        self.assertEqual(self.loads, 1)
+        self.assertEqual(self.cache.stats['misses'], 1)
+        self.assertEqual(self.cache.stats['hits'], 1)
+
+    def test_stale(self) -> None:
+        """A stale value is served while one refresh runs in background."""
+        self.cache.get('foo', self._load)
+        self.clock.now = 15.
+        self.assertEqual(self.cache.get('foo', self._load), 1)
+        self.assertEqual(self.cache.get('foo', self._load), 1)
+        self.assertEqual(len(self.refreshes), 1, 'Only one refresh')
+        self.assertEqual(self.cache.stats['refreshing'], 1)
+
+        self.refreshes.pop()()
+        self.assertEqual(self.cache.get('foo', self._load), 2)
+        self.assertEqual(self.cache.stats['stale'], 2)
+        self.assertEqual(self.cache.stats['refreshing'], 0)
+
+    def test_refresh_fails(self) -> None:
+        """If a refresh fails, the stale value is served until it expires."""
+        self.cache.get('foo', self._load)
+        self.clock.now = 15.
+        self.cache.get('foo', self._fail)
+        self.refreshes.pop()()
+        self.assertEqual(self.cache.stats['refresh_errors'], 1)
+        self.assertEqual(self.cache.get('foo', self._load), 1)
+        self.assertEqual(len(self.refreshes), 1, 'Tries again')
+
+        self.clock.now = 30.
+        with self.assertRaises(IOError):
+            self.cache.get('foo', self._fail)
+        self.assertEqual(self.cache.get('foo', self._load), 2)
+
+    def test_ttl_override(self) -> None:
+        """The lifetime of a value can be set when it is loaded."""
+        self.cache.get('foo', self._load, ttl=1., stale_ttl=0.)
+        self.clock.now = 1.
+        self.assertEqual(self.cache.get('foo', self._load), 2)
+        self.cache.get('bar', self._load, ttl=0.)
+        self.assertEqual(self.cache.stats['size'], 1, 'Not cached')
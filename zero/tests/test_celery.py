@@ -0,0 +1,38 @@
+"""Tests for :mod:`zero.celery`."""
+
+from unittest import TestCase
+from typing import Any
+
+from celery import Celery
+from flask import Flask, current_app, has_app_context
+
+from ..celery import ContextTask
+
+
+class TestContextTask(TestCase):
+    """:class:`.ContextTask` runs tasks in an application context."""
+
+    def setUp(self) -> None:
+        """Create a Celery app with a task that looks for the context."""
+        self.celery_app = Celery('test', task_cls=ContextTask,
+                                 set_as_current=False)
+
+        @self.celery_app.task
+        def which_app() -> Any:
+            return current_app.name if has_app_context() else None
+        self.task = which_app
+
+    def test_no_context(self) -> None:
+        """Without a context, the context of the worker app is pushed."""
+        self.celery_app.flask_app = Flask('worker')
+        self.assertEqual(self.task(), 'worker')
+
+    def test_existing_context(self) -> None:
+        """An existing context (e.g. in a prefork process) is used."""
+        self.celery_app.flask_app = Flask('worker')
+        with Flask('other').app_context():
+            self.assertEqual(self.task(), 'other')
+
+    def test_no_app(self) -> None:
+        """If there is no worker app, the task runs as usual."""
+        self.assertIsNone(self.task())
@@ -0,0 +1,132 @@
+"""Tests for :mod:`zero.concurrency`."""
+
+import threading
+import time
+from unittest import TestCase
+from typing import List
+
+from flask import Flask, current_app, g
+
+from ..concurrency import SingleFlight, DeadlineExceeded, fan_out
+
+
+class TestSingleFlight(TestCase):
+    """:class:`.SingleFlight` coalesces concurrent calls with the same key."""
+
+    def setUp(self) -> None:
+        """Create a call that blocks until released."""
+        self.calls: List[str] = []
+        self.release = threading.Event()
+        self.flight: SingleFlight[str] = SingleFlight()
+
+    def _call(self, key: str) -> str:
+        self.calls.append(key)
+        self.release.wait()
+        return key.upper()
+
+    def test_sequential_calls(self) -> None:
+        """Calls that do not overlap are not coalesced."""
+        self.release.set()
+        self.assertEqual(self.flight.do('foo', self._call, 'foo'), 'FOO')
+        self.assertEqual(self.flight.do('foo', self._call, 'foo'), 'FOO')
+        self.assertEqual(len(self.calls), 2)
+        self.assertEqual(self.flight.in_flight, 0)
+
+    def test_concurrent_calls(self) -> None:
+        """Concurrent calls with the same key share one call."""
+        results: List[str] = []
+
+        def call(key: str) -> None:
+            results.append(self.flight.do(key, self._call, key))
+
+        threads = [threading.Thread(target=call, args=(key,))
+                   for key in ['foo', 'foo', 'foo', 'bar']]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)     # Give the threads a chance to pile up.
+        self.assertEqual(self.flight.in_flight, 2)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sorted(self.calls), ['bar', 'foo'])
+        self.assertEqual(sorted(results), ['BAR', 'FOO', 'FOO', 'FOO'])
+        self.assertEqual(self.flight.in_flight, 0)
+
+    def test_errors_are_shared(self) -> None:
+        """An exception in the call is raised for every waiting caller."""
+        errors: List[Exception] = []
+
+        def fail() -> str:
+            self.release.wait()
+            raise ValueError('nope')
+
+        def call() -> None:
+            try:
+                self.flight.do('foo', fail)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=call) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        time.sleep(0.1)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(self.flight.in_flight, 0)
+
+
+class TestFanOut(TestCase):
+    """:func:`.fan_out` makes independent calls at the same time."""
+
+    def test_concurrent(self) -> None:
+        """Calls are made at the same time, and their outcomes returned."""
+        def call(value: str) -> str:
+            time.sleep(0.2)
+            return value
+
+        start = time.monotonic()
+        outcomes = fan_out({'foo': lambda: call('foo'),
+                            'bar': lambda: call('bar')}, timeout=5.)
+        self.assertLess(time.monotonic() - start, 0.35)
+        self.assertEqual(outcomes['foo'].get(), 'foo')
+        self.assertEqual(outcomes['bar'].get(), 'bar')
+
+    def test_errors(self) -> None:
+        """Errors are captured for each call."""
+        def fail() -> None:
+            raise ValueError('nope')
+
+        outcomes = fan_out({'foo': fail, 'bar': lambda: 'bar'}, timeout=5.)
+        self.assertFalse(outcomes['foo'].ok)
+        with self.assertRaises(ValueError):
+            outcomes['foo'].get()
+        self.assertEqual(outcomes['bar'].get(), 'bar')
+
+    def test_deadline(self) -> None:
+        """The calls share a deadline."""
+        release = threading.Event()
+        self.addCleanup(release.set)
+        start = time.monotonic()
+        outcomes = fan_out({'slow': release.wait,
+                            'also_slow': lambda: release.wait(0.15),
+                            'fast': lambda: 'fast'}, timeout=0.2)
+        self.assertLess(time.monotonic() - start, 0.35)
+        with self.assertRaises(DeadlineExceeded):
+            outcomes['slow'].get()
+        self.assertEqual(outcomes['fast'].get(), 'fast')
+
+    def test_app_context(self) -> None:
+        """Calls are made in a context of the same application."""
+        app = Flask('test')
+
+        def get_app() -> Flask:
+            g.foo = 'bar'   # Does not leak into the caller's context.
+            return current_app._get_current_object()  # type: ignore
+
+        with app.app_context():
+            outcomes = fan_out({'app': get_app}, timeout=5.)
+            self.assertIs(outcomes['app'].get(), app)
+            self.assertNotIn('foo', g)
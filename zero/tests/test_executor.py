@@ -0,0 +1,125 @@
+"""Tests for :mod:`zero.executor`."""
+
+import time
+from unittest import TestCase, mock
+from typing import Any
+
+from flask import Flask
+
+from .. import executor
+
+
+def wait_for(condition: Any, timeout: float = 2.) -> None:
+    """Wait until ``condition()`` is true."""
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+
+@mock.patch(f'{executor.__name__}.taskstore')
+class TestLocalExecutor(TestCase):
+    """:class:`.LocalExecutor` runs tasks in a thread pool."""
+
+    def setUp(self) -> None:
+        """Create an executor and an application."""
+        self.executor = executor.LocalExecutor(max_workers=2)
+        self.app = Flask('test')
+
+    def tearDown(self) -> None:
+        """Stop the executor."""
+        self.executor.shutdown()
+
+    def test_success(self, mock_taskstore: Any) -> None:
+        """The task is recorded, run, and its result stored."""
+        mock_taskstore.create_task.return_value = None
+        task = mock.MagicMock(return_value={'result': 5})
+        task.name = 'zero.tasks.foo'
+        with self.app.app_context():
+            task_id = self.executor.submit(task, (1,), key='foo-1')
+        self.executor.shutdown()
+
+        mock_taskstore.create_task.assert_called_once_with(
+            task_id, 'zero.tasks.foo', 'foo-1', None
+        )
+        task.assert_called_once_with(1)
+        mock_taskstore.update_task.assert_called_with(task_id, 'SUCCESS',
+                                                      {'result': 5})
+        self.assertEqual(self.executor.backlog, 0)
+
+    def test_failure(self, mock_taskstore: Any) -> None:
+        """If the task raises an exception, it has failed."""
+        mock_taskstore.create_task.return_value = None
+        task = mock.MagicMock(side_effect=RuntimeError('No such thing!'))
+        task.name = 'zero.tasks.foo'
+        with self.app.app_context():
+            task_id = self.executor.submit(task, (1,))
+        self.executor.shutdown()
+        mock_taskstore.update_task.assert_called_with(task_id, 'FAILURE',
+                                                      'No such thing!')
+
+    def test_duplicate(self, mock_taskstore: Any) -> None:
+        """If a task with the same key is unfinished, nothing is sent."""
+        mock_taskstore.create_task.return_value = 'bar'
+        task = mock.MagicMock()
+        task.name = 'zero.tasks.foo'
+        with self.app.app_context():
+            task_id = self.executor.submit(task, (1,), key='foo-1',
+                                           key_ttl=60)
+        self.executor.shutdown()
+        self.assertEqual(task_id, 'bar')
+        self.assertFalse(task.called)
+        self.assertEqual(self.executor.backlog, 0)
+
+    def test_final_state_not_written(self, mock_taskstore: Any) -> None:
+        """If the final state cannot be written, that is logged."""
+        mock_taskstore.create_task.return_value = None
+        def update_task(task_id: str, status: str, result: Any = None) \
+                -> None:
+            if status == 'SUCCESS':
+                raise IOError('Could not query database')
+
+        mock_taskstore.update_task.side_effect = update_task
+        task = mock.MagicMock(return_value={'result': 5})
+        task.name = 'zero.tasks.foo'
+        with self.app.app_context():
+            with self.assertLogs(executor.logger, 'ERROR') as logs:
+                task_id = self.executor.submit(task, (1,))
+                self.executor.shutdown()
+        self.assertIn(task_id, logs.output[0])
+        self.assertIn('SUCCESS', logs.output[0])
+
+    def test_task_has_app_context(self, mock_taskstore: Any) -> None:
+        """The task runs in a context of the application that sent it."""
+        mock_taskstore.create_task.return_value = None
+        apps = []
+
+        def task() -> None:
+            from flask import current_app
+            apps.append(current_app._get_current_object())
+
+        with self.app.app_context():
+            self.executor.submit(task)
+        wait_for(lambda: apps)
+        self.assertIs(apps[0], self.app)
+
+
+class TestGetTask(TestCase):
+    """:func:`.tasks.get_task` chooses an executor per ``TASK_EXECUTOR``."""
+
+    def test_local(self) -> None:
+        """With ``local``, tasks are wrapped in a :class:`.LocalTask`."""
+        from .. import tasks
+        app = Flask('test')
+        app.config['TASK_EXECUTOR'] = 'local'
+        with app.app_context():
+            task = tasks.get_task(tasks.mutate_a_thing)
+        self.assertIsInstance(task, executor.LocalTask)
+        self.assertEqual(task.name, tasks.mutate_a_thing.name)
+
+    def test_celery(self) -> None:
+        """By default, the Celery task is used."""
+        from .. import tasks
+        app = Flask('test')
+        with app.app_context():
+            task = tasks.get_task(tasks.mutate_a_thing)
+        self.assertIs(task, tasks.mutate_a_thing)
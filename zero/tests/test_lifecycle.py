@@ -0,0 +1,77 @@
+"""Tests for :mod:`zero.lifecycle`."""
+
+import os
+from unittest import TestCase, mock
+from typing import Any
+
+from flask import Flask
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from .. import lifecycle
+from ..services import baz, things
+
+
+class TestWarmUp(TestCase):
+    """:func:`.lifecycle.warm_up` prepares a worker process for tasks."""
+
+    def setUp(self) -> None:
+        """Create an application with a database."""
+        self.app = Flask('test')
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+        self.app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        self.app.config['WORKER_WARM_DB_CONNECTIONS'] = 2
+        self.app.config['BAZ_ENDPOINT'] = 'https://baz.arxiv.org'
+        things.init_app(self.app)
+        baz.BazService.init_app(self.app)
+
+    @mock.patch(f'{lifecycle.__name__}.things')
+    def test_warm_up(self, mock_things: Any) -> None:
+        """Database connections are opened and a baz session is created."""
+        with self.app.app_context():
+            lifecycle.warm_up(self.app)
+            self.assertEqual(mock_things.db.engine.connect.call_count, 2)
+            session = baz.BazService.current_session()
+            self.assertIs(session, baz.BazService.current_session(),
+                          'The session is bound to the application context')
+        self.assertIsNotNone(lifecycle.get_timings()['warmed'])
+
+    def test_first_task(self) -> None:
+        """The time to the first task is recorded once."""
+        lifecycle._timings['first_task'] = None
+        lifecycle.record_first_task()
+        first = lifecycle.get_timings()['first_task']
+        self.assertIsNotNone(first)
+        lifecycle.record_first_task()
+        self.assertEqual(lifecycle.get_timings()['first_task'], first)
+
+
+class TestEngineGuard(TestCase):
+    """Connections are not shared across processes."""
+
+    def test_connection_from_another_process(self) -> None:
+        """A connection opened by another process is replaced."""
+        engine = create_engine('sqlite://', poolclass=QueuePool)
+        lifecycle._guard_engine(engine)
+        with engine.connect() as connection:
+            parent_dbapi = connection.connection.connection
+
+        with mock.patch(f'{lifecycle.__name__}.os.getpid',
+                        return_value=os.getpid() + 1):
+            with engine.connect() as connection:
+                child_dbapi = connection.connection.connection
+        self.assertIsNot(parent_dbapi, child_dbapi)
+
+
+class TestPoolName(TestCase):
+    """Pools are told apart by alias or by class."""
+
+    def test_pool_name(self) -> None:
+        """The name of a pool is its alias, or the module of its class."""
+        from celery.concurrency import get_implementation
+        self.assertEqual(lifecycle._get_pool_name(None), 'prefork')
+        self.assertEqual(lifecycle._get_pool_name('threads'), 'threads')
+        self.assertEqual(
+            lifecycle._get_pool_name(get_implementation('prefork')),
+            'prefork'
+        )
@@ -0,0 +1,81 @@
+"""Tests for :mod:`zero.middleware`."""
+
+import os
+import time
+from datetime import datetime, timedelta
+from unittest import TestCase, mock
+from typing import Any
+
+import jwt
+from pytz import UTC
+
+from arxiv.users import domain
+from arxiv.users.auth import tokens
+from arxiv.users.helpers import generate_token
+
+from .. import middleware
+
+decode = tokens.decode
+
+
+class TestCachingAuthMiddleware(TestCase):
+    """:class:`.CachingAuthMiddleware` caches verified sessions."""
+
+    def setUp(self) -> None:
+        """Create a middleware around a do-nothing app."""
+        os.environ['JWT_SECRET'] = 'foosecret'
+        middleware.sessions.clear()
+        self.middleware = middleware.CachingAuthMiddleware(
+            mock.MagicMock(),
+            config={'AUTH_SESSION_CACHE_TTL': 60}
+        )
+
+    def _before(self, token: str) -> Any:
+        environ, _ = self.middleware.before({'HTTP_AUTHORIZATION': token},
+                                            mock.MagicMock())
+        return environ['session']
+
+    @mock.patch('arxiv.users.auth.middleware.tokens.decode')
+    def test_token_is_verified_once(self, mock_decode: Any) -> None:
+        """The token is only decoded the first time it is seen."""
+        mock_decode.side_effect = decode
+        token = generate_token('1234', 'foo@user.com', 'foouser')
+        hits = middleware.sessions.stats['hits']
+
+        first = self._before(token)
+        second = self._before(token)
+
+        self.assertIsInstance(first, domain.Session)
+        self.assertEqual(first, second)
+        self.assertEqual(mock_decode.call_count, 1)
+        self.assertEqual(middleware.sessions.stats['hits'], hits + 1)
+
+    def test_invalid_token_is_not_cached(self) -> None:
+        """Invalid tokens are rejected every time."""
+        self.assertIsInstance(self._before('not a token'), Exception)
+        self.assertEqual(len(middleware.sessions), 0)
+
+    def test_no_token(self) -> None:
+        """When there is no token, there is no session."""
+        environ, _ = self.middleware.before({}, mock.MagicMock())
+        self.assertIsNone(environ['session'])
+
+    def test_expires_with_session(self) -> None:
+        """Sessions are not cached beyond their end time."""
+        now = datetime.now(tz=UTC)
+        session = domain.Session(session_id='foo', start_time=now,
+                                 end_time=now + timedelta(seconds=10))
+        ttl = self.middleware._get_ttl('not a token', session)
+        self.assertLessEqual(ttl, 10)
+        self.assertGreater(ttl, 0)
+
+    def test_expires_with_token(self) -> None:
+        """Sessions are not cached beyond the expiry of the token."""
+        now = datetime.now(tz=UTC)
+        session = domain.Session(session_id='foo', start_time=now)
+        token = jwt.encode({'exp': int(time.time()) + 5}, 'foosecret')
+        ttl = self.middleware._get_ttl(token, session)
+        self.assertLessEqual(ttl, 5)
+
+        token = jwt.encode({'exp': int(time.time()) - 5}, 'foosecret')
+        self.assertLess(self.middleware._get_ttl(token, session), 0)
@@ -0,0 +1,72 @@
+"""Tests for :mod:`zero.progress`."""
+
+from unittest import TestCase, mock
+from typing import Any, Dict, List
+
+from .. import progress
+
+
+class FakeTimer:
+    """A clock that only moves when told to."""
+
+    def __init__(self) -> None:
+        """Start at zero."""
+        self.now = 0.
+
+    def __call__(self) -> float:
+        """Get the current time."""
+        return self.now
+
+
+class TestProgressReporter(TestCase):
+    """:class:`.ProgressReporter` reports progress now and then."""
+
+    def setUp(self) -> None:
+        """Create a reporter with a fake clock."""
+        self.timer = FakeTimer()
+        self.written: List[Dict[str, Any]] = []
+        self.reporter = progress.ProgressReporter(
+            4, self.written.append, min_interval=1., timer=self.timer
+        )
+
+    def test_progress(self) -> None:
+        """Percent complete and ETA are calculated from elapsed time."""
+        self.timer.now = 2.
+        self.reporter.advance()
+        self.assertEqual(self.written, [{'done': 1, 'total': 4,
+                                         'percent': 25., 'eta': 6.}])
+
+    def test_throttled(self) -> None:
+        """Progress is written at most once per ``min_interval``."""
+        for _ in range(3):
+            self.timer.now += 0.6
+            self.reporter.advance()
+        self.assertEqual([p['done'] for p in self.written], [1, 3])
+
+    def test_write_fails(self) -> None:
+        """A failure to write progress does not fail the task."""
+        reporter = progress.ProgressReporter(
+            2, mock.MagicMock(side_effect=IOError), timer=self.timer
+        )
+        reporter.advance()
+        self.assertEqual(reporter.done, 1)
+
+
+class TestReporter(TestCase):
+    """:func:`.reporter` finds somewhere to write progress."""
+
+    def test_writing_to(self) -> None:
+        """Progress is written with the writer for this thread."""
+        write = mock.MagicMock()
+        with progress.writing_to(write):
+            progress.reporter(total=2).advance()
+        write.assert_called_once()
+        self.assertEqual(write.call_args[0][0]['done'], 1)
+
+    def test_no_task(self) -> None:
+        """Outside of a task, progress is discarded."""
+        write = mock.MagicMock()
+        with progress.writing_to(write):
+            pass
+        progress.reporter(total=2).advance()
+        write.assert_not_called()
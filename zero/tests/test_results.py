@@ -0,0 +1,248 @@
+"""Tests for :mod:`zero.results`."""
+
+from unittest import TestCase, mock
+from typing import Any
+
+from .. import results
+
+
+class TestGetMany(TestCase):
+    """:func:`.results.get_many` gets metadata for many tasks at once."""
+
+    def test_key_value_backend(self) -> None:
+        """A key/value backend is queried with a single multi-get."""
+        backend = mock.MagicMock()
+        backend.get_key_for_task.side_effect = lambda task_id: f'key-{task_id}'
+        backend.mget.return_value = [b'{"status": "SUCCESS"}', None]
+        backend.decode_result.return_value = {'status': 'SUCCESS',
+                                              'result': 5}
+
+        metas = results.get_many(['foo', 'bar', 'foo'], backend)
+
+        self.assertEqual(backend.mget.call_count, 1)
+        self.assertEqual(backend.mget.call_args[0][0], ['key-foo', 'key-bar'])
+        self.assertEqual(metas['foo'], {'status': 'SUCCESS', 'result': 5})
+        self.assertEqual(metas['bar']['status'], 'PENDING')
+
+    @mock.patch('zero.results.AsyncResult')
+    def test_other_backend(self, mock_AsyncResult: Any) -> None:
+        """Other backends are queried one task at a time."""
+        backend = mock.MagicMock(spec=['get_task_meta'])
+        mock_AsyncResult.return_value = mock.MagicMock(status='SUCCESS',
+                                                       result=5)
+        metas = results.get_many(['foo', 'bar'], backend)
+        self.assertEqual(mock_AsyncResult.call_count, 2)
+        self.assertEqual(metas['bar'], {'status': 'SUCCESS', 'result': 5})
+
+
+class FakeRedis:
+    """Just enough of a Redis client to exercise locks."""
+
+    def __init__(self) -> None:
+        """Start with no keys."""
+        self.data: dict = {}
+
+    def set(self, key: str, value: str, nx: bool = False,
+            ex: Any = None) -> bool:
+        """Set a key, optionally only if it does not exist."""
+        if nx and key in self.data:
+            return False
+        self.data[key] = value.encode('utf-8')
+        return True
+
+    def get(self, key: str) -> Any:
+        """Get the value of a key."""
+        return self.data.get(key)
+
+    def delete(self, key: str) -> None:
+        """Delete a key."""
+        self.data.pop(key, None)
+
+    def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> Any:
+        """Run one of the lock scripts, as Redis would."""
+        keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+        holder = self.get(keys[0])
+        if script == results._ACQUIRE_LOCK:
+            if holder is not None:
+                return holder
+            self.set(keys[0], args[0])
+        elif script == results._REPLACE_LOCK:
+            old_owner, new_owner = args[:2]
+            if holder is not None and holder != old_owner.encode('utf-8'):
+                return holder
+            self.set(keys[0], new_owner)
+        elif script == results._RELEASE_LOCK:
+            if holder == args[0].encode('utf-8'):
+                self.delete(keys[0])
+            return None
+        else:
+            raise NotImplementedError(script)
+        if numkeys > 1:
+            self.set(keys[1], '1')
+        return None
+
+
+class TestLocks(TestCase):
+    """Locks are stored in the result backend."""
+
+    def setUp(self) -> None:
+        """Create a backend with a Redis client."""
+        self.backend = mock.MagicMock(client=FakeRedis())
+
+    def test_acquire(self) -> None:
+        """The first owner acquires the lock; later owners are told who."""
+        self.assertIsNone(results.acquire_lock('foo', 'a', 60, self.backend))
+        self.assertEqual(results.acquire_lock('foo', 'b', 60, self.backend),
+                         'a')
+
+    def test_replace_and_release(self) -> None:
+        """A lock can be taken over, and released."""
+        results.acquire_lock('foo', 'a', 60, self.backend)
+        self.assertIsNone(
+            results.replace_lock('foo', 'a', 'b', 60, self.backend)
+        )
+        self.assertEqual(results.acquire_lock('foo', 'c', 60, self.backend),
+                         'b')
+        results.release_lock('foo', backend=self.backend)
+        self.assertIsNone(results.acquire_lock('foo', 'c', 60, self.backend))
+
+    def test_replace_is_compare_and_set(self) -> None:
+        """A lock is only taken over from the owner that was expected."""
+        results.acquire_lock('foo', 'a', 60, self.backend)
+        results.replace_lock('foo', 'a', 'b', 60, self.backend)
+        self.assertEqual(
+            results.replace_lock('foo', 'a', 'c', 60, self.backend), 'b'
+        )
+
+    def test_release_by_owner(self) -> None:
+        """A lock released by owner is only released if it is theirs."""
+        results.acquire_lock('foo', 'a', 60, self.backend)
+        results.release_lock('foo', 'b', self.backend)
+        self.assertEqual(results.acquire_lock('foo', 'c', 60, self.backend),
+                         'a')
+        results.release_lock('foo', 'a', self.backend)
+        self.assertIsNone(results.acquire_lock('foo', 'c', 60, self.backend))
+
+    @mock.patch('zero.results.get_result_ttl', mock.MagicMock(return_value=5))
+    def test_register_owner(self) -> None:
+        """The owner can be registered when the lock is acquired."""
+        client = self.backend.client
+        results.acquire_lock('foo', 'a', 60, self.backend, register=True)
+        results.acquire_lock('foo', 'b', 60, self.backend, register=True)
+        results.replace_lock('foo', 'a', 'c', 60, self.backend, register=True)
+        self.assertEqual(sorted(client.data),
+                         [results.LOCK_PREFIX + 'foo',
+                          results.REGISTRY_PREFIX + 'a',
+                          results.REGISTRY_PREFIX + 'c'])
+
+    def test_backend_without_keys(self) -> None:
+        """If the backend can't store a lock, it is always acquired."""
+        backend = mock.MagicMock(spec=['get_task_meta'])
+        self.assertIsNone(results.acquire_lock('foo', 'a', 60, backend))
+        self.assertIsNone(results.acquire_lock('foo', 'b', 60, backend))
+
+
+class TestTaskRegistry(TestCase):
+    """:class:`.results.TaskRegistry` keeps track of tasks that exist."""
+
+    def setUp(self) -> None:
+        """Create a registry with a Redis backend."""
+        self.backend = mock.MagicMock()
+        self.pipe = self.backend.client.pipeline.return_value
+        self.registry = results.TaskRegistry(backend=self.backend)
+
+    @mock.patch('zero.results.get_result_ttl', mock.MagicMock(return_value=5))
+    def test_register(self) -> None:
+        """A registration is written before :meth:`.register` returns."""
+        self.registry.register('foo')
+        self.assertEqual(self.pipe.execute.call_count, 1)
+        self.assertEqual(self.pipe.set.call_args[0][0], 'zero-task-foo')
+        self.assertEqual(self.pipe.set.call_args[1]['ex'], 5)
+
+    @mock.patch('zero.results.get_result_ttl', mock.MagicMock(return_value=5))
+    def test_batch(self) -> None:
+        """Registrations in a batch are written in a single pipeline."""
+        with self.registry.batch():
+            self.registry.register('foo')
+            with self.registry.batch():
+                self.registry.register('bar')
+            self.assertEqual(self.pipe.execute.call_count, 0)
+            self.assertTrue(self.registry.exists('foo'))
+            self.registry.register('baz')
+
+        self.assertEqual(self.pipe.execute.call_count, 1)
+        self.assertEqual(self.pipe.set.call_count, 3)
+        self.assertEqual(self.pipe.set.call_args[0][0], 'zero-task-baz')
+        self.assertEqual(self.backend.client.mget.call_count, 0)
+
+    def test_registered(self) -> None:
+        """A task that is already registered is not registered again."""
+        with self.registry.registered('foo'):
+            self.registry.register('foo')
+        self.assertEqual(self.pipe.execute.call_count, 0)
+
+    def test_exists_many(self) -> None:
+        """Registered tasks are found with a single multi-get."""
+        self.backend.client.mget.return_value = [b'1', None]
+        found = self.registry.exists_many(['foo', 'bar'])
+        self.assertEqual(found, {'foo'})
+        self.assertEqual(self.backend.client.mget.call_args[0][0],
+                         ['zero-task-foo', 'zero-task-bar'])
+
+    @mock.patch('zero.results.get_result_ttl', mock.MagicMock(return_value=5))
+    def test_failed_write(self) -> None:
+        """If a registration can't be written, the caller finds out."""
+        self.pipe.execute.side_effect = ConnectionError
+        with self.assertRaises(ConnectionError):
+            self.registry.register('foo')
+
+
+class TestSweep(TestCase):
+    """:func:`.results.sweep` reports memory usage by type of key."""
+
+    def test_sweep(self) -> None:
+        """Keys are grouped by prefix, and missing TTLs may be set."""
+        backend = mock.MagicMock()
+        client = backend.client
+        client.scan_iter.return_value = [b'celery-task-meta-foo',
+                                         b'celery-task-meta-bar',
+                                         b'zero-task-foo', b'gone', b'baz']
+        pipe = client.pipeline.return_value
+        pipe.execute.side_effect = [
+            [100, 60, 120, -1, 30, 60],     # Sizes and TTLs, batch 1.
+            None,                           # Setting missing TTLs.
+            [None, -2, 10, -1],             # Sizes and TTLs, batch 2.
+        ]
+
+        report = results.sweep(backend, batch_size=3, missing_ttl=5)
+
+        self.assertEqual(report['result'],
+                         {'keys': 2, 'bytes': 220, 'no_ttl': 1})
+        self.assertEqual(report['registry'],
+                         {'keys': 1, 'bytes': 30, 'no_ttl': 0})
+        self.assertEqual(report['other'],
+                         {'keys': 1, 'bytes': 10, 'no_ttl': 1})
+        pipe.expire.assert_called_once_with(b'celery-task-meta-bar', 5)
+
+
+class TestResultTTL(TestCase):
+    """Results are kept for a configurable time, by state."""
+
+    @mock.patch('zero.results.current_app')
+    def test_get_result_ttl(self, mock_app: Any) -> None:
+        """The lifetime for a state falls back to ``result_expires``."""
+        mock_app.conf.result_expires = 100
+        mock_app.conf.get.return_value = {'SUCCESS': 10}
+        self.assertEqual(results.get_result_ttl(), 100)
+        self.assertEqual(results.get_result_ttl('SUCCESS'), 10)
+        self.assertEqual(results.get_result_ttl('FAILURE'), 100)
+
+    def test_expire_task(self) -> None:
+        """The result and the registry entry expire together."""
+        backend = mock.MagicMock()
+        backend.get_key_for_task.return_value = 'celery-task-meta-foo'
+        pipe = backend.client.pipeline.return_value
+        results.expire_task('foo', 10, backend)
+        pipe.expire.assert_any_call('celery-task-meta-foo', 10)
+        pipe.expire.assert_any_call('zero-task-foo', 10)
+        self.assertEqual(pipe.execute.call_count, 1)
@@ -0,0 +1,196 @@
+"""Tests for :mod:`zero.retries`."""
+
+from unittest import TestCase, mock
+from typing import Any, List
+
+from .. import retries, tasks
+
+
+class FakeRedis:
+    """Just enough of a Redis client to exercise dead letters."""
+
+    def __init__(self) -> None:
+        """Start with an empty list."""
+        self.items: List[bytes] = []
+
+    def pipeline(self, transaction: bool = True) -> 'FakeRedis':
+        """Run commands right away."""
+        return self
+
+    def execute(self) -> None:
+        """Nothing to do."""
+
+    def lpush(self, key: str, value: str) -> None:
+        """Push a value on to the head of the list."""
+        self.items.insert(0, value.encode('utf-8'))
+
+    def ltrim(self, key: str, start: int, stop: int) -> None:
+        """Keep only part of the list."""
+        self.items = self.items[start:stop + 1]
+
+    def rpush(self, key: str, value: bytes) -> None:
+        """Push a value on to the tail of the list."""
+        self.items.append(value)
+
+    def lrange(self, key: str, start: int, stop: int) -> List[bytes]:
+        """Get the whole list."""
+        return list(self.items)
+
+    def lrem(self, key: str, count: int, value: bytes) -> int:
+        """Remove a value from the list."""
+        if value not in self.items:
+            return 0
+        self.items.remove(value)
+        return 1
+
+
+def make_task(retries: int) -> Any:
+    """Make a task that has been retried ``retries`` times."""
+    task = mock.MagicMock()
+    task.name = 'zero.tasks.mutate_a_thing'
+    task.request = mock.MagicMock(called_directly=False, retries=retries,
+                                  id='task-1', args=[24], kwargs={})
+    return task
+
+
+class TestGetCountdown(TestCase):
+    """:func:`.retries.get_countdown` implements full jitter."""
+
+    def test_exponential(self) -> None:
+        """The ceiling doubles with each retry, up to the cap."""
+        ceilings = [retries.get_countdown(n, 2, 20, lambda lo, hi: hi)
+                    for n in range(5)]
+        self.assertEqual(ceilings, [2, 4, 8, 16, 20])
+
+    def test_jitter(self) -> None:
+        """The delay is anywhere between zero and the ceiling."""
+        for _ in range(100):
+            self.assertTrue(0 <= retries.get_countdown(3, 2, 20) <= 16)
+
+
+@mock.patch(f'{retries.__name__}.get_application_config',
+            return_value={'MUTATION_MAX_RETRIES': 2,
+                          'MUTATION_RETRY_BACKOFF': 1,
+                          'MUTATION_RETRY_BACKOFF_MAX': 10})
+class TestRetryOrDeadLetter(TestCase):
+    """:func:`.retries.retry_or_dead_letter` decides what to do next."""
+
+    @mock.patch(f'{retries.__name__}.current_app')
+    @mock.patch(f'{retries.__name__}.dead_letter')
+    def test_retry(self, mock_dead_letter: Any, mock_app: Any,
+                   mock_config: Any) -> None:
+        """The task is retried on the retry queue, after a delay."""
+        mock_app.conf = {'mutation_queues': {'retry': 'zero-worker-retry'}}
+        task = make_task(retries=1)
+        error = IOError('database is down')
+        self.assertIs(retries.retry_or_dead_letter(task, error),
+                      task.retry.return_value)
+        kwargs = task.retry.call_args[1]
+        self.assertIs(kwargs['exc'], error)
+        self.assertTrue(0 <= kwargs['countdown'] <= 2)
+        self.assertEqual(kwargs['queue'], 'zero-worker-retry')
+        mock_dead_letter.assert_not_called()
+
+    @mock.patch(f'{retries.__name__}.dead_letter')
+    def test_out_of_retries(self, mock_dead_letter: Any,
+                            mock_config: Any) -> None:
+        """The task gives up and is dead-lettered."""
+        task = make_task(retries=2)
+        error = IOError('database is down')
+        self.assertIs(retries.retry_or_dead_letter(task, error), error)
+        task.retry.assert_not_called()
+        mock_dead_letter.assert_called_once_with(
+            task.name, 'task-1', [24], {}, error, 2
+        )
+
+    @mock.patch(f'{retries.__name__}.dead_letter')
+    def test_called_directly(self, mock_dead_letter: Any,
+                             mock_config: Any) -> None:
+        """A task that was not sent by Celery is not retried."""
+        task = make_task(retries=0)
+        task.request.called_directly = True
+        error = IOError('database is down')
+        self.assertIs(retries.retry_or_dead_letter(task, error), error)
+        task.retry.assert_not_called()
+        mock_dead_letter.assert_not_called()
+
+
+class TestDeadLetters(TestCase):
+    """Dead letters are kept in the result backend, and can be replayed."""
+
+    def setUp(self) -> None:
+        """Create a backend with a Redis client."""
+        self.client = FakeRedis()
+        self.backend = mock.MagicMock(client=self.client)
+
+    def test_dead_letter(self) -> None:
+        """Dead letters are listed most recent first."""
+        retries.dead_letter('foo', 'task-1', [1], {}, IOError('a'), 5,
+                            self.backend)
+        retries.dead_letter('foo', 'task-2', [2], {}, IOError('b'), 5,
+                            self.backend)
+        entries = retries.get_dead_letters(self.backend)
+        self.assertEqual([e['task_id'] for e in entries],
+                         ['task-2', 'task-1'])
+        self.assertEqual(entries[0]['args'], [2])
+        self.assertEqual(entries[0]['error'], 'b')
+
+    @mock.patch(f'{retries.__name__}.get_application_config',
+                return_value={'DEAD_LETTER_MAX_LENGTH': 2})
+    def test_max_length(self, mock_config: Any) -> None:
+        """The oldest dead letters are dropped."""
+        for i in range(3):
+            retries.dead_letter('foo', f'task-{i}', [i], {}, IOError(), 5,
+                                self.backend)
+        self.assertEqual(len(retries.get_dead_letters(self.backend)), 2)
+
+    @mock.patch(f'{retries.__name__}.current_app')
+    def test_replay(self, mock_app: Any) -> None:
+        """Replayed tasks are sent again and removed from the list."""
+        mock_app.conf = {'mutation_queues': {'retry': 'zero-worker-retry'}}
+        mock_app.send_task.return_value = mock.MagicMock(id='task-3')
+        for i in range(2):
+            retries.dead_letter('foo', f'task-{i}', [i], {}, IOError(), 5,
+                                self.backend)
+
+        self.assertEqual(retries.replay(['task-1'], self.backend), ['task-3'])
+        mock_app.send_task.assert_called_once_with(
+            'foo', args=[1], kwargs={}, queue='zero-worker-retry'
+        )
+        self.assertEqual([e['task_id'] for e in
+                          retries.get_dead_letters(self.backend)], ['task-0'])
+
+    @mock.patch(f'{retries.__name__}.current_app')
+    def test_replay_fails(self, mock_app: Any) -> None:
+        """If a task cannot be sent again, it stays in the list."""
+        mock_app.conf = {}
+        mock_app.send_task.side_effect = OSError('broker is down')
+        retries.dead_letter('foo', 'task-1', [1], {}, IOError(), 5,
+                            self.backend)
+
+        with self.assertRaises(OSError):
+            retries.replay(backend=self.backend)
+        self.assertEqual([e['task_id'] for e in
+                          retries.get_dead_letters(self.backend)], ['task-1'])
+
+    @mock.patch('zero.tasks.start_mutation')
+    @mock.patch(f'{retries.__name__}.current_app')
+    def test_replay_mutation(self, mock_app: Any,
+                             mock_start_mutation: Any) -> None:
+        """Replayed mutations take the lock on the thing."""
+        mock_app.conf = {}
+        mock_start_mutation.return_value = ('task-3', False)
+        steps = [{'step': 'add_some_one'}]
+        retries.dead_letter(tasks.run_pipeline.name, 'task-1', [24, steps],
+                            {}, IOError(), 5, self.backend)
+
+        self.assertEqual(retries.replay(backend=self.backend), ['task-3'])
+        mock_start_mutation.assert_called_once_with(24, 'retry', steps)
+        self.assertFalse(mock_app.send_task.called)
+        self.assertEqual(retries.get_dead_letters(self.backend), [])
+
+    def test_other_backend(self) -> None:
+        """Backends other than Redis do not keep dead letters."""
+        backend = mock.MagicMock(spec=['get'])
+        retries.dead_letter('foo', 'task-1', [1], {}, IOError(), 5, backend)
+        self.assertEqual(retries.get_dead_letters(backend), [])
@@ -4,7 +4,7 @@ from unittest import TestCase, mock
 from datetime import datetime
 from typing import Any
 
-from ..domain import Thing, Task
+from ..domain import Baz, Thing, Task
 from .. import tasks
 
 
@@ -32,6 +32,263 @@ class TestMutateAThing(TestCase):
         with self.assertRaises(IOError):
             tasks.mutate_a_thing(24)
 
+    @mock.patch('zero.tasks.retries.retry_or_dead_letter')
+    @mock.patch('zero.tasks.mutate')
+    @mock.patch('zero.tasks.things')
+    def test_retries_on_ioerror(self, mock_things: Any, mock_mutate: Any,
+                                mock_retry: Any) -> None:
+        """A transient error is handed over to be retried."""
+        error = IOError('database is down')
+        mock_things.get_a_thing.side_effect = error
+        mock_retry.return_value = RuntimeError('retry')
+        with self.assertRaises(RuntimeError):
+            tasks.mutate_a_thing(24)
+        self.assertEqual(mock_retry.call_args[0][0].name,
+                         tasks.mutate_a_thing.name)
+        self.assertIs(mock_retry.call_args[0][1], error)
+
+
+@mock.patch('zero.tasks.mutate_a_thing')
+@mock.patch('zero.tasks.results')
+class TestStartMutation(TestCase):
+    """:func:`.start_mutation` does not start duplicate mutations."""
+
+    def test_start(self, mock_results: Any, mock_task: Any) -> None:
+        """If the lock is acquired, a new task is started."""
+        mock_results.get_result_ttl.return_value = 60
+        mock_results.acquire_lock.return_value = None
+        task_id, started = tasks.start_mutation(24)
+        self.assertTrue(started)
+        self.assertEqual(mock_task.apply_async.call_args[1]['task_id'],
+                         task_id)
+        self.assertEqual(mock_task.apply_async.call_args[1]['queue'],
+                         'zero-worker-interactive')
+        self.assertEqual(mock_results.acquire_lock.call_args[0][1], task_id)
+        self.assertTrue(mock_results.acquire_lock.call_args[1]['register'])
+        mock_results.registry.registered.assert_called_once_with(task_id)
+
+    @mock.patch('zero.tasks.run_pipeline')
+    def test_start_pipeline(self, mock_pipeline: Any, mock_results: Any,
+                            mock_task: Any) -> None:
+        """If steps are given, a pipeline task is started."""
+        mock_results.get_result_ttl.return_value = 60
+        mock_results.acquire_lock.return_value = None
+        steps = [{'step': 'add_some_one'}]
+        tasks.start_mutation(24, steps=steps)
+        self.assertEqual(mock_pipeline.apply_async.call_args[0][0],
+                         (24, steps))
+        self.assertFalse(mock_task.apply_async.called)
+
+    @mock.patch('zero.tasks.run_pipeline')
+    def test_pipeline_lock(self, mock_pipeline: Any, mock_results: Any,
+                           mock_task: Any) -> None:
+        """Only pipelines with the same steps share a lock."""
+        mock_results.get_result_ttl.return_value = 60
+        mock_results.acquire_lock.return_value = None
+        steps = [{'step': 'add_some_one'}]
+        names = []
+        for kwargs in ({}, {'steps': steps}, {'steps': [dict(steps[0])]},
+                       {'steps': steps * 2}):
+            tasks.start_mutation(24, **kwargs)
+            names.append(mock_results.acquire_lock.call_args[0][0])
+        self.assertEqual(names[1], names[2])
+        self.assertEqual(len(set(names)), 3)
+
+    @mock.patch('zero.tasks.AsyncResult')
+    def test_already_mutating(self, mock_AsyncResult: Any, mock_results: Any,
+                              mock_task: Any) -> None:
+        """If the thing is already being mutated, that task is returned."""
+        mock_results.get_result_ttl.return_value = 60
+        mock_results.acquire_lock.return_value = 'the-task'
+        mock_AsyncResult.return_value = mock.MagicMock(state='PENDING')
+        self.assertEqual(tasks.start_mutation(24), ('the-task', False))
+        self.assertEqual(mock_task.apply_async.call_count, 0)
+
+    @mock.patch('zero.tasks.AsyncResult')
+    def test_stale_lock(self, mock_AsyncResult: Any, mock_results: Any,
+                        mock_task: Any) -> None:
+        """If the locked task is complete, the lock is taken over."""
+        mock_results.get_result_ttl.return_value = 60
+        mock_results.acquire_lock.return_value = 'the-task'
+        mock_results.replace_lock.return_value = None
+        mock_AsyncResult.return_value = mock.MagicMock(state='SUCCESS')
+        task_id, started = tasks.start_mutation(24)
+        self.assertTrue(started)
+        self.assertNotEqual(task_id, 'the-task')
+        self.assertEqual(mock_results.replace_lock.call_args[0][1:3],
+                         ('the-task', task_id))
+        self.assertEqual(mock_task.apply_async.call_count, 1)
+
+    @mock.patch('zero.tasks.AsyncResult')
+    def test_stale_lock_taken(self, mock_AsyncResult: Any, mock_results: Any,
+                              mock_task: Any) -> None:
+        """If another request takes over a stale lock first, it wins."""
+        mock_results.get_result_ttl.return_value = 60
+        mock_results.acquire_lock.return_value = 'the-task'
+        mock_results.replace_lock.return_value = 'their-task'
+        mock_AsyncResult.side_effect = lambda task_id: mock.MagicMock(
+            state='SUCCESS' if task_id == 'the-task' else 'PENDING'
+        )
+        self.assertEqual(tasks.start_mutation(24), ('their-task', False))
+        self.assertEqual(mock_task.apply_async.call_count, 0)
+
+    def test_priority(self, mock_results: Any, mock_task: Any) -> None:
+        """The task is sent to the queue for its priority class."""
+        mock_results.get_result_ttl.return_value = 60
+        mock_results.acquire_lock.return_value = None
+        tasks.start_mutation(24, tasks.BULK)
+        self.assertEqual(mock_task.apply_async.call_args[1]['queue'],
+                         'zero-worker-bulk')
+        with self.assertRaises(ValueError):
+            tasks.start_mutation(24, 'urgent')
+
+    @mock.patch('zero.tasks.AsyncResult')
+    def test_admit(self, mock_AsyncResult: Any, mock_results: Any,
+                   mock_task: Any) -> None:
+        """Only a new task has to be admitted."""
+        mock_results.get_result_ttl.return_value = 60
+        mock_results.acquire_lock.return_value = 'the-task'
+        mock_AsyncResult.return_value = mock.MagicMock(state='PENDING')
+        admit = mock.MagicMock(side_effect=RuntimeError('Overloaded'))
+        self.assertEqual(tasks.start_mutation(24, admit=admit),
+                         ('the-task', False))
+        self.assertEqual(admit.call_count, 0)
+
+        mock_results.acquire_lock.return_value = None
+        with self.assertRaises(RuntimeError):
+            tasks.start_mutation(24, admit=admit)
+        admit.assert_called_once_with('zero-worker-interactive')
+        self.assertEqual(mock_task.apply_async.call_count, 0)
+        self.assertEqual(mock_results.release_lock.call_count, 1)
+
+    def test_publish_fails(self, mock_results: Any, mock_task: Any) -> None:
+        """If the task can't be published, the lock is released."""
+        mock_results.get_result_ttl.return_value = 60
+        mock_results.acquire_lock.return_value = None
+        mock_task.apply_async.side_effect = OSError
+        with self.assertRaises(OSError):
+            tasks.start_mutation(24)
+        self.assertEqual(mock_results.release_lock.call_count, 1)
+
+
+@mock.patch('zero.tasks.results')
+class TestReleaseMutationLock(TestCase):
+    """:func:`.release_mutation_lock` releases the lock on a thing."""
+
+    def test_finished(self, mock_results: Any) -> None:
+        """When a mutation task finishes, its lock is released."""
+        sender = mock.MagicMock()
+        sender.name = tasks.mutate_a_thing.name
+        tasks.release_mutation_lock(sender=sender, task_id='the-task',
+                                    args=(24,), state='SUCCESS')
+        self.assertEqual(mock_results.release_lock.call_args[0],
+                         ('mutate-a-thing-24', 'the-task', sender.backend))
+
+    def test_retrying(self, mock_results: Any) -> None:
+        """A task that will be retried keeps its lock."""
+        sender = mock.MagicMock()
+        sender.name = tasks.mutate_a_thing.name
+        tasks.release_mutation_lock(sender=sender, task_id='the-task',
+                                    args=(24,), state='RETRY')
+        self.assertFalse(mock_results.release_lock.called)
+
+    def test_pipeline(self, mock_results: Any) -> None:
+        """The lock of a pipeline depends on its steps."""
+        sender = mock.MagicMock()
+        sender.name = tasks.run_pipeline.name
+        steps = [{'step': 'add_some_one'}]
+        tasks.release_mutation_lock(sender=sender, task_id='the-task',
+                                    args=(24, steps), state='FAILURE')
+        self.assertEqual(mock_results.release_lock.call_args[0][0],
+                         tasks._get_lock_name(24, steps))
+        self.assertNotEqual(mock_results.release_lock.call_args[0][0],
+                            tasks._get_lock_name(24))
+
+    def test_other_task(self, mock_results: Any) -> None:
+        """Other tasks do not hold locks."""
+        sender = mock.MagicMock()
+        sender.name = tasks.mutate_many_things.name
+        tasks.release_mutation_lock(sender=sender, task_id='the-task',
+                                    args=([24],), state='SUCCESS')
+        self.assertFalse(mock_results.release_lock.called)
+
+
+class TestRunPipeline(TestCase):
+    """:func:`run_pipeline` runs many mutations, and stores the thing once."""
+
+    @mock.patch('zero.tasks.baz')
+    @mock.patch('zero.tasks.things')
+    def test_run(self, mock_things: Any, mock_baz: Any) -> None:
+        """Each step runs in memory, and the thing is stored at the end."""
+        the_thing = Thing(id=24, name='a thing', created=datetime.now())
+        mock_things.get_a_thing.return_value = the_thing
+        session = mock_baz.BazService.current_session.return_value
+        session.retrieve_baz.return_value = Baz(foo='foo', mukluk=0)
+
+        result = tasks.run_pipeline(24, [
+            {'step': 'add_some_one'},
+            {'step': 'add_some_one'},
+            {'step': 'increment_mukluk', 'baz_id': 5},
+        ])
+        self.assertEqual(mock_things.update_a_thing.call_count, 1)
+        self.assertEqual(result['result'], len(the_thing.name))
+        self.assertEqual(result['mukluk'], {'5': the_thing.name.count('1')})
+        self.assertGreaterEqual(result['mukluk']['5'], 2)
+
+    @mock.patch('zero.tasks.things')
+    def test_invalid(self, mock_things: Any) -> None:
+        """An invalid pipeline does not mutate the thing."""
+        mock_things.get_a_thing.return_value = \
+            Thing(id=24, name='a thing', created=datetime.now())
+        with self.assertRaises(ValueError):
+            tasks.run_pipeline(24, [{'step': 'delete_everything'}])
+        self.assertFalse(mock_things.update_a_thing.called)
+
+
+class TestMutateManyThings(TestCase):
+    """:func:`mutate_many_things` mutates a chunk of Things at once."""
+
+    @mock.patch('zero.tasks.mutate')
+    @mock.patch('zero.tasks.things')
+    def test_mutate(self, mock_things: Any, mock_mutate: Any) -> None:
+        """The things are loaded, mutated and stored all at once."""
+        mock_things.get_many_things.return_value = {
+            1: Thing(id=1, name='a thing', created=datetime.now()),
+            3: Thing(id=3, name='another', created=datetime.now())
+        }
+
+        result = tasks.mutate_many_things([1, 2, 3], with_sleep=0)
+        self.assertEqual(mock_things.get_many_things.call_count, 1)
+        self.assertEqual(mock_mutate.add_some_one_to_many_things.call_count,
+                         1)
+        self.assertEqual(
+            len(mock_mutate.add_some_one_to_many_things.call_args[0][0]), 2
+        )
+        self.assertEqual(mock_things.update_many_things.call_count, 1)
+        self.assertEqual([r['thing_id'] for r in result['results']],
+                         [1, 2, 3])
+        self.assertEqual(result['results'][0]['result'], len('a thing'))
+        self.assertIn('error', result['results'][1])
+
+    @mock.patch('zero.tasks.reporter')
+    @mock.patch('zero.tasks.mutate')
+    @mock.patch('zero.tasks.things')
+    def test_progress(self, mock_things: Any, mock_mutate: Any,
+                      mock_reporter: Any) -> None:
+        """Progress is advanced once for each step."""
+        mock_things.get_many_things.return_value = {}
+        tasks.mutate_many_things([1], with_sleep=0)
+        total = mock_reporter.call_args[1]['total']
+        self.assertEqual(mock_reporter.return_value.advance.call_count, total)
+
+    @mock.patch('zero.tasks.mutate')
+    @mock.patch('zero.tasks.things')
+    def test_raises_ioerror(self, mock_things: Any, mock_mutate: Any) -> None:
+        """An IOError raised by the service is allowed to propagate."""
+        mock_things.get_many_things.side_effect = IOError
+        with self.assertRaises(IOError):
+            tasks.mutate_many_things([24], with_sleep=0)
+
 
 class TestCheckTaskStatus(TestCase):
     """:func:`.check_mutation_status` checks the status of a mutation task."""
@@ -69,13 +326,95 @@ class TestCheckTaskStatus(TestCase):
         self.assertEqual(mock_AsyncResult.call_args[0][0], task_id)
         self.assertEqual(task.status, Task.Status.FAILURE)
 
+    @mock.patch('zero.tasks.results.registry')
     @mock.patch('zero.tasks.AsyncResult')
-    def test_result_none_when_pending(self, mock_AsyncResult: Any) -> None:
+    def test_result_none_when_pending(self, mock_AsyncResult: Any,
+                                      mock_registry: Any) -> None:
         """When task is pending task result is None."""
         task_id = 'a440s0x0kf0k04s'
         eventual_result = 'The Result'
         mock_result = mock.MagicMock(status='PENDING', result=eventual_result)
         mock_AsyncResult.return_value = mock_result
+        mock_registry.exists.return_value = False
 
         with self.assertRaises(tasks.NoSuchTask):
             tasks.check_mutation_status(task_id)
+
+    @mock.patch('zero.tasks.results.registry')
+    @mock.patch('zero.tasks.AsyncResult')
+    def test_registered_task_is_in_progress(self, mock_AsyncResult: Any,
+                                            mock_registry: Any) -> None:
+        """When a registered task is pending, it is in progress."""
+        task_id = 'a440s0x0kf0k04s'
+        mock_AsyncResult.return_value = mock.MagicMock(status='PENDING')
+        mock_registry.exists.return_value = True
+
+        task = tasks.check_mutation_status(task_id)
+        self.assertEqual(task.status, Task.Status.IN_PROGRESS)
+        self.assertIsNone(task.result)
+
+    @mock.patch('zero.tasks.AsyncResult')
+    def test_progress_returned(self, mock_AsyncResult: Any) -> None:
+        """When a task has reported progress, the progress is returned."""
+        task_id = 'a440s0x0kf0k04s'
+        progress = {'done': 1, 'total': 4, 'percent': 25., 'eta': 3.}
+        mock_AsyncResult.return_value = \
+            mock.MagicMock(status='PROGRESS', result=progress)
+
+        task = tasks.check_mutation_status(task_id)
+        self.assertEqual(task.status, Task.Status.IN_PROGRESS)
+        self.assertEqual(task.progress, progress)
+        self.assertIsNone(task.result)
+
+
+class TestCheckLocalTaskStatus(TestCase):
+    """With the local executor, task state comes from the database."""
+
+    @mock.patch('zero.tasks.executor.is_enabled',
+                mock.MagicMock(return_value=True))
+    @mock.patch('zero.tasks.taskstore')
+    def test_status(self, mock_taskstore: Any) -> None:
+        """Known tasks are found; unknown tasks do not exist."""
+        mock_taskstore.get_many_tasks.return_value = {
+            'done': {'status': 'SUCCESS', 'result': {'thing_id': 1}}
+        }
+        task = tasks.check_mutation_status('done')
+        self.assertEqual(task.status, Task.Status.SUCCESS)
+        self.assertEqual(task.result, {'thing_id': 1})
+
+        mock_taskstore.get_many_tasks.return_value = {}
+        with self.assertRaises(tasks.NoSuchTask):
+            tasks.check_mutation_status('nope')
+
+
+class TestCheckTaskStatuses(TestCase):
+    """:func:`.check_mutation_statuses` checks many mutation tasks at once."""
+
+    def test_task_id_is_not_a_string(self) -> None:
+        """A ValueError is raised when any task ID is not a string."""
+        with self.assertRaises(ValueError):
+            tasks.check_mutation_statuses(['a440s0x', 1])  # type: ignore
+
+    @mock.patch('zero.tasks.results.registry')
+    @mock.patch('zero.tasks.results.get_many')
+    def test_statuses(self, mock_get_many: Any, mock_registry: Any) -> None:
+        """Tasks are retrieved in bulk, and unknown tasks are omitted."""
+        mock_get_many.return_value = {
+            'done': {'status': 'SUCCESS', 'result': {'thing_id': 1}},
+            'doing': {'status': 'SENT', 'result': None},
+            'queued': {'status': 'PENDING', 'result': None},
+            'nope': {'status': 'PENDING', 'result': None},
+        }
+        mock_registry.exists_many.return_value = {'queued'}
+        statuses = tasks.check_mutation_statuses(['done', 'doing', 'queued',
+                                                  'nope'])
+
+        self.assertEqual(mock_get_many.call_count, 1)
+        self.assertEqual(statuses['done'].status, Task.Status.SUCCESS)
+        self.assertEqual(statuses['done'].result, {'thing_id': 1})
+        self.assertEqual(statuses['doing'].status, Task.Status.IN_PROGRESS)
+        self.assertIsNone(statuses['doing'].result)
+        self.assertEqual(statuses['queued'].status, Task.Status.IN_PROGRESS)
+        self.assertEqual(mock_registry.exists_many.call_args[0][0],
+                         ['queued', 'nope'])
+        self.assertNotIn('nope', statuses)
@@ -0,0 +1,73 @@
+"""Tests for :mod:`zero.templating`."""
+
+import os
+import tempfile
+import shutil
+from unittest import TestCase
+
+from flask import Flask, render_template
+from jinja2 import DictLoader
+
+from .. import templating
+
+
+class TestTemplateCaching(TestCase):
+    """:func:`.templating.init_app` sets up template caching."""
+
+    def setUp(self) -> None:
+        """Create an app with some templates that count renderings."""
+        templating.fragments.clear()
+        templating.pages.clear()
+        self.cache_dir = tempfile.mkdtemp()
+        self.app = Flask('test')
+        self.app.config['JINJA_BYTECODE_CACHE_DIR'] = self.cache_dir
+        self.app.jinja_loader = DictLoader({    # type: ignore
+            'fragment.html':
+                '{% cache "counter" %}{{ count() }}{% endcache %}|{{ foo }}',
+            'page.html': '{{ count() }}|{{ foo }}'
+        })
+        templating.init_app(self.app)
+        self.renders = 0
+
+        def count() -> int:
+            self.renders += 1
+            return self.renders
+        self.app.jinja_env.globals['count'] = count
+
+    def tearDown(self) -> None:
+        """Remove the bytecode cache."""
+        shutil.rmtree(self.cache_dir)
+
+    def test_bytecode_cache(self) -> None:
+        """Compiled templates are written to the bytecode cache."""
+        with self.app.test_request_context():
+            render_template('page.html', foo='bar')
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+    def test_fragment_cache(self) -> None:
+        """A cached fragment is only rendered once."""
+        with self.app.test_request_context():
+            first = render_template('fragment.html', foo='bar')
+            second = render_template('fragment.html', foo='baz')
+        self.assertEqual(first, '1|bar')
+        self.assertEqual(second, '1|baz')
+
+    def test_page_cache_disabled(self) -> None:
+        """By default, pages are rendered every time."""
+        with self.app.test_request_context():
+            templating.render_cached(1, 'page.html', foo='bar')
+            templating.render_cached(1, 'page.html', foo='bar')
+        self.assertEqual(self.renders, 2)
+
+    def test_page_cache(self) -> None:
+        """Pages are cached by key and data."""
+        self.app.config['UI_PAGE_CACHE_TTL'] = 60
+        with self.app.test_request_context():
+            first = templating.render_cached(1, 'page.html', foo='bar')
+            again = templating.render_cached(1, 'page.html', foo='bar')
+            changed = templating.render_cached(1, 'page.html', foo='baz')
+            other = templating.render_cached(2, 'page.html', foo='bar')
+        self.assertEqual(first, '1|bar')
+        self.assertEqual(again, first)
+        self.assertEqual(changed, '2|baz', 'New data means a new page')
+        self.assertEqual(other, '3|bar', 'New key means a new page')
@@ -1,8 +1,10 @@
 """Entry-point for the Celery application."""
 
 from .factory import create_worker_app, celery_app
+from . import lifecycle
 
 app = create_worker_app()
 # celery_app.conf.result_backend = 'file:///tmp/foo'
 # celery_app.conf.broker_url = 'memory://localhost/'
-app.app_context().push()
\ No newline at end of file
+app.app_context().push()
+lifecycle.init_worker(app)
\ No newline at end of file